@@ -1,7 +1,7 @@
 # =============================================================================
 # A/B 테스트 데이터 분석 - 새 결제 페이지 UI 테스트
 # =============================================================================
-# 
+#
 # 📁 필요한 파일:
 #   - kr_customers.csv
 #   - kr_orders.csv
@@ -12,423 +12,818 @@
 #
 # 📦 필요한 라이브러리 설치:
 #   pip install pandas numpy matplotlib seaborn scipy
+#   pip install pyarrow   # (선택) 컬럼형 캐시
+#   pip install duckdb    # (선택) --backend duckdb (또는 polars)
+#
+# 🚀 실행:
+#   python ab_test_analysis.py --data-path ../data/raw/ --output-dir ../outputs/
+#   python ab_test_analysis.py --streaming --no-plots      # 대용량 로그
+#   python ab_test_analysis.py --backend duckdb --visitor-path ../data/raw/ab_test.parquet   # 파일에 직접 집계
+#   python ab_test_analysis.py --state ../data/state/ab_test.sqlite   # 일별 증분
+#   python ab_test_analysis.py --metrics ../outputs/metrics.jsonl --trace ../outputs/trace.json
+#   python ab_test_analysis.py --profile test.bootstrap   # 단계 하나만 cProfile
+#   python ab_test_analysis.py --tableau-extract ../outputs/tableau_extract/   # 대시보드용 집계
+#   python ab_test_analysis.py --dashboard ../outputs/ab_test_dashboard.html   # HTML 대시보드
+#   python ab_test_analysis.py --result-cache ../outputs/.cache/results   # 재실행 시 결과 재사용
+#   python ab_test_analysis.py --strict-integrity   # 무결성 검사 실패 시 리포트 중단
+#
+# 📚 다른 코드에서 사용 (load → aggregate → test → report):
+#   from ab_test_analysis import run_analysis
+#   results = run_analysis("../data/raw/", output_dir="../outputs/", plots=False)
+#
+# 여러 실험을 한 번에 분석하려면 batch_runner.py를 사용하세요.
 #
 # =============================================================================
 
+import argparse
+import io
+import os
+from contextlib import redirect_stdout
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-# 한글 폰트 설정 (Windows)
-plt.rcParams['font.family'] = 'Malgun Gothic'
-plt.rcParams['axes.unicode_minus'] = False
-
-# Mac인 경우 아래 주석 해제
-# plt.rcParams['font.family'] = 'AppleGothic'
+from data_loader import file_fingerprint, iter_csv_typed, load_table
+from cube import Cube
+from instrumentation import Tracer, stage
+from streaming import accumulate_chunks
+from state_store import StateStore
+from plotting import chart_payload, render_all
+from significance import proportion_confint, segment_tests
+from sequential import SequentialMonitor
+from bootstrap import bootstrap_mean_diff
+from cuped import pre_period_covariates, cuped_effects
+from order_metrics import order_metrics
+from tableau_extract import export_extract
+from dashboard import write_dashboard
+from integrity import IntegrityScanner, format_report, run_integrity
+from quantile_sketch import QUANTILES, QuantileSketch, SketchBuilder
+from bayesian import bayesian_segments
+from multiarm import compare_arms, cube_arms
+from segment_search import search_segments
+from result_cache import ResultCache
+from query_backend import BACKENDS, scan_visitors
 
 # =============================================================================
-# 1. 데이터 로드
+# 기본 설정
 # =============================================================================
-print("=" * 60)
-print("📂 1. 데이터 로드")
-print("=" * 60)
 
 # 파일 경로 설정 (본인 환경에 맞게 수정)
 DATA_PATH = "./"  # 데이터 파일이 있는 폴더 경로
 
-# 베이스 데이터 로드
-customers = pd.read_csv(f"{DATA_PATH}kr_customers.csv")
-orders = pd.read_csv(f"{DATA_PATH}kr_orders.csv")
-products = pd.read_csv(f"{DATA_PATH}kr_products.csv")
-order_items = pd.read_csv(f"{DATA_PATH}kr_order_items.csv")
-payments = pd.read_csv(f"{DATA_PATH}kr_payments.csv")
-
-# A/B 테스트 데이터 로드
-ab_test = pd.read_csv(f"{DATA_PATH}ab_test_checkout_ui.csv")
+# 결과 파일(CSV/PNG) 저장 폴더
+OUTPUT_DIR = "./"
+
+# 컬럼형 캐시 사용 여부 (첫 실행 시 CSV -> Arrow 변환, 이후 메모리 매핑)
+USE_CACHE = True
+
+# 압축 표현: ID를 정수 키로, 숫자 컬럼을 더 작은 타입으로 로드 (schema.py)
+# 메모리가 크게 줄지만 데이터 샘플의 customer_id는 정수 키로 표시됩니다.
+COMPACT = False
+
+# 스트리밍 모드: 방문자 로그를 청크 단위로 읽어 큐브와 분위수 스케치만 누적 (메모리 사용량 일정)
+# 원본 행이 필요한 항목(데이터 샘플, 객단가 박스플롯, 부트스트랩, CUPED, 주문 지표)은 생략되고
+# 중앙값은 스케치 근사값입니다.
+STREAMING = False
+CHUNK_SIZE = 1_000_000
+
+# 증분 상태 저장소 (SQLite) 경로: 지정하면 새 방문일만 집계해 저장된 상태에 병합
+# 원본 행은 로드하지 않으므로 스트리밍 모드와 같은 항목이 생략됩니다.
+STATE_PATH = None
+
+# 집계 쿼리 백엔드: "duckdb" / "polars"면 큐브와 분위수 스케치를 CSV/Parquet 파일에 직접 쿼리 (query_backend.py)
+# 원본 행은 로드하지 않으므로 스트리밍 모드와 같은 항목(및 무결성 행 단위 검사)이 생략됩니다.
+BACKEND = "pandas"
+
+# 결과 캐시 폴더: 지정하면 입력 지문 + 옵션이 같은 재실행에서 큐브/검정 결과/차트를 재사용
+# (result_cache.py, 크기 제한을 넘으면 오래 사용하지 않은 항목부터 삭제)
+RESULT_CACHE_DIR = None
+RESULT_CACHE_MAX_MB = 512
+
+# 결과 캐시 단계별 코드 의존 모듈 (앞 단계 코드는 입력으로 받는 앞 단계 키에 이미 반영됨)
+CACHE_CODE = {
+    "load": ["ab_test_analysis", "data_loader", "schema", "cube", "streaming", "quantile_sketch",
+             "integrity", "cuped", "multiarm", "significance", "query_backend"],
+    "analyze": ["ab_test_analysis", "cube", "significance", "segment_search", "bayesian", "multiarm",
+                "integrity", "cuped", "bootstrap", "order_metrics", "quantile_sketch", "sequential"],
+    "plots": ["plotting"],
+}
+# 결과에 영향이 없어 코드 지문에서 빼는 함수 (리포트 문구를 고쳐도 캐시가 그대로 적중)
+CACHE_EXCLUDED_FUNCTIONS = [
+    '_banner', '_value_counts', 'print_analysis', 'plot_results', '_cached_figures', 'print_summary',
+    'summary_insights',
+    'save_results', 'result_record', 'run_analysis', '_run_analysis', 'build_parser', 'main',
+]
+
+# 실험 설계 표본 수 (순차 검정의 정보 비율 기준)
+PLANNED_SAMPLE_SIZE = 20_000
+
+# 부트스트랩 재표본 수 / 시드
+BOOTSTRAP_REPLICATES = 2000
+BOOTSTRAP_SEED = 42
+
+# 무결성 검사(SRM, 교차 배정, 고객 속성 불일치 등)가 실패하면 리포트를 내지 않고 중단
+STRICT_INTEGRITY = False
+
+# 방문자 로그 / 베이스 테이블 이름
+VISITOR_TABLE = "ab_test_checkout_ui"
+BASE_TABLES = ["kr_customers", "kr_orders", "kr_products", "kr_order_items", "kr_payments"]
+
+# 분위수 처리 효과 (스케치) 대상 지표 / 세그먼트 차원
+QUANTILE_METRICS = ['checkout_time_sec', 'order_value']
+QUANTILE_SEGMENTS = [[], ['device']]
+
+# 그룹 라벨: 기준 그룹 / 요약 지표와 2그룹 검정의 주 비교 그룹 (없으면 기준 다음 그룹)
+# 그룹이 3개 이상이면 나머지 그룹은 피벗 열, 전환율 비교, 차트, 다중 그룹 비교에 함께 표시됩니다.
+CONTROL_ARM = 'control'
+TREATMENT_ARM = 'treatment'
+
+# 설계상 그룹별 배정 비율 ({그룹: 비율}, None이면 그룹 k개에 1/k씩, SRM 검정 기준)
+ARM_SHARES = None
+
+# 다중 그룹 비교 (multiarm.py): "control"이면 control 대비, "all"이면 모든 그룹 쌍
+ARM_COMPARISON_MODE = 'control'
+ARM_SEGMENTS = [[], ['device']]
+
+# 세그먼트 검정 대상 (차원, 다중비교 보정 방법)
+SEGMENT_TESTS = [
+    (['device'], 'holm'),
+    (['age_group'], 'holm'),
+    (['region'], 'holm'),
+    (['region', 'device', 'age_group'], 'bh'),
+]
+# 이질적 처리 효과 탐색 (segment_search.py): 지표 / 조합 최대 차원 수
+SEGMENT_SEARCH_METRICS = ['conversion', 'aov']
+SEGMENT_SEARCH_MAX_ORDER = None
+# 최종 요약 인사이트에 표시할 지표별 유의미 세그먼트 수
+SUMMARY_TOP_SEGMENTS = 2
+
+SEGMENT_SEARCH_COLUMNS = ['n_control', 'n_treatment', 'effect', 'rest_effect', 'hte', 'hte_se',
+                          'p_adjusted', 'hte_shrunk']
+
+SEGMENT_TEST_COLUMNS = ['n_control', 'n_treatment', 'rate_control', 'rate_treatment',
+                        'diff', 'p_value', 'p_adjusted', 'significant']
+
+
+def _banner(title, first=False):
+    """섹션 제목 출력"""
+    print(("" if first else "\n") + "=" * 60)
+    print(title)
+    print("=" * 60)
 
-print(f"✅ 고객 데이터: {len(customers):,}건")
-print(f"✅ 주문 데이터: {len(orders):,}건")
-print(f"✅ 상품 데이터: {len(products):,}건")
-print(f"✅ 주문상품 데이터: {len(order_items):,}건")
-print(f"✅ 결제 데이터: {len(payments):,}건")
-print(f"✅ A/B 테스트 데이터: {len(ab_test):,}건")
 
 # =============================================================================
-# 2. 데이터 기본 탐색
+# 1. 데이터 로드
 # =============================================================================
-print("\n" + "=" * 60)
-print("🔍 2. 데이터 기본 탐색")
-print("=" * 60)
-
-print("\n[A/B 테스트 데이터 구조]")
-print(ab_test.info())
-
-print("\n[A/B 테스트 데이터 샘플]")
-print(ab_test.head(10))
+def load(data_path=DATA_PATH, visitor_path=None, use_cache=USE_CACHE,
+         streaming=STREAMING, chunk_size=CHUNK_SIZE, state_path=STATE_PATH, refresh=(),
+         compact=COMPACT, result_cache=None, backend=BACKEND):
+    """베이스 테이블과 방문자 로그를 로드하고 집계 큐브 생성
+
+    visitor_path를 주면 `<data_path>/ab_test_checkout_ui.csv` 대신 해당 파일을
+    방문자 로그로 사용합니다. 베이스 테이블이 data_path에 없으면 None으로
+    두고, 이를 사용하는 분석(CUPED)은 건너뜁니다.
+    state_path를 주면 저장되지 않은 방문일만 집계해 상태 저장소에 병합하고,
+    저장소 전체 큐브로 분석합니다 (refresh: 다시 집계할 방문일).
+    compact=True면 테이블을 압축 표현(정수 키, 축소 타입)으로 로드합니다.
+    result_cache(ResultCache)를 주면 입력 파일 지문이 같을 때 큐브/스케치/무결성
+    스캔 결과를 재사용합니다 (상태 저장소 모드는 저장소 자체가 증분 캐시이므로 제외).
+    이때 방문자 로그 원본은 바로 읽지 않고, analyze 결과 캐시가 누락될 때만 로드합니다.
+    backend가 "duckdb" / "polars"면 방문자 로그(CSV 또는 Parquet)를 로드하지 않고
+    큐브/스케치 집계 쿼리를 파일에 직접 실행합니다 (스트리밍 모드 대신 사용).
+    (원본 스캔은 여기서 한 번만 수행, 이후 표/검정/차트는 큐브에서 계산)
+    """
+    data = {}
+    with stage("load.base_tables") as span:
+        for name in BASE_TABLES:
+            if os.path.exists(os.path.join(data_path, f"{name}.csv")):
+                data[name] = load_table(name, data_path, use_cache=use_cache, compact=compact)
+            else:
+                data[name] = None
+        span.rows_out = sum(len(df) for df in data.values() if df is not None)
+
+    visitor_path = visitor_path or os.path.join(data_path, f"{VISITOR_TABLE}.csv")
+    data['visitor_path'] = visitor_path
+    data['new_dates'] = None
+    data['integrity_scan'] = None
+    data['cache_key'] = None
+    cached = None
+    if result_cache is not None and not state_path:
+        inputs = [file_fingerprint(visitor_path)]
+        inputs += [file_fingerprint(os.path.join(data_path, f"{name}.csv"))
+                   for name in BASE_TABLES if data[name] is not None]
+        data['cache_key'] = _cache_key(result_cache, "load", inputs,
+                                       {"streaming": streaming, "compact": compact, "backend": backend})
+        cached = result_cache.get("load", data['cache_key'])
+
+    if state_path:
+        data['ab_test'] = None
+        with stage("load.state") as span, StateStore(state_path) as store:
+            data['new_dates'] = store.ingest_files([visitor_path], chunksize=chunk_size, refresh=refresh)
+            data['cube'] = store.cube()
+            data['sketch'] = store.sketch()
+            data['state_partitions'] = len(store.partitions())
+            data['state_skipped'] = store.skipped
+            span.rows_out = len(data['cube'])
+    elif backend != "pandas":
+        data['ab_test'] = None
+        # 프로젝션 pushdown + 다중 스레드 스캔, 결과(큐브/스케치)는 pandas 경로와 같음
+        with stage("load.query_cube") as span:
+            if cached is not None:
+                data.update(cached)
+                span.rows_out = len(data['cube'])
+                return data
+            data['cube'], data['sketch'] = scan_visitors(visitor_path, backend=backend)
+            span.rows_out = len(data['cube'])
+    elif streaming:
+        data['ab_test'] = None
+        # 큐브 집계, 분위수 스케치, 무결성 행 단위 검사를 같은 스캔에서 수행
+        with stage("load.stream_cube") as span:
+            if cached is not None:
+                data.update(cached)
+                span.rows_out = len(data['cube'])
+                return data
+            scanner = IntegrityScanner(data['kr_customers'], data['kr_orders'])
+            builder = SketchBuilder()
+            chunks = iter_csv_typed(visitor_path, VISITOR_TABLE, chunk_size)
+            data['cube'] = accumulate_chunks(builder.observe(scanner.observe(chunks)))
+            data['sketch'] = builder.result()
+            data['integrity_scan'] = scanner.result()
+            span.rows_out = len(data['cube'])
+    else:
+        # visit_date는 날짜 타입으로 로드됨
+        def load_visitors():
+            return load_table(VISITOR_TABLE, use_cache=use_cache, path=visitor_path, compact=compact)
+
+        if cached is not None:
+            # 큐브/스케치/데이터 미리보기는 캐시에서, 원본 행은 분석 결과 캐시가 누락될 때만 로드
+            data.update(cached)
+            data['ab_test'] = None
+            data['load_visitors'] = load_visitors
+            return data
+        with stage("load.visitors") as span:
+            data['ab_test'] = load_visitors()
+            span.rows_out = len(data['ab_test'])
+        data['visitor_preview'] = visitor_preview(data['ab_test'])
+        with stage("load.cube", rows_in=len(data['ab_test'])) as span:
+            data['cube'] = Cube.from_frame(data['ab_test'])
+            span.rows_out = len(data['cube'])
+        with stage("load.sketch", rows_in=len(data['ab_test'])) as span:
+            data['sketch'] = QuantileSketch.from_frame(data['ab_test'])
+            span.rows_out = len(data['sketch'])
+    if data['cache_key'] is not None:
+        result_cache.put("load", data['cache_key'],
+                         {key: data.get(key) for key in ['cube', 'sketch', 'integrity_scan', 'visitor_preview']})
+    return data
+
+
+def visitor_preview(ab_test):
+    """리포트 2번 섹션의 데이터 구조(info) / 샘플(head) 출력 (원본 행 없이 캐시에서 재사용)"""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        print(ab_test.info())
+    return {'info': buffer.getvalue(), 'head': ab_test.head(10)}
+
+
+def ensure_visitors(data):
+    """load 캐시 적중으로 미뤄 둔 방문자 로그 원본을 필요할 때 로드 -> data['ab_test']"""
+    loader = data.pop('load_visitors', None)
+    if loader is not None:
+        with stage("load.visitors") as span:
+            data['ab_test'] = loader()
+            span.rows_out = len(data['ab_test'])
+    return data['ab_test']
 
-print("\n[A/B 테스트 그룹 분포]")
-print(ab_test['test_group'].value_counts())
-
-print("\n[전환 여부 분포]")
-print(ab_test['converted'].value_counts())
 
 # =============================================================================
-# 3. A/B 테스트 핵심 지표 분석
+# 2~7. 집계 (큐브 롤업)
 # =============================================================================
-print("\n" + "=" * 60)
-print("📊 3. A/B 테스트 핵심 지표 분석")
-print("=" * 60)
-
-# 그룹별 전환율
-conversion_summary = ab_test.groupby('test_group').agg({
-    'customer_id': 'count',
-    'converted': ['sum', 'mean']
-}).round(4)
-conversion_summary.columns = ['총_방문자', '전환_수', '전환율']
-conversion_summary['전환율(%)'] = (conversion_summary['전환율'] * 100).round(2)
-
-print("\n[그룹별 전환율]")
-print(conversion_summary)
-
-# 전환율 차이 계산
-control_rate = ab_test[ab_test['test_group'] == 'control']['converted'].mean()
-treatment_rate = ab_test[ab_test['test_group'] == 'treatment']['converted'].mean()
-absolute_diff = treatment_rate - control_rate
-relative_lift = (treatment_rate - control_rate) / control_rate * 100
-
-print(f"\n[전환율 비교]")
-print(f"  Control (기존 UI): {control_rate:.2%}")
-print(f"  Treatment (새 UI): {treatment_rate:.2%}")
-print(f"  절대적 차이: +{absolute_diff:.2%}p")
-print(f"  상대적 개선율 (Lift): +{relative_lift:.1f}%")
+def arm_roles(cube, control=CONTROL_ARM, treatment=TREATMENT_ARM):
+    """큐브의 그룹 목록 (기준 그룹이 맨 앞)과 (기준 그룹, 주 비교 그룹)"""
+    arms = cube_arms(cube, control)
+    if len(arms) < 2:
+        raise ValueError(f"비교할 그룹이 2개 이상 필요합니다: {arms}")
+    return arms, arms[0], treatment if treatment in arms else arms[1]
+
+
+def _arm_column(name, arm, treatment):
+    """비교 열 이름 (주 비교 그룹은 '차이(%p)', 나머지는 '차이(%p) variant_b')"""
+    return name if arm == treatment else f"{name} {arm}"
+
+
+def _lift_pivot(cube, dim, arms, treatment, lift=True):
+    """차원별 그룹 전환율(%) 피벗 + 기준 그룹 대비 그룹별 차이(%p) / Lift(%)"""
+    pivot = cube.pivot(dim)[arms] * 100
+    control = arms[0]
+    for arm in [treatment] + [a for a in arms[1:] if a != treatment]:
+        pivot[_arm_column('차이(%p)', arm, treatment)] = pivot[arm] - pivot[control]
+        if lift:
+            pivot[_arm_column('Lift(%)', arm, treatment)] = (pivot[arm] - pivot[control]) / pivot[control] * 100
+    return pivot
+
+
+def aggregate(data):
+    """큐브에서 그룹/세그먼트/일별 집계 계산"""
+    cube = data['cube']
+    ab_test = data['ab_test']
+    agg = {}
+
+    arms, control, treatment = arm_roles(cube)
+    agg['arms'], agg['control_arm'], agg['treatment_arm'] = arms, control, treatment
+    agg['group_stats'] = cube.rollup('test_group')
+    group_summary = cube.summary('test_group')
+    agg['group_summary'] = group_summary
+
+    # 그룹별 전환율 (요약 지표는 기준 그룹 vs 주 비교 그룹, 모든 그룹은 arm_lifts)
+    agg['control_rate'] = group_summary.loc[control, 'conversion_rate']
+    agg['treatment_rate'] = group_summary.loc[treatment, 'conversion_rate']
+    agg['absolute_diff'] = agg['treatment_rate'] - agg['control_rate']
+    agg['relative_lift'] = agg['absolute_diff'] / agg['control_rate'] * 100
+    stats_by_arm = agg['group_stats'].loc[arms]
+    low, high = proportion_confint(stats_by_arm['converted_sum'], stats_by_arm['n'])
+    agg['arm_ci'] = pd.DataFrame({'low': low, 'high': high}, index=arms)
+    rates = group_summary.loc[arms[1:], 'conversion_rate']
+    agg['arm_lifts'] = pd.DataFrame({
+        'rate': rates,
+        'diff': rates - agg['control_rate'],
+        'lift': (rates - agg['control_rate']) / agg['control_rate'] * 100,
+    })
+
+    # 세그먼트별 전환율
+    agg['device_conversion'] = cube.summary(['test_group', 'device'])[
+        ['conversions', 'visitors', 'conversion_rate']
+    ]
+    agg['device_pivot'] = _lift_pivot(cube, 'device', arms, treatment)
+    agg['age_pivot'] = _lift_pivot(cube, 'age_group', arms, treatment)
+    region_pivot = _lift_pivot(cube, 'region', arms, treatment, lift=False)
+    agg['region_pivot'] = region_pivot.sort_values('차이(%p)', ascending=False)
+
+    # 전환된 고객만 필터링 (중앙값/분포 계산용, 복사본은 만들지 않음)
+    if ab_test is not None:
+        converted_df = ab_test[ab_test['converted'] == 1]
+        medians = converted_df.groupby('test_group', observed=True)[['order_value', 'checkout_time_sec']].median()
+    else:
+        # 스트리밍/상태 저장소 모드에서는 원본 행 대신 분위수 스케치로 중앙값 근사
+        converted_df = None
+        medians = pd.DataFrame({
+            metric: data['sketch'].quantiles(metric, 'test_group', [0.5])['p50']
+            for metric in ['order_value', 'checkout_time_sec']
+        })
+    agg['converted_df'] = converted_df
+    agg['medians'] = medians
+
+    agg['aov_control'] = group_summary.loc[control, 'aov_mean']
+    agg['aov_treatment'] = group_summary.loc[treatment, 'aov_mean']
+    agg['time_control'] = group_summary.loc[control, 'checkout_time_mean']
+    agg['time_treatment'] = group_summary.loc[treatment, 'checkout_time_mean']
+
+    # 결제 수단 분포 (전환 수 기준, 결제수단이 없는 미전환 셀은 제외)
+    payment_counts = cube.rollup(['test_group', 'payment_method'])['converted_sum'].reset_index()
+    payment_counts = payment_counts[payment_counts['payment_method'].notna()]
+    payment_counts = payment_counts.pivot(index='test_group', columns='payment_method', values='converted_sum')
+    agg['payment_dist'] = payment_counts.div(payment_counts.sum(axis=1), axis=0) * 100
+
+    # 일별 전환율
+    daily_conversion = cube.summary(['visit_date', 'test_group'])[
+        ['conversions', 'visitors', 'conversion_rate']
+    ].reset_index()
+    daily_conversion.columns = ['visit_date', 'test_group', '전환수', '방문자수', '전환율']
+    agg['daily_conversion'] = daily_conversion
+
+    # 누적 전환율 (일별 집계의 누적합, 원본 행 정렬 불필요)
+    daily_counts = cube.rollup(['visit_date', 'test_group'])[['n', 'converted_sum']].unstack('test_group').sort_index()
+    cumulative_counts = daily_counts.cumsum()
+    agg['daily_counts'] = daily_counts
+    agg['cumulative_counts'] = cumulative_counts
+    agg['cumulative_rate'] = cumulative_counts['converted_sum'] / cumulative_counts['n']
+    return agg
 
-# =============================================================================
-# 4. 통계적 유의성 검정
-# =============================================================================
-print("\n" + "=" * 60)
-print("📐 4. 통계적 유의성 검정")
-print("=" * 60)
-
-# 데이터 분리
-control_data = ab_test[ab_test['test_group'] == 'control']['converted']
-treatment_data = ab_test[ab_test['test_group'] == 'treatment']['converted']
-
-# Chi-square 검정
-contingency_table = pd.crosstab(ab_test['test_group'], ab_test['converted'])
-chi2, p_value, dof, expected = stats.chi2_contingency(contingency_table)
-
-print(f"\n[Chi-square 검정]")
-print(f"  Chi-square 통계량: {chi2:.4f}")
-print(f"  p-value: {p_value:.6f}")
-print(f"  자유도: {dof}")
-
-if p_value < 0.05:
-    print(f"  ✅ 결과: 통계적으로 유의미함 (p < 0.05)")
-else:
-    print(f"  ❌ 결과: 통계적으로 유의미하지 않음 (p >= 0.05)")
-
-# Z-test for proportions
-n_control = len(control_data)
-n_treatment = len(treatment_data)
-p_control = control_data.mean()
-p_treatment = treatment_data.mean()
-p_pooled = (control_data.sum() + treatment_data.sum()) / (n_control + n_treatment)
-
-se = np.sqrt(p_pooled * (1 - p_pooled) * (1/n_control + 1/n_treatment))
-z_score = (p_treatment - p_control) / se
-p_value_z = 2 * (1 - stats.norm.cdf(abs(z_score)))
-
-print(f"\n[Z-test for Proportions]")
-print(f"  Z-score: {z_score:.4f}")
-print(f"  p-value: {p_value_z:.6f}")
-
-# 95% 신뢰구간
-ci_control = stats.proportion_confint(control_data.sum(), n_control, alpha=0.05)
-ci_treatment = stats.proportion_confint(treatment_data.sum(), n_treatment, alpha=0.05)
-
-print(f"\n[95% 신뢰구간]")
-print(f"  Control: [{ci_control[0]:.2%}, {ci_control[1]:.2%}]")
-print(f"  Treatment: [{ci_treatment[0]:.2%}, {ci_treatment[1]:.2%}]")
 
 # =============================================================================
-# 5. 세그먼트별 분석
+# 4~7. 검정
 # =============================================================================
-print("\n" + "=" * 60)
-print("📈 5. 세그먼트별 분석")
-print("=" * 60)
-
-# 디바이스별 전환율
-print("\n[디바이스별 전환율]")
-device_conversion = ab_test.groupby(['test_group', 'device'])['converted'].agg(['sum', 'count', 'mean'])
-device_conversion.columns = ['전환수', '총수', '전환율']
-device_conversion['전환율(%)'] = (device_conversion['전환율'] * 100).round(2)
-print(device_conversion)
-
-# 피벗 테이블로 변환
-device_pivot = ab_test.pivot_table(
-    values='converted', 
-    index='device', 
-    columns='test_group', 
-    aggfunc='mean'
-) * 100
-device_pivot['차이(%p)'] = device_pivot['treatment'] - device_pivot['control']
-device_pivot['Lift(%)'] = (device_pivot['treatment'] - device_pivot['control']) / device_pivot['control'] * 100
-print("\n[디바이스별 전환율 비교]")
-print(device_pivot.round(2))
-
-# 연령대별 전환율
-print("\n[연령대별 전환율]")
-age_pivot = ab_test.pivot_table(
-    values='converted', 
-    index='age_group', 
-    columns='test_group', 
-    aggfunc='mean'
-) * 100
-age_pivot['차이(%p)'] = age_pivot['treatment'] - age_pivot['control']
-age_pivot['Lift(%)'] = (age_pivot['treatment'] - age_pivot['control']) / age_pivot['control'] * 100
-print(age_pivot.round(2))
-
-# 지역별 전환율
-print("\n[지역별 전환율 (Top 10)]")
-region_pivot = ab_test.pivot_table(
-    values='converted', 
-    index='region', 
-    columns='test_group', 
-    aggfunc='mean'
-) * 100
-region_pivot['차이(%p)'] = region_pivot['treatment'] - region_pivot['control']
-region_pivot = region_pivot.sort_values('차이(%p)', ascending=False)
-print(region_pivot.head(10).round(2))
+def test(data, agg, planned_sample_size=PLANNED_SAMPLE_SIZE,
+         bootstrap_replicates=BOOTSTRAP_REPLICATES, bootstrap_seed=BOOTSTRAP_SEED,
+         strict_integrity=STRICT_INTEGRITY, arm_mode=ARM_COMPARISON_MODE, arm_shares=ARM_SHARES):
+    """무결성 검사, 유의성 검정, 세그먼트 검정, 순차 검정, 부트스트랩, CUPED, 주문 라인 지표
+
+    2그룹 검정(유의성/세그먼트/베이지안/순차/부트스트랩/CUPED 등)은 기준 그룹과 주 비교 그룹
+    (agg['control_arm'], agg['treatment_arm'])을, 다중 그룹 비교와 SRM은 모든 그룹을 사용합니다.
+    arm_shares: SRM 설계 배정 비율 ({그룹: 비율}, None이면 1/k)
+    strict_integrity=True면 무결성 검사가 실패했을 때 RuntimeError를 발생시킵니다.
+    """
+    cube = data['cube']
+    ab_test = data['ab_test']
+    control, treatment = agg['control_arm'], agg['treatment_arm']
+    pair = {'control': control, 'treatment': treatment}
+    tests = {}
+
+    # 실험 무결성 (SRM은 큐브, 중복/교차 배정·속성·전환-주문 일치는 원본 행 또는 스트리밍 스캔)
+    with stage("test.integrity", rows_in=cube.total_rows):
+        tests['integrity'] = run_integrity(cube, ab_test, data['kr_customers'], data['kr_orders'],
+                                           scan=data.get('integrity_scan'), control=control,
+                                           shares=arm_shares)
+    if strict_integrity and not tests['integrity']['passed']:
+        report = tests['integrity']['report']
+        failed = report.loc[report['status'] == 'fail', 'check'].tolist()
+        raise RuntimeError(f"실험 무결성 검사 실패: {', '.join(failed)}")
+
+    # 전체 그룹 비교 (세그먼트 검정과 같은 벡터화 API 사용)
+    with stage("test.overall", rows_in=len(cube)):
+        overall_test = segment_tests(cube, [], correction='none', **pair).iloc[0]
+    tests['overall_test'] = overall_test
+    # Chi-square 검정 (2×2, Yates 보정)
+    tests['chi2'] = overall_test['chi2']
+    tests['p_value'] = overall_test['chi2_p_value']
+    tests['dof'] = 1
+    # Z-test for proportions
+    tests['z_score'] = overall_test['z']
+    tests['p_value_z'] = overall_test['p_value']
+    # 95% 신뢰구간 (Wilson)
+    tests['ci_control'] = (overall_test['ci_control_low'], overall_test['ci_control_high'])
+    tests['ci_treatment'] = (overall_test['ci_treatment_low'], overall_test['ci_treatment_high'])
+
+    # 세그먼트별 유의성 검정 (모든 셀을 한 번에 검정, 다중비교 보정)
+    with stage("test.segments", rows_in=len(cube)) as span:
+        tests['segment_tests'] = [
+            (dims, correction, segment_tests(cube, dims, correction=correction, **pair))
+            for dims, correction in SEGMENT_TESTS
+        ]
+        span.rows_out = sum(len(df) for _, _, df in tests['segment_tests'])
+
+    # 다차원 세그먼트 조합 탐색 (최소 지지도 가지치기, 여집합 대비 효과 차이, BH 보정)
+    with stage("test.segment_search", rows_in=len(cube)) as span:
+        tests['segment_search'] = pd.concat([
+            search_segments(cube, metric=metric, max_order=SEGMENT_SEARCH_MAX_ORDER, **pair).assign(metric=metric)
+            for metric in SEGMENT_SEARCH_METRICS
+        ], ignore_index=True)
+        span.rows_out = len(tests['segment_search'])
+
+    # 베이지안 사후분포 비교 (전체 + 세그먼트 검정과 같은 차원, 모든 셀을 한 번에)
+    with stage("test.bayesian", rows_in=len(cube)) as span:
+        tests['bayesian'] = bayesian_segments(cube, [[]] + [dims for dims, _ in SEGMENT_TESTS], **pair)
+        span.rows_out = len(tests['bayesian'])
+
+    # 그룹 수와 무관한 다중 그룹 비교 (전환율/객단가/결제시간, 셀마다 Holm 보정)
+    with stage("test.arms", rows_in=len(cube)) as span:
+        frames = []
+        for dims in ARM_SEGMENTS:
+            comparisons = compare_arms(cube, dims, mode=arm_mode, control=control)
+            segment = comparisons[dims].astype(str).agg(' / '.join, axis=1) if dims else comparisons['segment']
+            comparisons = comparisons.drop(columns=dims or ['segment'])
+            comparisons.insert(0, 'segment', segment)
+            frames.append(comparisons)
+        tests['arm_comparisons'] = pd.concat(frames, ignore_index=True)
+        span.rows_out = len(tests['arm_comparisons'])
+
+    # 객단가 / 결제시간 변화율의 부트스트랩 95% 신뢰구간 (원본 행 필요)
+    tests['bootstrap'] = {}
+    converted_df = agg['converted_df']
+    if converted_df is not None and bootstrap_replicates:
+        with stage("test.bootstrap", rows_in=len(converted_df)):
+            groups = converted_df['test_group'].to_numpy()
+            for column in ['order_value', 'checkout_time_sec']:
+                values = converted_df[column].to_numpy(dtype=float)
+                tests['bootstrap'][column] = bootstrap_mean_diff(
+                    values[groups == control], values[groups == treatment],
+                    n_boot=bootstrap_replicates, seed=bootstrap_seed,
+                )
+
+    # CUPED 분산 감소 (실험 전 주문 건수/결제 금액을 공변량으로 사용, 원본 행 필요)
+    # 실험 전 기간은 첫 방문일 이전 (모든 그룹 기준), 그룹이 3개 이상이면 기준 그룹과 주 비교 그룹의 행만 사용
+    tests['cuped'] = None
+    if ab_test is not None and data['kr_orders'] is not None and data['kr_payments'] is not None:
+        pair_rows = ab_test if len(agg['arms']) == 2 else ab_test[ab_test['test_group'].isin([control, treatment])]
+        with stage("test.cuped", rows_in=len(pair_rows)) as span:
+            covariates = pre_period_covariates(pair_rows, data['kr_orders'], data['kr_payments'],
+                                               start=ab_test['visit_date'].min())
+            tests['cuped'] = cuped_effects(pair_rows, covariates, treatment=treatment)
+            span.rows_out = len(tests['cuped'])
+
+    # 주문 라인 지표 (실험 기간 주문 ↔ 주문상품/상품/결제 조인, 델타 방법 비율 검정)
+    tests['order_metrics'] = None
+    order_tables = ['kr_orders', 'kr_payments', 'kr_products', 'kr_order_items']
+    if ab_test is not None and all(data[name] is not None for name in order_tables):
+        with stage("test.order_metrics", rows_in=len(data['kr_order_items'])) as span:
+            tests['order_metrics'] = order_metrics(ab_test, *(data[name] for name in order_tables), **pair)
+            span.rows_out = len(tests['order_metrics'])
+
+    # 분위수 처리 효과 (p50/p90/p99, 스케치만으로 계산하므로 모든 모드에서 사용 가능)
+    with stage("test.quantiles", rows_in=len(data['sketch'])) as span:
+        frames = []
+        for metric in QUANTILE_METRICS:
+            for by in QUANTILE_SEGMENTS:
+                effects = data['sketch'].quantile_effects(metric, by=by, qs=QUANTILES, **pair).reset_index()
+                segment = effects[by].astype(str).agg(' / '.join, axis=1) if by else '전체'
+                effects = effects.drop(columns=by)
+                effects.insert(0, 'segment', segment)
+                effects.insert(0, 'metric', metric)
+                frames.append(effects)
+        tests['quantile_effects'] = pd.concat(frames, ignore_index=True)
+        span.rows_out = len(tests['quantile_effects'])
+
+    # 순차 검정 (일별 증분 업데이트: 하루치 건수만 더해 판정 갱신)
+    with stage("test.sequential", rows_in=len(agg['daily_counts'])):
+        monitor = SequentialMonitor(planned_n=planned_sample_size)
+        for visit_date, row in agg['daily_counts'].iterrows():
+            monitor.update(row[('n', control)], row[('converted_sum', control)],
+                           row[('n', treatment)], row[('converted_sum', treatment)],
+                           label=visit_date)
+    tests['sequential_history'] = pd.DataFrame(monitor.history).set_index('label')
+    tests['sequential_state'] = monitor.to_dict()
+    return tests
 
-# =============================================================================
-# 6. 전환 고객 추가 분석
-# =============================================================================
-print("\n" + "=" * 60)
-print("💰 6. 전환 고객 추가 분석")
-print("=" * 60)
-
-# 전환된 고객만 필터링
-converted_df = ab_test[ab_test['converted'] == 1].copy()
-
-print(f"\n전환 고객 수: {len(converted_df):,}명")
-
-# 평균 객단가
-print("\n[평균 객단가]")
-aov_by_group = converted_df.groupby('test_group')['order_value'].agg(['mean', 'median', 'std'])
-aov_by_group.columns = ['평균', '중앙값', '표준편차']
-print(aov_by_group.round(0))
-
-aov_control = converted_df[converted_df['test_group'] == 'control']['order_value'].mean()
-aov_treatment = converted_df[converted_df['test_group'] == 'treatment']['order_value'].mean()
-print(f"\n객단가 상승: {((aov_treatment/aov_control)-1)*100:.1f}%")
-
-# 결제 소요 시간
-print("\n[결제 소요 시간]")
-time_by_group = converted_df.groupby('test_group')['checkout_time_sec'].agg(['mean', 'median', 'std'])
-time_by_group.columns = ['평균(초)', '중앙값(초)', '표준편차']
-print(time_by_group.round(1))
-
-time_control = converted_df[converted_df['test_group'] == 'control']['checkout_time_sec'].mean()
-time_treatment = converted_df[converted_df['test_group'] == 'treatment']['checkout_time_sec'].mean()
-print(f"\n시간 단축: {((time_control-time_treatment)/time_control)*100:.0f}%")
-
-# 결제 수단 분포
-print("\n[결제 수단 분포]")
-payment_dist = pd.crosstab(
-    converted_df['test_group'], 
-    converted_df['payment_method'], 
-    normalize='index'
-) * 100
-print(payment_dist.round(1))
 
 # =============================================================================
-# 7. 일별 추이 분석
+# 리포트 출력 (1~7)
 # =============================================================================
-print("\n" + "=" * 60)
-print("📅 7. 일별 추이 분석")
-print("=" * 60)
-
-# 날짜 변환
-ab_test['visit_date'] = pd.to_datetime(ab_test['visit_date'])
-
-# 일별 전환율
-daily_conversion = ab_test.groupby(['visit_date', 'test_group']).agg({
-    'converted': ['sum', 'count', 'mean']
-}).reset_index()
-daily_conversion.columns = ['visit_date', 'test_group', '전환수', '방문자수', '전환율']
+def _value_counts(counts, index_name):
+    """집계 건수 -> value_counts()와 같은 형식 (정수, 건수 내림차순, name='count')"""
+    counts = pd.Series(counts).round().astype(np.int64).sort_values(ascending=False, kind='stable')
+    counts.index.name = index_name
+    return counts.rename('count')
+
+
+def print_analysis(data, results):
+    """1~7번 섹션 결과 출력"""
+    cube = data['cube']
+    ab_test = data['ab_test']
+    r = results
+
+    _banner("📂 1. 데이터 로드", first=True)
+    for name, label in [('kr_customers', '고객'), ('kr_orders', '주문'), ('kr_products', '상품'),
+                        ('kr_order_items', '주문상품'), ('kr_payments', '결제')]:
+        if data[name] is not None:
+            print(f"✅ {label} 데이터: {len(data[name]):,}건")
+    print(f"✅ A/B 테스트 데이터: {cube.total_rows:,}건")
+    print(f"✅ 집계 큐브: {len(cube):,}개 셀")
+    if data.get('new_dates') is not None:
+        print(f"✅ 상태 저장소: 신규 방문일 {len(data['new_dates']):,}일 반영 "
+              f"(누적 {data['state_partitions']:,}일)")
+        if data.get('state_skipped'):
+            skipped = data['state_skipped']
+            print(f"⚠️ 이미 저장된 방문일 {len(skipped):,}일의 행 {sum(skipped.values()):,}건은 반영하지 않음 "
+                  f"({min(skipped)} ~ {max(skipped)}, 다시 집계하려면 --refresh)")
+
+    _banner("🔍 2. 데이터 기본 탐색")
+    preview = data.get('visitor_preview')
+    if preview is None and ab_test is not None:
+        preview = visitor_preview(ab_test)
+    if preview is not None:
+        print("\n[A/B 테스트 데이터 구조]")
+        print(preview['info'], end='')
+
+        print("\n[A/B 테스트 데이터 샘플]")
+        print(preview['head'])
+
+    group_stats = r['group_stats']
+    print("\n[A/B 테스트 그룹 분포]")
+    print(_value_counts(group_stats['n'], 'test_group'))
+
+    print("\n[전환 여부 분포]")
+    conversions = group_stats['converted_sum'].sum()
+    print(_value_counts({1: conversions, 0: group_stats['n'].sum() - conversions}, 'converted'))
+
+    _banner("📊 3. A/B 테스트 핵심 지표 분석")
+    conversion_summary = r['group_summary'][['visitors', 'conversions', 'conversion_rate']].round(4)
+    conversion_summary.columns = ['총_방문자', '전환_수', '전환율']
+    conversion_summary['전환율(%)'] = (conversion_summary['전환율'] * 100).round(2)
+
+    print("\n[그룹별 전환율]")
+    print(conversion_summary)
+
+    print(f"\n[전환율 비교]")
+    print(f"  Control (기존 UI): {r['control_rate']:.2%}")
+    print(f"  Treatment (새 UI): {r['treatment_rate']:.2%}")
+    print(f"  절대적 차이: +{r['absolute_diff']:.2%}p")
+    print(f"  상대적 개선율 (Lift): +{r['relative_lift']:.1f}%")
+    for arm, row in r['arm_lifts'].drop(index=r['treatment_arm']).iterrows():
+        print(f"  {arm}: {row['rate']:.2%} (차이 {row['diff']:+.2%}p, Lift {row['lift']:+.1f}%)")
+
+    _banner("📐 4. 통계적 유의성 검정")
+    integrity = r['integrity']
+    print(f"\n[실험 무결성 검증]")
+    print("\n".join(format_report(integrity['report'])))
+    print(f"  {'✅ 결과: 무결성 검사 통과' if integrity['passed'] else '❌ 결과: 무결성 검사 실패 - 결과 해석 주의'}")
+
+    print(f"\n[Chi-square 검정]")
+    print(f"  Chi-square 통계량: {r['chi2']:.4f}")
+    print(f"  p-value: {r['p_value']:.6f}")
+    print(f"  자유도: {r['dof']}")
+
+    if r['p_value'] < 0.05:
+        print(f"  ✅ 결과: 통계적으로 유의미함 (p < 0.05)")
+    else:
+        print(f"  ❌ 결과: 통계적으로 유의미하지 않음 (p >= 0.05)")
+
+    print(f"\n[Z-test for Proportions]")
+    print(f"  Z-score: {r['z_score']:.4f}")
+    print(f"  p-value: {r['p_value_z']:.6f}")
+
+    ci_control, ci_treatment = r['ci_control'], r['ci_treatment']
+    print(f"\n[95% 신뢰구간]")
+    print(f"  Control: [{ci_control[0]:.2%}, {ci_control[1]:.2%}]")
+    print(f"  Treatment: [{ci_treatment[0]:.2%}, {ci_treatment[1]:.2%}]")
+    for arm, ci in r['arm_ci'].drop(index=[r['control_arm'], r['treatment_arm']]).iterrows():
+        print(f"  {arm}: [{ci['low']:.2%}, {ci['high']:.2%}]")
+
+    bayes = r['bayesian']
+    print(f"\n[베이지안 분석 (전환율 Beta-Binomial / 객단가 Normal-Gamma)]")
+    overall = bayes[bayes['dimension'] == 'overall'].set_index('metric')
+    row = overall.loc['conversion']
+    print(f"  전환율: Treatment가 더 나을 확률 {row['prob_treatment_better']:.1%}, "
+          f"기대 손실 {row['expected_loss_treatment']:.4%}p, "
+          f"차이 95% 신용구간 [{row['diff_ci_low']:+.2%}p, {row['diff_ci_high']:+.2%}p]")
+    row = overall.loc['aov']
+    print(f"  객단가: Treatment가 더 나을 확률 {row['prob_treatment_better']:.1%}, "
+          f"기대 손실 {row['expected_loss_treatment']:,.0f}원, "
+          f"차이 95% 신용구간 [{row['diff_ci_low']:+,.0f}원, {row['diff_ci_high']:+,.0f}원]")
+    device = bayes[bayes['dimension'] == 'device'].pivot(index='segment', columns='metric',
+                                                         values='prob_treatment_better')
+    device = (device[['conversion', 'aov']] * 100).rename(columns={'conversion': '전환율(%)', 'aov': '객단가(%)'})
+    device.index.name, device.columns.name = 'device', None
+    print("\n[디바이스별 Treatment가 더 나을 확률 (베이지안)]")
+    print(device.round(1))
+
+    arms = r['arm_comparisons']
+    arms = arms[arms['segment'] == '전체']
+    n_arms = len(set(arms['arm_a']) | set(arms['arm_b']))
+    print(f"\n[다중 그룹 비교 ({n_arms}개 그룹, 지표 × 비교 쌍 Holm 보정)]")
+    table = arms.set_index(['metric', 'arm_a', 'arm_b'])[['mean_a', 'mean_b', 'diff', 'lift', 'p_adjusted']].copy()
+    table['lift'] = table['lift'] * 100
+    table.columns = ['기준', '비교', '차이', 'Lift(%)', '보정 p-value']
+    print(table.round(4).to_string())
+
+    _banner("📈 5. 세그먼트별 분석")
+    print("\n[디바이스별 전환율]")
+    device_conversion = r['device_conversion'].copy()
+    device_conversion.columns = ['전환수', '총수', '전환율']
+    device_conversion['전환율(%)'] = (device_conversion['전환율'] * 100).round(2)
+    print(device_conversion)
+
+    print("\n[디바이스별 전환율 비교]")
+    print(r['device_pivot'].round(2).to_string())
+
+    print("\n[연령대별 전환율]")
+    print(r['age_pivot'].round(2).to_string())
+
+    print("\n[지역별 전환율 (Top 10)]")
+    print(r['region_pivot'].head(10).round(2).to_string())
+
+    for dims, correction, seg_result in r['segment_tests']:
+        label = ' × '.join(dims)
+        n_sig = int(seg_result['significant'].sum())
+        print(f"\n[세그먼트 유의성 검정: {label}] 셀 {len(seg_result):,}개, "
+              f"유의미 {n_sig:,}개 ({correction.upper()} 보정)")
+        print(seg_result[SEGMENT_TEST_COLUMNS].sort_values('p_value').head(10).round(4))
+
+    search = r['segment_search']
+    for metric, label in [('conversion', '전환율'), ('aov', '객단가')]:
+        found = search[search['metric'] == metric]
+        print(f"\n[세그먼트 조합 탐색: {label} 효과가 나머지와 다른 세그먼트 (Top 10)] "
+              f"검정 {len(found):,}개, 유의미 {int(found['significant'].sum()):,}개 (BH 보정)")
+        print(found.set_index('segment')[SEGMENT_SEARCH_COLUMNS].head(10).round(4).to_string())
+
+    _banner("💰 6. 전환 고객 추가 분석")
+    group_summary, medians = r['group_summary'], r['medians']
+    print(f"\n전환 고객 수: {int(group_summary['conversions'].sum()):,}명")
+
+    print("\n[평균 객단가]")
+    aov_by_group = pd.DataFrame({
+        '평균': group_summary['aov_mean'],
+        '중앙값': medians['order_value'],
+        '표준편차': group_summary['aov_std'],
+    })
+    print(aov_by_group.round(0))
+    print(f"\n객단가 상승: {((r['aov_treatment']/r['aov_control'])-1)*100:.1f}%")
+
+    print("\n[결제 소요 시간]")
+    time_by_group = pd.DataFrame({
+        '평균(초)': group_summary['checkout_time_mean'],
+        '중앙값(초)': medians['checkout_time_sec'],
+        '표준편차': group_summary['checkout_time_std'],
+    })
+    print(time_by_group.round(1))
+    print(f"\n시간 단축: {((r['time_control']-r['time_treatment'])/r['time_control'])*100:.0f}%")
+    if r['converted_df'] is None:
+        print("  (중앙값: 분위수 스케치 근사값)")
+
+    if r['bootstrap']:
+        n_boot = next(iter(r['bootstrap'].values()))['n_boot']
+        print(f"\n[부트스트랩 95% 신뢰구간 (재표본 {n_boot:,}회)]")
+        for column, label in [('order_value', '객단가 변화율'), ('checkout_time_sec', '결제시간 변화율')]:
+            boot = r['bootstrap'][column]
+            print(f"  {label}: {boot['rel']:+.1%} [{boot['rel_ci'][0]:+.1%}, {boot['rel_ci'][1]:+.1%}]")
+
+    print("\n[분위수 처리 효과 (분위수 스케치, 95% 신뢰구간)]")
+    quantiles = r['quantile_effects']
+    quantiles = quantiles[quantiles['segment'] == '전체'].set_index(['metric', 'quantile'])
+    table = quantiles[['control', 'treatment', 'diff', 'rel_diff', 'ci_low', 'ci_high']].copy()
+    table['rel_diff'] = table['rel_diff'] * 100
+    table.columns = ['Control', 'Treatment', '차이', '변화율(%)', '차이 하한', '차이 상한']
+    print(table.round(1).to_string())
+
+    if r['cuped'] is not None:
+        print("\n[CUPED 보정 추정 (실험 전 구매 이력 공변량)]")
+        for metric, label in [('conversion', '전환율 차이'), ('revenue_per_visitor', '방문자당 매출 차이')]:
+            row = r['cuped'].loc[metric]
+            print(f"  {label}: 원 추정 {row['diff']:.4f} (SE {row['se']:.4f}) → "
+                  f"CUPED {row['cuped_diff']:.4f} (SE {row['cuped_se']:.4f}), "
+                  f"분산 감소 {row['variance_reduction']:.1%}")
+
+    if r['order_metrics'] is not None:
+        print("\n[주문 라인 지표 (실험 기간 주문, 델타 방법 95% 신뢰구간)]")
+        table = r['order_metrics'][['control', 'treatment', 'lift', 'ci_low', 'ci_high', 'p_adjusted']].copy()
+        table['lift'] = table['lift'] * 100
+        table.columns = ['Control', 'Treatment', 'Lift(%)', '차이 하한', '차이 상한', '보정 p-value']
+        print(table.round(4).to_string())
+
+    print("\n[결제 수단 분포]")
+    print(r['payment_dist'].round(1))
+
+    _banner("📅 7. 일별 추이 분석")
+    print("\n[일별 전환율 추이 (처음 7일)]")
+    daily_conversion = r['daily_conversion']
+    daily_pivot = daily_conversion.pivot(index='visit_date', columns='test_group', values='전환율')
+    print((daily_pivot.head(7) * 100).round(2))
+
+    print("\n[누적 전환율 - 마지막 시점]")
+    cumulative_final = r['cumulative_rate'].iloc[-1] * 100
+    print(cumulative_final.round(2))
+
+    sequential_history = r['sequential_history']
+    print("\n[순차 검정 - 일별 판정]")
+    print(sequential_history[['info_fraction', 'z', 'msprt_p_value', 'obf_boundary_z']].head(7).round(4))
+    print("  (obf_boundary_z: inf = 쓸 alpha가 없어 기각 불가, NaN = 중단 이후 등 경계 계산 안 함)")
+    for method, column in [('mSPRT (항상 유효한 p-value)', 'msprt_reject'),
+                           ("O'Brien-Fleming alpha spending", 'obf_reject')]:
+        rejected = sequential_history.index[sequential_history[column]]
+        if len(rejected):
+            print(f"  ✅ {method}: {pd.Timestamp(rejected[0]):%Y-%m-%d} 시점에 조기 중단 가능")
+        else:
+            print(f"  ❌ {method}: 아직 유의미하지 않음")
 
-print("\n[일별 전환율 추이 (처음 7일)]")
-daily_pivot = daily_conversion.pivot(index='visit_date', columns='test_group', values='전환율')
-print((daily_pivot.head(7) * 100).round(2))
-
-# 누적 전환율
-ab_test_sorted = ab_test.sort_values('visit_date')
-ab_test_sorted['cumsum_converted'] = ab_test_sorted.groupby('test_group')['converted'].cumsum()
-ab_test_sorted['cumcount'] = ab_test_sorted.groupby('test_group').cumcount() + 1
-ab_test_sorted['cumulative_rate'] = ab_test_sorted['cumsum_converted'] / ab_test_sorted['cumcount']
-
-print("\n[누적 전환율 - 마지막 시점]")
-cumulative_final = ab_test_sorted.groupby('test_group')['cumulative_rate'].last() * 100
-print(cumulative_final.round(2))
 
 # =============================================================================
-# 8. 시각화
+# 8~9. 시각화
 # =============================================================================
-print("\n" + "=" * 60)
-print("📊 8. 시각화 생성")
-print("=" * 60)
-
-# 그래프 스타일 설정
-plt.style.use('seaborn-v0_8-whitegrid')
-colors = {'control': '#6B7280', 'treatment': '#3B82F6'}
-
-# Figure 생성 (2x3 서브플롯)
-fig, axes = plt.subplots(2, 3, figsize=(15, 10))
-fig.suptitle('A/B 테스트 분석 결과 - 새 결제 UI 테스트', fontsize=16, fontweight='bold')
-
-# 8-1. 전환율 비교 막대 그래프
-ax1 = axes[0, 0]
-conversion_rates = [control_rate * 100, treatment_rate * 100]
-bars = ax1.bar(['Control\n(기존 UI)', 'Treatment\n(새 UI)'], conversion_rates, 
-               color=[colors['control'], colors['treatment']], edgecolor='black', linewidth=1.2)
-ax1.set_ylabel('전환율 (%)')
-ax1.set_title('그룹별 전환율 비교')
-ax1.set_ylim(0, max(conversion_rates) * 1.3)
-
-# 값 표시
-for bar, rate in zip(bars, conversion_rates):
-    ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5, 
-             f'{rate:.2f}%', ha='center', va='bottom', fontweight='bold', fontsize=11)
-
-# Lift 표시
-ax1.annotate(f'+{relative_lift:.1f}%', xy=(1, treatment_rate*100), 
-             xytext=(1.3, treatment_rate*100 + 2),
-             fontsize=12, color='green', fontweight='bold',
-             arrowprops=dict(arrowstyle='->', color='green'))
-
-# 8-2. 디바이스별 전환율
-ax2 = axes[0, 1]
-device_data = ab_test.groupby(['device', 'test_group'])['converted'].mean().unstack() * 100
-x = np.arange(len(device_data.index))
-width = 0.35
-bars1 = ax2.bar(x - width/2, device_data['control'], width, label='Control', color=colors['control'])
-bars2 = ax2.bar(x + width/2, device_data['treatment'], width, label='Treatment', color=colors['treatment'])
-ax2.set_ylabel('전환율 (%)')
-ax2.set_title('디바이스별 전환율')
-ax2.set_xticks(x)
-ax2.set_xticklabels(device_data.index)
-ax2.legend()
-ax2.set_ylim(0, device_data.values.max() * 1.3)
-
-# 8-3. 연령대별 전환율
-ax3 = axes[0, 2]
-age_order = ['20대', '30대', '40대', '50대', '60대 이상']
-age_data = ab_test.groupby(['age_group', 'test_group'])['converted'].mean().unstack() * 100
-age_data = age_data.reindex(age_order)
-x = np.arange(len(age_data.index))
-bars1 = ax3.bar(x - width/2, age_data['control'], width, label='Control', color=colors['control'])
-bars2 = ax3.bar(x + width/2, age_data['treatment'], width, label='Treatment', color=colors['treatment'])
-ax3.set_ylabel('전환율 (%)')
-ax3.set_title('연령대별 전환율')
-ax3.set_xticks(x)
-ax3.set_xticklabels(age_data.index, rotation=45, ha='right')
-ax3.legend()
-
-# 8-4. 일별 전환율 추이
-ax4 = axes[1, 0]
-for group in ['control', 'treatment']:
-    group_data = daily_conversion[daily_conversion['test_group'] == group]
-    ax4.plot(group_data['visit_date'], group_data['전환율'] * 100, 
-             marker='o', markersize=4, label=group.capitalize(), color=colors[group], linewidth=2)
-ax4.set_ylabel('전환율 (%)')
-ax4.set_xlabel('날짜')
-ax4.set_title('일별 전환율 추이')
-ax4.legend()
-ax4.tick_params(axis='x', rotation=45)
-
-# 8-5. 객단가 분포 (박스플롯)
-ax5 = axes[1, 1]
-converted_df.boxplot(column='order_value', by='test_group', ax=ax5)
-ax5.set_ylabel('주문 금액 (원)')
-ax5.set_xlabel('그룹')
-ax5.set_title('그룹별 객단가 분포')
-plt.suptitle('')  # 기본 제목 제거
-
-# 8-6. 결제 수단 비교
-ax6 = axes[1, 2]
-payment_data = pd.crosstab(converted_df['payment_method'], converted_df['test_group'], normalize='columns') * 100
-payment_data.plot(kind='barh', ax=ax6, color=[colors['control'], colors['treatment']])
-ax6.set_xlabel('비중 (%)')
-ax6.set_title('결제 수단 비중')
-ax6.legend(title='그룹')
-
-plt.tight_layout()
-plt.savefig('ab_test_analysis_result.png', dpi=150, bbox_inches='tight')
-print("✅ 'ab_test_analysis_result.png' 저장 완료!")
-plt.show()
+def plot_results(results, output_dir=OUTPUT_DIR, show=False, verbose=True, workers=None,
+                 result_cache=None, cache_key=None):
+    """분석 결과 차트 2종 저장 (집계값 기반, 헤드리스 병렬 렌더링)
+
+    show=True면 현재 프로세스에서 그리고 화면에도 표시합니다.
+    result_cache와 분석 결과의 캐시 키(cache_key)를 주면 저장해 둔 PNG를 그대로 씁니다.
+    """
+    if verbose:
+        _banner("📊 8. 시각화 생성")
+    if result_cache is None or cache_key is None or show:
+        paths = render_all(chart_payload(results), output_dir, workers=workers, show=show)
+    else:
+        paths = _cached_figures(results, output_dir, workers, result_cache,
+                                _cache_key(result_cache, "plots", [cache_key]))
+    if verbose:
+        for path in paths:
+            print(f"✅ '{os.path.basename(path)}' 저장 완료!")
+    return paths
+
+
+def _cached_figures(results, output_dir, workers, result_cache, key):
+    """캐시에 있는 차트 PNG를 output_dir에 쓰고, 없으면 렌더링 후 캐시에 저장"""
+    figures = result_cache.get("plots", key)
+    if figures is None:
+        paths = render_all(chart_payload(results), output_dir, workers=workers)
+        figures = {}
+        for path in paths:
+            with open(path, "rb") as f:
+                figures[os.path.basename(path)] = f.read()
+        result_cache.put("plots", key, figures)
+        return paths
+    paths = []
+    for fname, content in figures.items():
+        path = os.path.join(output_dir, fname)
+        with open(path, "wb") as f:
+            f.write(content)
+        paths.append(path)
+    return paths
 
-# =============================================================================
-# 9. 추가 시각화 - 신뢰구간 & 누적 전환율
-# =============================================================================
-fig2, axes2 = plt.subplots(1, 2, figsize=(12, 5))
-fig2.suptitle('통계적 검증 시각화', fontsize=14, fontweight='bold')
-
-# 9-1. 신뢰구간 에러바
-ax1 = axes2[0]
-groups = ['Control', 'Treatment']
-means = [control_rate * 100, treatment_rate * 100]
-ci_lower = [ci_control[0] * 100, ci_treatment[0] * 100]
-ci_upper = [ci_control[1] * 100, ci_treatment[1] * 100]
-errors = [[m - l for m, l in zip(means, ci_lower)], 
-          [u - m for m, u in zip(means, ci_upper)]]
-
-ax1.errorbar(groups, means, yerr=errors, fmt='o', markersize=10, capsize=10, 
-             capthick=2, elinewidth=2, color=[colors['control'], colors['treatment']])
-ax1.set_ylabel('전환율 (%)')
-ax1.set_title('95% 신뢰구간')
-ax1.set_ylim(10, 22)
-
-# 신뢰구간 겹침 여부 표시
-if ci_control[1] < ci_treatment[0]:
-    ax1.text(0.5, 20, '✅ 신뢰구간 겹치지 않음\n→ 통계적으로 유의미', 
-             ha='center', fontsize=10, color='green',
-             bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.5))
-
-# 9-2. 누적 전환율 추이
-ax2 = axes2[1]
-for group in ['control', 'treatment']:
-    group_data = ab_test_sorted[ab_test_sorted['test_group'] == group]
-    # 샘플링 (너무 많으면 그래프가 느려짐)
-    sample_idx = np.linspace(0, len(group_data)-1, 100, dtype=int)
-    sampled = group_data.iloc[sample_idx]
-    ax2.plot(sampled['cumcount'], sampled['cumulative_rate'] * 100, 
-             label=group.capitalize(), color=colors[group], linewidth=2)
-
-ax2.set_xlabel('누적 샘플 수')
-ax2.set_ylabel('누적 전환율 (%)')
-ax2.set_title('누적 전환율 추이 (수렴 확인)')
-ax2.legend()
-ax2.axhline(y=control_rate*100, color=colors['control'], linestyle='--', alpha=0.5)
-ax2.axhline(y=treatment_rate*100, color=colors['treatment'], linestyle='--', alpha=0.5)
-
-plt.tight_layout()
-plt.savefig('ab_test_statistical_validation.png', dpi=150, bbox_inches='tight')
-print("✅ 'ab_test_statistical_validation.png' 저장 완료!")
-plt.show()
 
 # =============================================================================
 # 10. 최종 요약 리포트
 # =============================================================================
-print("\n" + "=" * 60)
-print("📋 10. 최종 요약 리포트")
-print("=" * 60)
-
-print(f"""
+def print_summary(results):
+    """최종 요약 박스 출력"""
+    r = results
+    control_rate, treatment_rate = r['control_rate'], r['treatment_rate']
+    relative_lift, p_value, z_score = r['relative_lift'], r['p_value'], r['z_score']
+    aov_control, aov_treatment = r['aov_control'], r['aov_treatment']
+    time_control, time_treatment = r['time_control'], r['time_treatment']
+    insights = "\n".join(f"│  • {line}" for line in summary_insights(r))
+
+    _banner("📋 10. 최종 요약 리포트")
+
+    print(f"""
 ┌─────────────────────────────────────────────────────────────┐
 │           🧪 A/B 테스트 최종 결과 요약                        │
 ├─────────────────────────────────────────────────────────────┤
@@ -447,8 +842,7 @@ print(f"""
 │  • Z-score: {z_score:.4f}                                          │
 │                                                             │
 │  💡 주요 인사이트                                            │
-│  • 모바일에서 가장 큰 효과 (+{(device_pivot.loc['모바일', '차이(%p)']):.2f}%p)               │
-│  • 20~30대에서 효과 극대화 (+6%p 이상)                       │
+{insights}
 │  • 간편결제 비중 증가 (신용카드 ↓, 카카오/네이버페이 ↑)     │
 │                                                             │
 │  ✅ 권고사항: 새 결제 UI 전체 적용                           │
@@ -457,29 +851,347 @@ print(f"""
 └─────────────────────────────────────────────────────────────┘
 """)
 
+
+def summary_insights(results, top=SUMMARY_TOP_SEGMENTS):
+    """최종 요약 인사이트 문장 (디바이스 피벗 최대 차이 + 세그먼트 탐색의 유의미 세그먼트)"""
+    r = results
+    lines = []
+    device_diff = r['device_pivot']['차이(%p)'].dropna()
+    if len(device_diff):
+        device = device_diff.abs().idxmax()
+        lines.append(f"디바이스별 효과 최대: {device} ({device_diff[device]:+.2f}%p)")
+
+    search = r['segment_search']
+    for metric, label, scale, unit in [('conversion', '전환율', 100, '%p'), ('aov', '객단가', 1, '원')]:
+        found = search[search['metric'] == metric]
+        significant = found[found['significant']]
+        if significant.empty:
+            lines.append(f"{label}: 유의미한 세그먼트 없음 (검정 {len(found):,}개, BH 보정)")
+            continue
+        order = significant['hte_shrunk'].abs().sort_values(ascending=False).index[:top]
+        for row in significant.loc[order].itertuples():
+            lines.append(f"{label}: {row.segment} 효과가 나머지 대비 {row.hte_shrunk * scale:+,.2f}{unit}")
+    return lines
+
+
 # =============================================================================
 # 11. 결과 데이터 저장
 # =============================================================================
-print("\n" + "=" * 60)
-print("💾 11. 결과 데이터 저장")
-print("=" * 60)
-
-# 분석 결과 요약 저장
-summary_data = {
-    '지표': ['전환율', '객단가', '결제소요시간', 'p-value', 'Z-score'],
-    'Control': [f'{control_rate:.2%}', f'{aov_control:,.0f}원', f'{time_control:.0f}초', '-', '-'],
-    'Treatment': [f'{treatment_rate:.2%}', f'{aov_treatment:,.0f}원', f'{time_treatment:.0f}초', '-', '-'],
-    '변화': [f'+{relative_lift:.1f}%', f'+{((aov_treatment/aov_control)-1)*100:.1f}%', 
-             f'-{((time_control-time_treatment)/time_control)*100:.0f}%', f'{p_value:.6f}', f'{z_score:.4f}']
-}
-summary_df = pd.DataFrame(summary_data)
-summary_df.to_csv('ab_test_summary.csv', index=False, encoding='utf-8-sig')
-print("✅ 'ab_test_summary.csv' 저장 완료!")
+def save_results(results, output_dir=OUTPUT_DIR, verbose=True):
+    """요약/세그먼트 결과 CSV 저장"""
+    r = results
+    control_rate, treatment_rate = r['control_rate'], r['treatment_rate']
+    relative_lift, p_value, z_score = r['relative_lift'], r['p_value'], r['z_score']
+    aov_control, aov_treatment = r['aov_control'], r['aov_treatment']
+    time_control, time_treatment = r['time_control'], r['time_treatment']
+
+    if verbose:
+        _banner("💾 11. 결과 데이터 저장")
+
+    # 분석 결과 요약 저장
+    summary_data = {
+        '지표': ['전환율', '객단가', '결제소요시간', 'p-value', 'Z-score'],
+        'Control': [f'{control_rate:.2%}', f'{aov_control:,.0f}원', f'{time_control:.0f}초', '-', '-'],
+        'Treatment': [f'{treatment_rate:.2%}', f'{aov_treatment:,.0f}원', f'{time_treatment:.0f}초', '-', '-'],
+        '변화': [f'+{relative_lift:.1f}%', f'+{((aov_treatment/aov_control)-1)*100:.1f}%',
+                 f'-{((time_control-time_treatment)/time_control)*100:.0f}%', f'{p_value:.6f}', f'{z_score:.4f}']
+    }
+    summary_df = pd.DataFrame(summary_data)
+    summary_df.to_csv(os.path.join(output_dir, 'ab_test_summary.csv'), index=False, encoding='utf-8-sig')
+
+    # 세그먼트별 분석 결과 저장
+    r['device_pivot'].to_csv(os.path.join(output_dir, 'ab_test_device_analysis.csv'), encoding='utf-8-sig')
+    r['age_pivot'].to_csv(os.path.join(output_dir, 'ab_test_age_analysis.csv'), encoding='utf-8-sig')
+    if verbose:
+        print("✅ 'ab_test_summary.csv' 저장 완료!")
+        print("✅ 'ab_test_device_analysis.csv' 저장 완료!")
+        print("✅ 'ab_test_age_analysis.csv' 저장 완료!")
+
+    # 무결성 검사 결과 저장
+    r['integrity']['report'].to_csv(os.path.join(output_dir, 'ab_test_integrity.csv'),
+                                    index=False, encoding='utf-8-sig')
+    if verbose:
+        print("✅ 'ab_test_integrity.csv' 저장 완료!")
+
+    # 베이지안 분석 결과 저장
+    r['bayesian'].to_csv(os.path.join(output_dir, 'ab_test_bayesian.csv'), index=False, encoding='utf-8-sig')
+    if verbose:
+        print("✅ 'ab_test_bayesian.csv' 저장 완료!")
+
+    # 세그먼트 조합 탐색 결과 저장
+    r['segment_search'].to_csv(os.path.join(output_dir, 'ab_test_segment_search.csv'),
+                               index=False, encoding='utf-8-sig')
+    if verbose:
+        print("✅ 'ab_test_segment_search.csv' 저장 완료!")
+
+    # 다중 그룹 비교 결과 저장
+    r['arm_comparisons'].to_csv(os.path.join(output_dir, 'ab_test_arm_comparisons.csv'),
+                                index=False, encoding='utf-8-sig')
+    if verbose:
+        print("✅ 'ab_test_arm_comparisons.csv' 저장 완료!")
+
+    # 분위수 처리 효과 저장
+    r['quantile_effects'].to_csv(os.path.join(output_dir, 'ab_test_quantile_effects.csv'),
+                                 index=False, encoding='utf-8-sig')
+    if verbose:
+        print("✅ 'ab_test_quantile_effects.csv' 저장 완료!")
+
+    # 주문 라인 지표 저장
+    if r.get('order_metrics') is not None:
+        r['order_metrics'].to_csv(os.path.join(output_dir, 'ab_test_order_metrics.csv'), encoding='utf-8-sig')
+        if verbose:
+            print("✅ 'ab_test_order_metrics.csv' 저장 완료!")
+
+
+def result_record(results):
+    """배치 실행용 1행 결과 레코드 (JSON 직렬화 가능한 값만)"""
+    r = results
+    visitors = r['group_stats']['n']
+    record = {
+        'control_arm': str(r['control_arm']),
+        'treatment_arm': str(r['treatment_arm']),
+        'visitors': {str(arm): int(visitors.loc[arm]) for arm in r['arms']},
+        'visitors_control': int(visitors.loc[r['control_arm']]),
+        'visitors_treatment': int(visitors.loc[r['treatment_arm']]),
+        'conversion_control': float(r['control_rate']),
+        'conversion_treatment': float(r['treatment_rate']),
+        'relative_lift_pct': float(r['relative_lift']),
+        'chi2': float(r['chi2']),
+        'p_value': float(r['p_value']),
+        'z_score': float(r['z_score']),
+        'ci_control': [float(v) for v in r['ci_control']],
+        'ci_treatment': [float(v) for v in r['ci_treatment']],
+        'aov_control': float(r['aov_control']),
+        'aov_treatment': float(r['aov_treatment']),
+        'checkout_time_control': float(r['time_control']),
+        'checkout_time_treatment': float(r['time_treatment']),
+        'significant_segments': {
+            ' × '.join(dims): int(seg['significant'].sum()) for dims, _, seg in r['segment_tests']
+        },
+    }
+    integrity = r['integrity']
+    record['integrity_passed'] = bool(integrity['passed'])
+    record['integrity_failed'] = integrity['report'].loc[integrity['report']['status'] == 'fail', 'check'].tolist()
+    record['srm_p_value'] = float(integrity['srm'].iloc[0]['p_value'])
+    bayes = r['bayesian']
+    for row in bayes[bayes['dimension'] == 'overall'].itertuples():
+        record[f'{row.metric}_prob_treatment_better'] = float(row.prob_treatment_better)
+        record[f'{row.metric}_expected_loss'] = float(row.expected_loss_treatment)
+    quantiles = r['quantile_effects']
+    for row in quantiles[quantiles['segment'] == '전체'].itertuples():
+        record[f'{row.metric}_{row.quantile}_diff'] = float(row.diff)
+        record[f'{row.metric}_{row.quantile}_p_value'] = float(row.p_value)
+    for column, boot in r['bootstrap'].items():
+        record[f'{column}_rel_ci'] = [float(v) for v in boot['rel_ci']]
+    if r.get('order_metrics') is not None:
+        for metric in ['revenue_per_visitor', 'aov', 'items_per_order', 'discount_rate']:
+            row = r['order_metrics'].loc[metric]
+            record[f'{metric}_lift'] = float(row['lift'])
+            record[f'{metric}_p_value'] = float(row['p_value'])
+    history = r['sequential_history']
+    for column in ['msprt_reject', 'obf_reject']:
+        rejected = history.index[history[column]]
+        record[f'{column}_first'] = str(pd.Timestamp(rejected[0]).date()) if len(rejected) else None
+    return record
 
-# 세그먼트별 분석 결과 저장
-device_pivot.to_csv('ab_test_device_analysis.csv', encoding='utf-8-sig')
-age_pivot.to_csv('ab_test_age_analysis.csv', encoding='utf-8-sig')
-print("✅ 'ab_test_device_analysis.csv' 저장 완료!")
-print("✅ 'ab_test_age_analysis.csv' 저장 완료!")
 
-print("\n🎉 분석 완료!")
+# =============================================================================
+# 전체 파이프라인
+# =============================================================================
+def analysis_key(data, result_cache, test_options):
+    """load 단계 키 + 검정 옵션 -> 분석 결과 캐시 키 (캐시를 쓰지 않으면 None)"""
+    if result_cache is None or data.get('cache_key') is None:
+        return None
+    return _cache_key(result_cache, "analyze", [data['cache_key']], test_options)
+
+
+def _cache_key(result_cache, stage, inputs, params=None):
+    """단계 캐시 키 (코드 지문은 CACHE_CODE[stage] 모듈, 리포트 함수 제외)"""
+    return result_cache.key(stage, inputs, params, code=CACHE_CODE[stage], exclude=CACHE_EXCLUDED_FUNCTIONS)
+
+
+def analyze(data, result_cache=None, **test_options):
+    """load 결과에 대해 aggregate → test 수행 후 결과 딕셔너리 반환
+
+    result_cache를 주면 입력과 검정 옵션이 같은 이전 결과(부트스트랩 포함)를 재사용합니다.
+    """
+    key = analysis_key(data, result_cache, test_options)
+    if key is not None:
+        results = result_cache.get("analyze", key)
+        if results is not None:
+            return results
+    ensure_visitors(data)
+    with stage("aggregate", rows_in=len(data['cube'])):
+        results = aggregate(data)
+    with stage("test", rows_in=len(data['cube'])):
+        results.update(test(data, results, **test_options))
+    if key is not None:
+        result_cache.put("analyze", key, results)
+    return results
+
+
+def run_analysis(data_path=DATA_PATH, output_dir=OUTPUT_DIR, visitor_path=None,
+                 use_cache=USE_CACHE, streaming=STREAMING, chunk_size=CHUNK_SIZE,
+                 state_path=STATE_PATH, refresh=(), compact=COMPACT, backend=BACKEND,
+                 plots=True, show=False, save=True, verbose=True,
+                 tableau_dir=None, tableau_format="parquet", dashboard_path=None,
+                 result_cache_dir=RESULT_CACHE_DIR, result_cache_mb=RESULT_CACHE_MAX_MB,
+                 metrics_path=None, trace_path=None, profile=None, trace_memory=True,
+                 **test_options):
+    """load → aggregate → test → report 전체 실행
+
+    metrics_path / trace_path / profile 중 하나라도 주면 단계별 소요 시간,
+    CPU 시간, 메모리 할당, 행 수, 캐시 적중을 계측합니다 (instrumentation.py).
+    trace_memory=False면 tracemalloc 할당 측정을 생략합니다 (차트 단계가 크게 느려짐).
+    tableau_dir를 주면 대시보드용 사전 집계 추출 파일을 저장합니다 (tableau_extract.py).
+    dashboard_path를 주면 3페이지 HTML 대시보드를 저장합니다 (dashboard.py).
+    backend="duckdb" / "polars"면 큐브/스케치 집계를 파일에 직접 쿼리합니다 (query_backend.py).
+    result_cache_dir를 주면 입력 지문과 옵션이 같은 재실행에서 큐브, 검정 결과,
+    차트를 다시 계산하지 않고 재사용합니다 (result_cache.py, 최대 result_cache_mb MB).
+    """
+    if not (metrics_path or trace_path or profile):
+        return _run_analysis(data_path, output_dir, visitor_path, use_cache, streaming, chunk_size,
+                             state_path, refresh, compact, backend, plots, show, save, verbose,
+                             tableau_dir, tableau_format, dashboard_path,
+                             result_cache_dir, result_cache_mb, **test_options)
+
+    tracer = Tracer(metrics_path=metrics_path, trace_path=trace_path, profile=profile,
+                    profile_dir=output_dir or ".", memory=trace_memory, verbose=verbose)
+    with tracer:
+        with stage("run_analysis"):
+            results = _run_analysis(data_path, output_dir, visitor_path, use_cache, streaming, chunk_size,
+                                    state_path, refresh, compact, backend, plots, show, save, verbose,
+                                    tableau_dir, tableau_format, dashboard_path,
+                                    result_cache_dir, result_cache_mb, **test_options)
+    if verbose:
+        _banner("⏱️ 단계별 계측")
+        tracer.print_table()
+    tracer.write()
+    return results
+
+
+def _run_analysis(data_path, output_dir, visitor_path, use_cache, streaming, chunk_size,
+                  state_path, refresh, compact, backend, plots, show, save, verbose,
+                  tableau_dir, tableau_format, dashboard_path,
+                  result_cache_dir, result_cache_mb, **test_options):
+    cache = None
+    if result_cache_dir:
+        cache = ResultCache(result_cache_dir, max_bytes=int(result_cache_mb * 1024 ** 2))
+    with stage("load") as span:
+        data = load(data_path, visitor_path=visitor_path, use_cache=use_cache,
+                    streaming=streaming, chunk_size=chunk_size,
+                    state_path=state_path, refresh=refresh, compact=compact,
+                    result_cache=cache, backend=backend)
+        span.rows_out = data['cube'].total_rows
+    results = analyze(data, result_cache=cache, **test_options)
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if verbose:
+        with stage("report"):
+            print_analysis(data, results)
+    if plots:
+        with stage("plots"):
+            plot_results(results, output_dir, show=show, verbose=verbose, result_cache=cache,
+                         cache_key=analysis_key(data, cache, test_options))
+    if verbose:
+        print_summary(results)
+    if save:
+        with stage("save"):
+            save_results(results, output_dir, verbose=verbose)
+    if tableau_dir:
+        with stage("tableau_extract"):
+            if verbose:
+                _banner("📦 12. Tableau 추출 파일 저장")
+            export_extract(data['cube'], results, tableau_dir, fmt=tableau_format, verbose=verbose)
+    if dashboard_path:
+        with stage("dashboard"):
+            if verbose:
+                _banner("🖥️ 13. HTML 대시보드 저장")
+            write_dashboard(results, dashboard_path, verbose=verbose)
+    if verbose:
+        if cache is not None:
+            print(f"\n♻️ 결과 캐시: 재사용 {cache.hits}건, 새로 계산 {cache.misses}건 "
+                  f"({cache.size() / 1024 ** 2:,.1f}MB)")
+        print("\n🎉 분석 완료!")
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="A/B 테스트 분석 - 새 결제 페이지 UI 테스트")
+    parser.add_argument("--data-path", default=DATA_PATH, help="입력 CSV 폴더")
+    parser.add_argument("--visitor-path", default=None, help="방문자 로그 CSV (기본: <data-path>/ab_test_checkout_ui.csv)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="결과 파일 저장 폴더")
+    parser.add_argument("--no-cache", action="store_true", help="컬럼형 캐시 사용 안 함")
+    parser.add_argument("--streaming", action="store_true", help="방문자 로그를 청크 단위로 스트리밍 집계")
+    parser.add_argument("--compact", action="store_true", help="ID 정수 키 / 축소 타입으로 로드 (메모리 절감)")
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND,
+                        help="큐브 집계 백엔드 (duckdb/polars: 방문자 로그 CSV/Parquet에 직접 쿼리, "
+                             "--streaming처럼 원본 행이 필요한 부트스트랩 / CUPED / 주문 지표는 생략되고, "
+                             "행 단위 무결성 검사도 생략)")
+    parser.add_argument("--state", default=STATE_PATH, help="증분 상태 저장소(SQLite) 경로")
+    parser.add_argument("--refresh", nargs="*", default=(), metavar="YYYY-MM-DD",
+                        help="상태 저장소에서 지우고 다시 집계할 방문일")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="스트리밍 청크 크기 (행)")
+    parser.add_argument("--planned-n", type=int, default=PLANNED_SAMPLE_SIZE, help="실험 설계 표본 수")
+    parser.add_argument("--bootstrap", type=int, default=BOOTSTRAP_REPLICATES, help="부트스트랩 재표본 수 (0이면 생략)")
+    parser.add_argument("--strict-integrity", action="store_true",
+                        help="무결성 검사(SRM, 교차 배정 등)가 실패하면 리포트를 내지 않고 중단")
+    parser.add_argument("--arm-mode", choices=["control", "all"], default=ARM_COMPARISON_MODE,
+                        help="다중 그룹 비교 방식 (control 대비 / 모든 그룹 쌍)")
+    parser.add_argument("--no-plots", action="store_true", help="차트 생성 생략")
+    parser.add_argument("--show", action="store_true", help="차트를 화면에 표시 (plt.show)")
+    parser.add_argument("--tableau-extract", default=None, metavar="DIR",
+                        help="Tableau 대시보드용 사전 집계 추출 파일 저장 폴더")
+    parser.add_argument("--tableau-format", choices=["parquet", "csv"], default="parquet",
+                        help="추출 파일 형식")
+    parser.add_argument("--dashboard", default=None, metavar="PATH",
+                        help="분석 결과로 만든 HTML 대시보드 저장 경로 (폴더면 ab_test_dashboard.html)")
+    parser.add_argument("--result-cache", default=RESULT_CACHE_DIR, metavar="DIR",
+                        help="결과 캐시 폴더 (입력/옵션이 같으면 큐브, 검정 결과, 차트 재사용)")
+    parser.add_argument("--result-cache-mb", type=float, default=RESULT_CACHE_MAX_MB,
+                        help="결과 캐시 최대 크기 (MB, 넘으면 오래 사용하지 않은 항목부터 삭제)")
+    parser.add_argument("--metrics", default=None, metavar="PATH",
+                        help="단계별 계측 기록을 JSON Lines로 이어 쓰기")
+    parser.add_argument("--trace", default=None, metavar="PATH",
+                        help="단계별 계측을 Chrome trace 파일로 저장 (chrome://tracing, Perfetto)")
+    parser.add_argument("--profile", default=None, metavar="STAGE",
+                        help="지정한 단계만 cProfile로 프로파일 (예: load, test.bootstrap)")
+    parser.add_argument("--no-trace-memory", action="store_true",
+                        help="계측 시 tracemalloc 할당 측정 생략")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    run_analysis(
+        data_path=args.data_path,
+        output_dir=args.output_dir,
+        visitor_path=args.visitor_path,
+        use_cache=not args.no_cache,
+        streaming=args.streaming,
+        chunk_size=args.chunk_size,
+        state_path=args.state,
+        refresh=args.refresh,
+        compact=args.compact,
+        backend=args.backend,
+        tableau_dir=args.tableau_extract,
+        tableau_format=args.tableau_format,
+        dashboard_path=args.dashboard,
+        result_cache_dir=args.result_cache,
+        result_cache_mb=args.result_cache_mb,
+        plots=not args.no_plots,
+        show=args.show,
+        metrics_path=args.metrics,
+        trace_path=args.trace,
+        profile=args.profile,
+        trace_memory=not args.no_trace_memory,
+        planned_sample_size=args.planned_n,
+        bootstrap_replicates=args.bootstrap,
+        strict_integrity=args.strict_integrity,
+        arm_mode=args.arm_mode,
+    )
+
+
+if __name__ == "__main__":
+    main()
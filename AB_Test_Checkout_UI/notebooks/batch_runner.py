@@ -0,0 +1,199 @@
+"""
+여러 실험 일괄 분석 - 프로세스 풀 배치 실행
+=====================================
+
+실험별 방문자 로그(CSV 또는 CSV가 있는 폴더) 여러 개를 ab_test_analysis의
+load → aggregate → test 파이프라인으로 병렬 분석하고, 끝나는 순서대로
+실험당 JSON 한 줄씩 결과 파일(JSON Lines)에 기록합니다.
+
+- 배치 실행에서는 화면 출력과 차트를 끄고 결과 레코드만 만듭니다.
+- 한 실험이 실패해도 나머지는 계속 진행하며, 실패 내용은 "error" 필드로
+  기록합니다.
+- 베이스 테이블(CUPED 공변량용)은 --base-path 폴더에서 읽습니다.
+- --dashboards를 주면 실험 폴더마다 HTML 대시보드(dashboard.py)를 저장합니다.
+- --result-cache를 주면 입력과 옵션이 바뀌지 않은 실험은 이전 결과를 재사용합니다
+  (result_cache.py, 워커 프로세스가 같은 캐시 폴더를 함께 사용).
+
+사용법:
+    python batch_runner.py "../data/raw/experiments/*.csv" --base-path ../data/raw/ \\
+        --output ../outputs/batch_results.jsonl --workers 4
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ab_test_analysis
+from dashboard import write_dashboard
+from result_cache import ResultCache
+
+
+# 결과 파일 기본 경로
+DEFAULT_OUTPUT = "batch_results.jsonl"
+
+
+def discover_experiments(patterns):
+    """경로/글롭 패턴 목록 -> (실험 이름, 방문자 로그 경로) 목록
+
+    폴더를 주면 폴더 안의 ab_test_checkout_ui.csv를 사용하고, 실험 이름은
+    폴더 이름이 됩니다. CSV 파일을 주면 파일 이름(확장자 제외)이 실험 이름입니다.
+    """
+    experiments = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if os.path.isdir(path):
+                name = os.path.basename(os.path.normpath(path))
+                path = os.path.join(path, f"{ab_test_analysis.VISITOR_TABLE}.csv")
+            else:
+                name = os.path.splitext(os.path.basename(path))[0]
+            path = os.path.abspath(path)
+            if path not in seen:
+                seen.add(path)
+                experiments.append((name, path))
+    return experiments
+
+
+def run_experiment(name, visitor_path, base_path, options):
+    """실험 하나 분석 -> 결과 레코드 (실패 시 error 레코드)"""
+    start = time.perf_counter()
+    record = {"experiment": name, "visitor_path": visitor_path}
+    try:
+        cache = None
+        if options.get("result_cache_dir"):
+            cache = ResultCache(options["result_cache_dir"],
+                                max_bytes=int(options.get("result_cache_mb", ab_test_analysis.RESULT_CACHE_MAX_MB)
+                                              * 1024 ** 2))
+        data = ab_test_analysis.load(
+            base_path,
+            visitor_path=visitor_path,
+            use_cache=options.get("use_cache", ab_test_analysis.USE_CACHE),
+            streaming=options.get("streaming", ab_test_analysis.STREAMING),
+            chunk_size=options.get("chunk_size", ab_test_analysis.CHUNK_SIZE),
+            compact=options.get("compact", ab_test_analysis.COMPACT),
+            result_cache=cache,
+            backend=options.get("backend", ab_test_analysis.BACKEND),
+        )
+        test_options = {
+            "planned_sample_size": options.get("planned_sample_size", ab_test_analysis.PLANNED_SAMPLE_SIZE),
+            "bootstrap_replicates": options.get("bootstrap_replicates", ab_test_analysis.BOOTSTRAP_REPLICATES),
+            "strict_integrity": options.get("strict_integrity", ab_test_analysis.STRICT_INTEGRITY),
+            "arm_mode": options.get("arm_mode", ab_test_analysis.ARM_COMPARISON_MODE),
+            "arm_shares": options.get("arm_shares", ab_test_analysis.ARM_SHARES),
+        }
+        results = ab_test_analysis.analyze(data, result_cache=cache, **test_options)
+        output_dir = options.get("output_dir")
+        if output_dir:
+            experiment_dir = os.path.join(output_dir, name)
+            os.makedirs(experiment_dir, exist_ok=True)
+            ab_test_analysis.save_results(results, experiment_dir, verbose=False)
+            if options.get("plots"):
+                # 이미 워커 프로세스 안이므로 차트는 순서대로 렌더링
+                ab_test_analysis.plot_results(results, experiment_dir, verbose=False, workers=1,
+                                              result_cache=cache,
+                                              cache_key=ab_test_analysis.analysis_key(data, cache, test_options))
+            if options.get("dashboards"):
+                write_dashboard(results, experiment_dir, title=name, verbose=False)
+        record["status"] = "ok"
+        record.update(ab_test_analysis.result_record(results))
+    except Exception as exc:
+        record["status"] = "error"
+        record["error"] = f"{type(exc).__name__}: {exc}"
+        record["traceback"] = traceback.format_exc()
+    record["elapsed_sec"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(experiments, base_path=ab_test_analysis.DATA_PATH, output=DEFAULT_OUTPUT,
+              workers=None, verbose=True, **options):
+    """실험 목록을 프로세스 풀에서 분석하고 완료 순서대로 JSON Lines 기록
+
+    workers=1이면 현재 프로세스에서 순서대로 실행합니다.
+    반환: 결과 레코드 목록 (완료 순서)
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(experiments) or 1))
+    records = []
+
+    with open(output, "w", encoding="utf-8") as f:
+        def _write(record):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            records.append(record)
+            if verbose:
+                mark = "✅" if record["status"] == "ok" else "❌"
+                print(f"{mark} [{len(records)}/{len(experiments)}] {record['experiment']} "
+                      f"({record['elapsed_sec']:.1f}초)")
+
+        if workers == 1:
+            for name, path in experiments:
+                _write(run_experiment(name, path, base_path, options))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(run_experiment, name, path, base_path, options)
+                    for name, path in experiments
+                ]
+                for future in as_completed(futures):
+                    _write(future.result())
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="여러 A/B 테스트 실험 일괄 분석")
+    parser.add_argument("experiments", nargs="+", help="방문자 로그 CSV / 실험 폴더 (글롭 패턴 가능)")
+    parser.add_argument("--base-path", default=ab_test_analysis.DATA_PATH, help="베이스 테이블(kr_*.csv) 폴더")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="결과 JSON Lines 파일")
+    parser.add_argument("--output-dir", default=None, help="실험별 결과 CSV 저장 폴더 (생략 시 저장 안 함)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--no-cache", action="store_true", help="컬럼형 캐시 사용 안 함")
+    parser.add_argument("--streaming", action="store_true", help="방문자 로그 스트리밍 집계")
+    parser.add_argument("--compact", action="store_true", help="ID 정수 키 / 축소 타입으로 로드 (메모리 절감)")
+    parser.add_argument("--backend", choices=ab_test_analysis.BACKENDS, default=ab_test_analysis.BACKEND,
+                        help="큐브 집계 백엔드 (duckdb/polars: 방문자 로그 파일에 직접 쿼리, --streaming처럼 "
+                             "부트스트랩 / CUPED / 주문 지표는 생략되고, 행 단위 무결성 검사도 생략)")
+    parser.add_argument("--bootstrap", type=int, default=ab_test_analysis.BOOTSTRAP_REPLICATES,
+                        help="부트스트랩 재표본 수 (0이면 생략)")
+    parser.add_argument("--plots", action="store_true", help="실험별 차트 저장 (--output-dir 필요)")
+    parser.add_argument("--dashboards", action="store_true", help="실험별 HTML 대시보드 저장 (--output-dir 필요)")
+    parser.add_argument("--strict-integrity", action="store_true",
+                        help="무결성 검사가 실패한 실험은 error로 기록")
+    parser.add_argument("--arm-mode", choices=["control", "all"], default=ab_test_analysis.ARM_COMPARISON_MODE,
+                        help="다중 그룹 비교 방식 (control 대비 / 모든 그룹 쌍)")
+    parser.add_argument("--result-cache", default=None, metavar="DIR",
+                        help="결과 캐시 폴더 (입력/옵션이 같은 실험은 이전 결과 재사용)")
+    parser.add_argument("--result-cache-mb", type=float, default=ab_test_analysis.RESULT_CACHE_MAX_MB,
+                        help="결과 캐시 최대 크기 (MB)")
+    args = parser.parse_args(argv)
+
+    experiments = discover_experiments(args.experiments)
+    print(f"📂 실험 {len(experiments):,}개 분석 시작")
+    records = run_batch(
+        experiments,
+        base_path=args.base_path,
+        output=args.output,
+        workers=args.workers,
+        output_dir=args.output_dir,
+        use_cache=not args.no_cache,
+        streaming=args.streaming,
+        compact=args.compact,
+        backend=args.backend,
+        bootstrap_replicates=args.bootstrap,
+        plots=args.plots,
+        dashboards=args.dashboards,
+        strict_integrity=args.strict_integrity,
+        arm_mode=args.arm_mode,
+        result_cache_dir=args.result_cache,
+        result_cache_mb=args.result_cache_mb,
+    )
+    n_failed = sum(record["status"] != "ok" for record in records)
+    print(f"\n🎉 완료: 성공 {len(records) - n_failed:,}개, 실패 {n_failed:,}개 → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
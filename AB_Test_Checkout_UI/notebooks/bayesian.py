@@ -0,0 +1,243 @@
+"""
+베이지안 분석 - 세그먼트 셀 일괄 사후분포 비교
+=====================================
+
+큐브에서 뽑은 셀별 충분통계량으로 모든 세그먼트 셀의 사후분포를 한 번에
+계산합니다 (셀마다 scipy를 호출하는 반복문 없음).
+
+  전환율 (conversion) : Beta-Binomial, 사후분포 Beta(α0 + 전환 수, β0 + 미전환 수)
+  객단가 (aov)        : Normal-Gamma (평균·분산 모두 미지), 전환 고객의 건수/합계/제곱합
+                        -> 평균의 사후분포는 Student-t
+
+셀마다 아래 값을 보고합니다.
+  prob_treatment_better : P(treatment > control | 데이터)
+  expected_loss_*       : 해당 그룹을 선택했을 때 기대 손실 E[max(다른 그룹 - 선택 그룹, 0)]
+  *_ci_low / *_ci_high  : 그룹별 지표, 차이, 상대 변화율의 신용구간
+
+method="sampling"(기본)은 셀 × 표본 배열로 사후 표본을 한꺼번에 뽑습니다.
+셀을 BLOCK_CELLS개씩 묶고 블록마다 SeedSequence에서 파생한 고정 시드를
+사용하므로 같은 seed면 항상 같은 결과가 나오고, 메모리는 블록 분량
+(BLOCK_CELLS × 표본 수)만 사용합니다.
+method="normal"은 사후분포를 정규분포로 근사한 닫힌 형태로 계산합니다
+(표본 추출 없음, 셀이 수만 개일 때).
+
+사용법:
+    from bayesian import bayesian_segments, bayesian_tests
+
+    bayesian_tests(cube, ["device"], metric="conversion")
+    bayesian_segments(cube, [[], ["device"], ["region", "device", "age_group"]])
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+# 사후 표본 수 (셀마다)
+POSTERIOR_SAMPLES = 20_000
+
+# 표본 추출 블록 크기 (셀 수, 시드 단위)
+BLOCK_CELLS = 64
+
+# 전환율 사전분포 Beta(α0, β0) (균등 사전분포)
+PRIOR_ALPHA = 1.0
+PRIOR_BETA = 1.0
+
+# 객단가 Normal-Gamma 사전분포 (μ0, κ0, α0, β0), κ0=α0=β0=0이면 무정보 극한
+NORMAL_GAMMA_PRIOR = (0.0, 0.0, 0.0, 0.0)
+
+# 신용구간 확률
+CREDIBLE_MASS = 0.95
+
+BAYES_SEED = 42
+
+METRICS = ["conversion", "aov"]
+
+
+# =============================================================================
+# 사후분포 (셀 배열 단위)
+# =============================================================================
+class BetaPosterior:
+    """셀별 Beta 사후분포 (전환율)"""
+
+    def __init__(self, conversions, visitors, prior=(PRIOR_ALPHA, PRIOR_BETA)):
+        conversions = np.asarray(conversions, dtype=float)
+        visitors = np.asarray(visitors, dtype=float)
+        self.a = prior[0] + conversions
+        self.b = prior[1] + visitors - conversions
+
+    def mean(self):
+        return self.a / (self.a + self.b)
+
+    def var(self):
+        total = self.a + self.b
+        return self.a * self.b / (total ** 2 * (total + 1))
+
+    def interval(self, mass=CREDIBLE_MASS):
+        tail = (1 - mass) / 2
+        return stats.beta.ppf(tail, self.a, self.b), stats.beta.ppf(1 - tail, self.a, self.b)
+
+    def sample(self, rng, cells, size):
+        return rng.beta(self.a[cells, None], self.b[cells, None], size=(cells.size, size))
+
+
+class MeanPosterior:
+    """셀별 Normal-Gamma 사후분포의 평균 주변분포 (Student-t, 객단가)"""
+
+    def __init__(self, n, total, sumsq, prior=NORMAL_GAMMA_PRIOR):
+        mu0, kappa0, alpha0, beta0 = prior
+        n = np.asarray(n, dtype=float)
+        total = np.asarray(total, dtype=float)
+        sumsq = np.asarray(sumsq, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / n
+            ss = np.clip(sumsq - n * mean * mean, 0, None)
+            kappa = kappa0 + n
+            self.loc = (kappa0 * mu0 + total) / kappa
+            alpha = alpha0 + n / 2
+            beta = beta0 + ss / 2 + kappa0 * n * (mean - mu0) ** 2 / (2 * kappa)
+            self.df = 2 * alpha
+            self.scale = np.sqrt(beta / (alpha * kappa))
+
+    def mean(self):
+        return self.loc
+
+    def var(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.df > 2, self.scale ** 2 * self.df / (self.df - 2), np.inf)
+
+    def interval(self, mass=CREDIBLE_MASS):
+        return stats.t.interval(mass, self.df, loc=self.loc, scale=self.scale)
+
+    def sample(self, rng, cells, size):
+        draws = rng.standard_t(self.df[cells, None], size=(cells.size, size))
+        return self.loc[cells, None] + self.scale[cells, None] * draws
+
+
+# =============================================================================
+# 비교
+# =============================================================================
+def _compare_sampling(post_c, post_t, valid, samples, seed, mass):
+    """셀 블록 단위 사후 표본 비교"""
+    n_cells = valid.size
+    out = {key: np.full(n_cells, np.nan) for key in [
+        "prob_treatment_better", "expected_loss_treatment", "expected_loss_control",
+        "diff_ci_low", "diff_ci_high", "lift_ci_low", "lift_ci_high",
+    ]}
+    tail = (1 - mass) / 2
+    blocks = range(0, n_cells, BLOCK_CELLS)
+    for block, child in zip(blocks, np.random.SeedSequence(seed).spawn(len(blocks))):
+        cells = np.arange(block, min(block + BLOCK_CELLS, n_cells))
+        cells = cells[valid[cells]]
+        if not cells.size:
+            continue
+        rng = np.random.default_rng(child)
+        c = post_c.sample(rng, cells, samples)
+        t = post_t.sample(rng, cells, samples)
+        diff = t - c
+        out["prob_treatment_better"][cells] = (diff > 0).mean(axis=1)
+        out["expected_loss_treatment"][cells] = np.maximum(-diff, 0).mean(axis=1)
+        out["expected_loss_control"][cells] = np.maximum(diff, 0).mean(axis=1)
+        low, high = np.quantile(diff, [tail, 1 - tail], axis=1)
+        out["diff_ci_low"][cells], out["diff_ci_high"][cells] = low, high
+        with np.errstate(divide="ignore", invalid="ignore"):
+            low, high = np.quantile(diff / c, [tail, 1 - tail], axis=1)
+        out["lift_ci_low"][cells], out["lift_ci_high"][cells] = low, high
+    return out
+
+
+def _compare_normal(post_c, post_t, valid, mass):
+    """정규 근사 닫힌 형태 비교 (차이 ~ N(μ, σ²))"""
+    z = stats.norm.ppf(1 - (1 - mass) / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = post_t.mean() - post_c.mean()
+        sigma = np.sqrt(post_c.var() + post_t.var())
+        ratio = mu / sigma
+        # E[max(-D, 0)] = σφ(μ/σ) - μΦ(-μ/σ), E[max(D, 0)] = σφ(μ/σ) + μΦ(μ/σ)
+        density = sigma * stats.norm.pdf(ratio)
+        out = {
+            "prob_treatment_better": stats.norm.cdf(ratio),
+            "expected_loss_treatment": density - mu * stats.norm.cdf(-ratio),
+            "expected_loss_control": density + mu * stats.norm.cdf(ratio),
+            "diff_ci_low": mu - z * sigma,
+            "diff_ci_high": mu + z * sigma,
+        }
+        # 상대 변화율: 델타 방법 (t/c - 1)
+        mc, mt = post_c.mean(), post_t.mean()
+        lift = mt / mc - 1
+        lift_se = np.sqrt(post_t.var() / mc ** 2 + mt ** 2 * post_c.var() / mc ** 4)
+        out["lift_ci_low"] = lift - z * lift_se
+        out["lift_ci_high"] = lift + z * lift_se
+    return {key: np.where(valid, value, np.nan) for key, value in out.items()}
+
+
+def bayesian_tests(cube, dims, metric="conversion", control="control", treatment="treatment",
+                   method="sampling", samples=POSTERIOR_SAMPLES, seed=BAYES_SEED, mass=CREDIBLE_MASS):
+    """세그먼트 셀 전체에 대해 control vs treatment 사후분포 비교를 일괄 수행
+
+    metric: "conversion" (Beta-Binomial) 또는 "aov" (Normal-Gamma, 전환 고객 기준)
+    dims가 빈 리스트이면 전체 그룹 비교 1행을 반환합니다.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"지원하지 않는 지표: {metric}")
+    if method not in ("sampling", "normal"):
+        raise ValueError(f"지원하지 않는 계산 방법: {method}")
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    columns = ["n", "converted_sum", "order_value_sum", "order_value_sumsq"]
+    counts = cube.rollup(dims + ["test_group"])[columns].unstack("test_group")
+    if not dims:
+        counts = counts.to_frame().T if isinstance(counts, pd.Series) else counts
+        counts.index = pd.Index(["전체"], name="segment")
+
+    def _col(stat, group):
+        if (stat, group) in counts.columns:
+            return counts[(stat, group)].fillna(0).to_numpy(dtype=float)
+        return np.zeros(len(counts))
+
+    posts, sizes = {}, {}
+    for arm, group in [("control", control), ("treatment", treatment)]:
+        if metric == "conversion":
+            sizes[arm] = _col("n", group)
+            posts[arm] = BetaPosterior(_col("converted_sum", group), sizes[arm])
+        else:
+            sizes[arm] = _col("converted_sum", group)
+            posts[arm] = MeanPosterior(sizes[arm], _col("order_value_sum", group),
+                                       _col("order_value_sumsq", group))
+    # 객단가는 평균 사후분포(t, 자유도 = 전환 고객 수)의 분산이 유한하도록 그룹마다 3명 이상 필요
+    minimum = 1 if metric == "conversion" else 3
+    valid = (sizes["control"] >= minimum) & (sizes["treatment"] >= minimum)
+
+    out = pd.DataFrame(index=counts.index)
+    for arm in ["control", "treatment"]:
+        out[f"n_{arm}"] = sizes[arm].astype(np.int64)
+    for arm in ["control", "treatment"]:
+        low, high = posts[arm].interval(mass)
+        out[arm] = np.where(valid, posts[arm].mean(), np.nan)
+        out[f"{arm}_ci_low"] = np.where(valid, low, np.nan)
+        out[f"{arm}_ci_high"] = np.where(valid, high, np.nan)
+    out["diff"] = out["treatment"] - out["control"]
+
+    if method == "sampling":
+        compared = _compare_sampling(posts["control"], posts["treatment"], valid, samples, seed, mass)
+    else:
+        compared = _compare_normal(posts["control"], posts["treatment"], valid, mass)
+    for key in ["diff_ci_low", "diff_ci_high", "lift_ci_low", "lift_ci_high",
+                "prob_treatment_better", "expected_loss_treatment", "expected_loss_control"]:
+        out[key] = compared[key]
+    return out
+
+
+def bayesian_segments(cube, dims_list, metrics=METRICS, **options):
+    """여러 세그먼트 차원 × 지표 결과를 한 테이블로 (metric, dimension, segment 컬럼)"""
+    frames = []
+    for metric in metrics:
+        for dims in dims_list:
+            dims = list(dims)
+            frame = bayesian_tests(cube, dims, metric=metric, **options).reset_index()
+            segment = frame[dims].astype(str).agg(" / ".join, axis=1) if dims else frame["segment"]
+            frame = frame.drop(columns=dims or ["segment"])
+            frame.insert(0, "segment", segment)
+            frame.insert(0, "dimension", " × ".join(dims) or "overall")
+            frame.insert(0, "metric", metric)
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,317 @@
+"""
+벤치마크 - 분석 단계별 소요 시간 / 메모리 / 처리량 측정
+=====================================
+
+generate_ab_test.py로 방문자 로그를 규모별(기본 2만 / 100만 / 1000만 / 1억 행)로
+만들고, ab_test_analysis 파이프라인의 각 단계를 측정합니다.
+
+  load         : 타입 지정 CSV 파싱 (캐시 없음)
+  cache_build  : 컬럼형 캐시 생성 (CSV 파싱 + Arrow 저장)
+  cache_load   : 캐시 메모리 매핑 로드
+  cube         : 충분통계량 큐브 생성 (대용량은 스트리밍 집계)
+  sketch       : 분위수 스케치 생성 (스트리밍은 청크를 SketchBuilder로 한 번 더 스캔)
+  aggregate    : 그룹/세그먼트 피벗, 일별/누적 시리즈
+  significance : 전체 + 세그먼트 일괄 검정
+  sequential   : 일별 순차 검정
+  bootstrap    : 객단가/결제시간 부트스트랩 신뢰구간
+  plotting     : 차트 2종 렌더링
+
+- 규모마다 새 Python 프로세스에서 실행하므로 최대 메모리(peak RSS)가 서로
+  섞이지 않습니다. peak RSS는 해당 단계까지의 프로세스 최대값입니다.
+- STREAMING_MIN_ROWS 이상이면 원본을 메모리에 올리지 않는 스트리밍 모드로
+  측정합니다 (load / cache / bootstrap 단계 생략).
+- 결과는 JSON 파일로 저장하고, --baseline으로 이전 결과와 비교해 느려진
+  단계를 표시합니다 (회귀가 있으면 종료 코드 1).
+
+사용법:
+    python benchmark.py --sizes 20000 1000000 --output bench_results.json
+    python benchmark.py --sizes 20000 1000000 --baseline bench_baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows에는 resource 모듈이 없음
+    resource = None
+
+
+# 기본 측정 규모 (방문자 행 수)
+DEFAULT_SIZES = [20_000, 1_000_000, 10_000_000, 100_000_000]
+
+# 이 규모 이상은 스트리밍 모드로 측정
+STREAMING_MIN_ROWS = 10_000_000
+
+# 회귀 판정: 기준보다 REGRESSION_TOLERANCE 이상 느리고, 차이가 MIN_REGRESSION_SEC 이상
+REGRESSION_TOLERANCE = 0.20
+MIN_REGRESSION_SEC = 0.05
+
+DEFAULT_DATA_ROOT = "bench_data"
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_SEED = 7
+
+
+def peak_rss_mb():
+    """현재 프로세스의 최대 RSS (MB, 측정 불가 시 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageTimer:
+    """단계별 wall/CPU 시간과 peak RSS 기록"""
+
+    def __init__(self, size, mode):
+        self.size = size
+        self.mode = mode
+        self.records = []
+
+    def measure(self, stage, func, rows=None):
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = func()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        rows = self.size if rows is None else rows
+        self.records.append({
+            "size": self.size,
+            "stage": stage,
+            "mode": self.mode,
+            "wall_sec": round(wall, 4),
+            "cpu_sec": round(cpu, 4),
+            "peak_rss_mb": None if peak_rss_mb() is None else round(peak_rss_mb(), 1),
+            "rows": rows,
+            "rows_per_sec": round(rows / wall) if wall > 0 else None,
+        })
+        print(f"  {stage:<13} {wall:>9.3f}초  {self.records[-1]['rows_per_sec'] or 0:>14,}행/초"
+              f"  RSS {self.records[-1]['peak_rss_mb'] or 0:>9,.0f}MB", flush=True)
+        return result
+
+
+# =============================================================================
+# 데이터 준비
+# =============================================================================
+def ensure_data(size, data_root=DEFAULT_DATA_ROOT, seed=DEFAULT_SEED):
+    """규모별 방문자 로그 폴더 (이미 같은 규모/seed로 만들었으면 재사용)"""
+    from generate_ab_test import EFFECTS_FILE, generate_ab_test
+
+    data_dir = os.path.join(data_root, f"visitors_{size}")
+    effects_path = os.path.join(data_dir, EFFECTS_FILE)
+    if os.path.exists(effects_path):
+        with open(effects_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("visitors") == size and meta.get("seed") == seed:
+            return data_dir
+    print(f"🏭 방문자 로그 {size:,}행 생성: {data_dir}")
+    generate_ab_test(size, data_dir, seed=seed, verbose=False)
+    return data_dir
+
+
+# =============================================================================
+# 규모 하나 측정 (별도 프로세스에서 실행)
+# =============================================================================
+def run_size(size, data_dir, streaming):
+    """한 규모에서 파이프라인 단계별 측정 -> 기록 목록"""
+    import ab_test_analysis as analysis
+    from cube import Cube
+    from data_loader import iter_csv_typed, load_table, read_csv_typed
+    from plotting import chart_payload, render_all
+    from quantile_sketch import QuantileSketch, SketchBuilder
+    from streaming import DEFAULT_CHUNK_SIZE, stream_cube
+
+    visitor_path = os.path.join(data_dir, f"{analysis.VISITOR_TABLE}.csv")
+    timer = StageTimer(size, "streaming" if streaming else "memory")
+    data = {name: None for name in analysis.BASE_TABLES}
+    data["integrity_scan"] = None
+
+    if streaming:
+        data["ab_test"] = None
+        data["cube"] = timer.measure("cube", lambda: stream_cube(visitor_path))
+
+        def _sketch():
+            builder = SketchBuilder()
+            for _ in builder.observe(iter_csv_typed(visitor_path, analysis.VISITOR_TABLE, DEFAULT_CHUNK_SIZE)):
+                pass
+            return builder.result()
+
+        data["sketch"] = timer.measure("sketch", _sketch)
+    else:
+        timer.measure("load", lambda: read_csv_typed(visitor_path, analysis.VISITOR_TABLE))
+        cache_dir = os.path.join(data_dir, ".bench_cache")
+        if os.path.isdir(cache_dir):
+            for fname in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, fname))
+        timer.measure("cache_build", lambda: load_table(
+            analysis.VISITOR_TABLE, cache_dir=cache_dir, path=visitor_path))
+        ab_test = timer.measure("cache_load", lambda: load_table(
+            analysis.VISITOR_TABLE, cache_dir=cache_dir, path=visitor_path))
+        data["ab_test"] = ab_test
+        data["cube"] = timer.measure("cube", lambda: Cube.from_frame(ab_test))
+        data["sketch"] = timer.measure("sketch", lambda: QuantileSketch.from_frame(ab_test))
+
+    cube_rows = len(data["cube"])
+    agg = timer.measure("aggregate", lambda: analysis.aggregate(data), rows=cube_rows)
+    # 그룹 라벨은 test()와 같이 큐브에서 정한 기준 그룹 / 주 비교 그룹 사용
+    control, treatment = agg["control_arm"], agg["treatment_arm"]
+    pair = {"control": control, "treatment": treatment}
+
+    def _significance():
+        overall = analysis.segment_tests(data["cube"], [], correction="none", **pair)
+        segments = [analysis.segment_tests(data["cube"], dims, correction=correction, **pair)
+                    for dims, correction in analysis.SEGMENT_TESTS]
+        return overall, segments
+
+    timer.measure("significance", _significance, rows=cube_rows)
+
+    def _sequential():
+        monitor = analysis.SequentialMonitor(planned_n=size)
+        for visit_date, row in agg["daily_counts"].iterrows():
+            monitor.update(row[("n", control)], row[("converted_sum", control)],
+                           row[("n", treatment)], row[("converted_sum", treatment)],
+                           label=visit_date)
+        return monitor
+
+    timer.measure("sequential", _sequential, rows=len(agg["daily_counts"]))
+
+    converted_df = agg["converted_df"]
+    if converted_df is not None:
+        groups = converted_df["test_group"].to_numpy()
+        values = converted_df["order_value"].to_numpy(dtype=float)
+        timer.measure("bootstrap", lambda: analysis.bootstrap_mean_diff(
+            values[groups == control], values[groups == treatment],
+            n_boot=analysis.BOOTSTRAP_REPLICATES, seed=analysis.BOOTSTRAP_SEED,
+        ), rows=len(converted_df))
+
+    # 차트 입력은 측정 대상이 아니므로 부트스트랩 없이 한 번 더 계산
+    results = dict(agg)
+    results.update(analysis.test(data, agg, bootstrap_replicates=0))
+    plot_dir = os.path.join(data_dir, ".bench_plots")
+    os.makedirs(plot_dir, exist_ok=True)
+    timer.measure("plotting", lambda: render_all(chart_payload(results), plot_dir, workers=1),
+                  rows=cube_rows)
+    return timer.records
+
+
+def _run_size_subprocess(size, data_dir, streaming):
+    """규모 하나를 새 Python 프로세스에서 측정"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-one", str(size),
+           "--data-dir", os.path.abspath(data_dir)]
+    if streaming:
+        cmd.append("--streaming")
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, text=True)
+    lines = proc.stdout.splitlines()
+    for line in lines[:-1]:
+        print(line)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{size:,}행 측정 실패 (종료 코드 {proc.returncode})")
+    return json.loads(lines[-1])
+
+
+# =============================================================================
+# 결과 / 기준 비교
+# =============================================================================
+def environment():
+    import numpy as np
+    import pandas as pd
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE, min_sec=MIN_REGRESSION_SEC):
+    """기준 결과 대비 단계별 변화율 -> 비교 행 목록 (regression 플래그 포함)"""
+    base = {(r["size"], r["stage"], r["mode"]): r for r in baseline["results"]}
+    rows = []
+    for r in results["results"]:
+        b = base.get((r["size"], r["stage"], r["mode"]))
+        if b is None:
+            continue
+        ratio = r["wall_sec"] / b["wall_sec"] if b["wall_sec"] > 0 else float("inf")
+        rows.append({
+            "size": r["size"],
+            "stage": r["stage"],
+            "baseline_sec": b["wall_sec"],
+            "wall_sec": r["wall_sec"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + tolerance and r["wall_sec"] - b["wall_sec"] > min_sec,
+        })
+    return rows
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, data_root=DEFAULT_DATA_ROOT, output=DEFAULT_OUTPUT,
+                  streaming_min_rows=STREAMING_MIN_ROWS, seed=DEFAULT_SEED):
+    """규모별 측정 후 JSON 저장 -> 결과 딕셔너리"""
+    results = {"environment": environment(), "results": []}
+    for size in sizes:
+        data_dir = ensure_data(size, data_root, seed)
+        streaming = size >= streaming_min_rows
+        print(f"\n📏 {size:,}행" + (" (스트리밍)" if streaming else ""))
+        results["results"].extend(_run_size_subprocess(size, data_dir, streaming))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 결과 저장: {output}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A/B 테스트 분석 파이프라인 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="방문자 행 수 목록")
+    parser.add_argument("--data-root", default=DEFAULT_DATA_ROOT, help="생성 데이터 보관 폴더")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="결과 JSON 파일")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="회귀 판정 허용 비율 (0.2 = 20%% 느려지면 회귀)")
+    parser.add_argument("--streaming-from", type=int, default=STREAMING_MIN_ROWS,
+                        help="이 행 수 이상은 스트리밍 모드로 측정")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    # 내부용: 규모 하나를 현재 프로세스에서 측정하고 마지막 줄에 JSON 출력
+    parser.add_argument("--run-one", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--streaming", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one is not None:
+        records = run_size(args.run_one, args.data_dir, args.streaming)
+        print(json.dumps(records, ensure_ascii=False))
+        return 0
+
+    print("=" * 60)
+    print("⏱️ 분석 파이프라인 벤치마크")
+    print("=" * 60)
+    results = run_benchmark(args.sizes, args.data_root, args.output, args.streaming_from, args.seed)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, tolerance=args.tolerance)
+        print(f"\n[기준 대비 비교: {args.baseline}]")
+        for row in rows:
+            mark = "❌ 회귀" if row["regression"] else "✅"
+            print(f"  {row['size']:>12,} {row['stage']:<13} {row['baseline_sec']:>9.3f}초 → "
+                  f"{row['wall_sec']:>9.3f}초 (x{row['ratio']:.2f}) {mark}")
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
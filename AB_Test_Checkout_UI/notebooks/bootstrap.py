@@ -0,0 +1,176 @@
+"""
+병렬 벡터화 부트스트랩 - 객단가/결제시간 신뢰구간
+=====================================
+
+객단가(order_value)와 결제시간(checkout_time_sec)처럼 치우친 분포의 평균 차이와
+변화율에 대해 부트스트랩 신뢰구간을 계산합니다.
+
+- 재표본은 Python 반복문 대신 가중치 행렬 곱으로 한꺼번에 계산합니다.
+  (poisson: 각 행에 Poisson(1) 가중치, multinomial: 복원추출 횟수)
+- Poisson(1) 가중치는 16비트 균등 난수를 분위수 표(lookup table)로 변환해
+  만듭니다. 확률 오차는 1/65536 수준이고 rng.poisson보다 몇 배 빠릅니다.
+- 가중치 행렬은 워커당 메모리 예산(memory_budget_mb)을 넘지 않도록 나눠 만듭니다.
+  poisson은 행 블록 단위로 부분합만 누적하고, multinomial은 재표본 블록 단위로
+  (재표본 × 행) 복원추출 횟수 행렬을 bincount 한 번으로 만듭니다.
+- 재표본은 BLOCK_REPLICATES개씩 블록으로 나누고, 블록마다
+  SeedSequence에서 파생한 고정 시드를 사용하므로 워커 수와 관계없이
+  같은 seed면 같은 결과가 나옵니다.
+- 작업량이 크면 블록을 프로세스 풀에 나눠 처리합니다.
+
+사용법:
+    from bootstrap import bootstrap_mean_diff
+
+    result = bootstrap_mean_diff(control_values, treatment_values, n_boot=5000, seed=42)
+    result["rel_ci"]   # 변화율 95% 신뢰구간
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+
+# 재표본 블록 크기 (시드 단위)
+BLOCK_REPLICATES = 64
+
+# 이 작업량(재표본 수 × 행 수) 미만이면 프로세스 풀 없이 현재 프로세스에서 계산
+PARALLEL_THRESHOLD = 50_000_000
+
+# Poisson(1) 분위수 표: 16비트 균등 난수 u -> 가중치 k
+_LUT_BITS = 16
+_POISSON_LUT = np.searchsorted(
+    stats.poisson.cdf(np.arange(32), 1.0),
+    (np.arange(1 << _LUT_BITS) + 0.5) / (1 << _LUT_BITS),
+    side="right",
+).astype(np.uint8)
+
+# 워커 프로세스에 한 번만 전달되는 데이터
+_worker_data = {}
+
+
+def _init_worker(groups, method, memory_budget_mb):
+    _worker_data["groups"] = groups
+    _worker_data["method"] = method
+    _worker_data["memory_budget_mb"] = memory_budget_mb
+
+
+def _weighted_means(values, n_reps, rng, method, memory_budget_mb):
+    """한 그룹에 대해 n_reps개 재표본 평균을 가중치 행렬 곱으로 계산"""
+    n = values.size
+    if method == "multinomial":
+        # 복원추출 횟수 = 재표본 블록 전체의 bincount 한 번 (재표본마다 합이 정확히 n)
+        # 재표본 r의 인덱스에 r * n을 더해 (재표본 × 행) 횟수 행렬을 한 번에 만듦
+        # (인덱스 int64 + 횟수 int64)
+        bytes_per_rep = n * 16
+        reps_per_block = max(1, int(memory_budget_mb * 1024 * 1024 // bytes_per_rep))
+        means = np.empty(n_reps)
+        for start in range(0, n_reps, reps_per_block):
+            size = min(reps_per_block, n_reps - start)
+            index = rng.integers(0, n, size=(size, n))
+            index += np.arange(size)[:, None] * n
+            counts = np.bincount(index.ravel(), minlength=size * n).reshape(size, n)
+            del index
+            means[start:start + size] = counts @ values / n
+        return means
+
+    if method != "poisson":
+        raise ValueError(f"지원하지 않는 가중치 방법: {method}")
+
+    # Poisson 가중치는 행 블록별로 독립이므로 부분합으로 나눠 계산 가능
+    # (가중치 행렬 float64 + 난수 uint16)
+    bytes_per_row = n_reps * 10
+    rows_per_block = max(1, int(memory_budget_mb * 1024 * 1024 // bytes_per_row))
+    weighted_sum = np.zeros(n_reps)
+    weight_total = np.zeros(n_reps)
+    for start in range(0, n, rows_per_block):
+        block = values[start:start + rows_per_block]
+        uniform = rng.integers(0, 1 << _LUT_BITS, size=(n_reps, block.size), dtype=np.uint16)
+        weights = _POISSON_LUT[uniform].astype(np.float64)
+        weighted_sum += weights @ block
+        weight_total += weights.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return weighted_sum / weight_total
+
+
+def _run_block(task):
+    """재표본 블록 하나 계산 -> (n_reps, 그룹 수) 평균 행렬"""
+    seed_seq, n_reps = task
+    groups = _worker_data["groups"]
+    rngs = [np.random.default_rng(s) for s in seed_seq.spawn(len(groups))]
+    return np.column_stack([
+        _weighted_means(values, n_reps, rng, _worker_data["method"], _worker_data["memory_budget_mb"])
+        for values, rng in zip(groups, rngs)
+    ])
+
+
+def bootstrap_means(groups, n_boot=2000, seed=0, method="poisson",
+                    memory_budget_mb=256, workers=None):
+    """그룹별 독립 재표본 평균 (n_boot × 그룹 수 행렬) 계산
+
+    workers=None이면 작업량이 PARALLEL_THRESHOLD 이상일 때만 CPU 수만큼
+    프로세스 풀을 사용합니다.
+    """
+    groups = [np.ascontiguousarray(np.asarray(g, dtype=np.float64)) for g in groups]
+    if any(g.size == 0 for g in groups):
+        raise ValueError("비어 있는 그룹이 있습니다")
+
+    n_blocks = -(-n_boot // BLOCK_REPLICATES)
+    seeds = np.random.SeedSequence(seed).spawn(n_blocks)
+    sizes = [min(BLOCK_REPLICATES, n_boot - i * BLOCK_REPLICATES) for i in range(n_blocks)]
+    tasks = list(zip(seeds, sizes))
+
+    work = n_boot * sum(g.size for g in groups)
+    if workers is None:
+        workers = (os.cpu_count() or 1) if work >= PARALLEL_THRESHOLD else 1
+    workers = max(1, min(workers, n_blocks))
+
+    if workers == 1:
+        _init_worker(groups, method, memory_budget_mb)
+        try:
+            blocks = [_run_block(task) for task in tasks]
+        finally:
+            _worker_data.clear()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(groups, method, memory_budget_mb),
+        ) as pool:
+            blocks = list(pool.map(_run_block, tasks))
+    return np.vstack(blocks)
+
+
+def bootstrap_mean_diff(control, treatment, n_boot=2000, alpha=0.05, seed=0,
+                        method="poisson", memory_budget_mb=256, workers=None):
+    """control vs treatment 평균 차이/변화율의 백분위수 부트스트랩 신뢰구간
+
+    반환값:
+      mean_control, mean_treatment: 표본 평균
+      diff, diff_ci: 평균 차이 (treatment - control)와 신뢰구간
+      rel, rel_ci: 변화율 (treatment / control - 1)과 신뢰구간
+      control_ci, treatment_ci: 그룹별 평균 신뢰구간
+    """
+    control = np.asarray(control, dtype=np.float64)
+    treatment = np.asarray(treatment, dtype=np.float64)
+    control = control[~np.isnan(control)]
+    treatment = treatment[~np.isnan(treatment)]
+
+    draws = bootstrap_means([control, treatment], n_boot=n_boot, seed=seed, method=method,
+                            memory_budget_mb=memory_budget_mb, workers=workers)
+    boot_a, boot_b = draws[:, 0], draws[:, 1]
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+
+    mean_a = control.mean()
+    mean_b = treatment.mean()
+    return {
+        "mean_control": mean_a,
+        "mean_treatment": mean_b,
+        "diff": mean_b - mean_a,
+        "diff_ci": tuple(np.percentile(boot_b - boot_a, q)),
+        "rel": mean_b / mean_a - 1,
+        "rel_ci": tuple(np.percentile(boot_b / boot_a - 1, q)),
+        "control_ci": tuple(np.percentile(boot_a, q)),
+        "treatment_ci": tuple(np.percentile(boot_b, q)),
+        "n_boot": n_boot,
+    }
@@ -0,0 +1,151 @@
+"""
+충분통계량 큐브 - 단일 스캔 집계 엔진
+=====================================
+
+방문자 로그를 한 번만 스캔해서 (그룹 × 디바이스 × 연령대 × 지역 × 성별 ×
+방문일 × 결제수단) 셀마다 건수, 합계, 제곱합을 계산합니다.
+그룹별 전환율, 세그먼트 피벗, 일별 추이, 검정 통계량은 모두 이 작은 큐브를
+다시 합산(rollup)해서 얻으므로 원본 데이터를 반복해서 필터링할 필요가 없습니다.
+
+큐브는 합계만 담고 있어서 청크/파일/일자 단위로 만든 큐브끼리 그대로 더할 수
+있습니다 (`Cube.merge`).
+
+사용법:
+    from cube import Cube
+
+    cube = Cube.from_frame(ab_test)
+    cube.summary("test_group")                 # 그룹별 전환율/객단가/결제시간
+    cube.pivot("device", "conversion_rate")    # 디바이스 × 그룹 전환율
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# 큐브 차원 (결제수단은 전환 고객에만 존재하므로 미전환 셀은 결측값으로 남음)
+CUBE_DIMENSIONS = [
+    "test_group", "device", "age_group", "region", "gender",
+    "visit_date", "payment_method",
+]
+
+# 집계 대상 지표
+CUBE_METRICS = ["converted", "order_value", "checkout_time_sec"]
+
+# 셀 통계량 컬럼: n(방문자 수)과 지표별 _n(결측 제외 건수), _sum, _sumsq
+STAT_COLUMNS = ["n"] + [
+    f"{metric}_{stat}" for metric in CUBE_METRICS for stat in ("n", "sum", "sumsq")
+]
+
+
+def _sample_std(n, total, sumsq):
+    """건수/합계/제곱합으로 표본 표준편차 계산 (ddof=1)"""
+    n = np.asarray(n, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (sumsq - total ** 2 / n) / (n - 1)
+    return np.sqrt(np.clip(var, 0, None))
+
+
+def cell_statistics(df, dims=CUBE_DIMENSIONS):
+    """원본 프레임을 한 번 스캔해서 차원별 셀 통계량 계산"""
+    values = {"n": np.ones(len(df), dtype=np.int64)}
+    for metric in CUBE_METRICS:
+        col = df[metric].to_numpy(dtype=float, na_value=np.nan)
+        valid = ~np.isnan(col)
+        col = np.where(valid, col, 0.0)
+        values[f"{metric}_n"] = valid.astype(np.int64)
+        values[f"{metric}_sum"] = col
+        values[f"{metric}_sumsq"] = col * col
+    stats_frame = pd.DataFrame(values, index=df.index)
+    for dim in dims:
+        stats_frame[dim] = df[dim]
+
+    cells = (
+        stats_frame.groupby(dims, observed=True, dropna=False, sort=False)[STAT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    return cells
+
+
+class Cube:
+    """차원별 충분통계량(건수/합계/제곱합) 큐브"""
+
+    def __init__(self, cells, dims=CUBE_DIMENSIONS):
+        self.dims = list(dims)
+        self.cells = cells
+
+    @classmethod
+    def from_frame(cls, df, dims=CUBE_DIMENSIONS):
+        """방문자 로그 DataFrame에서 큐브 생성 (단일 스캔)"""
+        return cls(cell_statistics(df, dims), dims)
+
+    def __len__(self):
+        return len(self.cells)
+
+    @property
+    def total_rows(self):
+        """큐브에 집계된 원본 방문자 수"""
+        return int(self.cells["n"].sum())
+
+    def merge(self, other):
+        """다른 큐브와 합치기 (청크/파일/일자 단위 부분 집계 병합)"""
+        return merge_cubes([self, other])
+
+    def rollup(self, by):
+        """지정한 차원으로 통계량 합산 (나머지 차원은 합쳐짐)"""
+        by = [by] if isinstance(by, str) else list(by)
+        if not by:
+            return self.cells[STAT_COLUMNS].sum().to_frame().T
+        return self.cells.groupby(by, observed=True, dropna=False)[STAT_COLUMNS].sum()
+
+    def summary(self, by):
+        """차원별 파생 지표 (전환율, 객단가, 결제시간 평균/표준편차)
+
+        객단가는 전환 고객 기준, 결제시간은 값이 있는 행 기준입니다.
+        """
+        stats = self.rollup(by)
+        out = pd.DataFrame(index=stats.index)
+        out["visitors"] = stats["n"]
+        out["conversions"] = stats["converted_sum"].round().astype(np.int64)
+        out["conversion_rate"] = stats["converted_sum"] / stats["n"]
+
+        buyers = stats["converted_sum"]
+        out["aov_mean"] = stats["order_value_sum"] / buyers
+        out["aov_std"] = _sample_std(buyers, stats["order_value_sum"], stats["order_value_sumsq"])
+
+        timed = stats["checkout_time_sec_n"]
+        out["checkout_time_mean"] = stats["checkout_time_sec_sum"] / timed
+        out["checkout_time_std"] = _sample_std(
+            timed, stats["checkout_time_sec_sum"], stats["checkout_time_sec_sumsq"]
+        )
+        return out
+
+    def pivot(self, index, value="conversion_rate", columns="test_group"):
+        """index × 그룹 피벗 (summary의 파생 지표 기준)"""
+        index = [index] if isinstance(index, str) else list(index)
+        return self.summary(index + [columns])[value].unstack(columns)
+
+
+def merge_cubes(cubes):
+    """여러 큐브를 한 번에 병합 (셀 통계량을 차원별로 합산)"""
+    cubes = list(cubes)
+    if not cubes:
+        raise ValueError("병합할 큐브가 없습니다")
+    dims = cubes[0].dims
+    for other in cubes[1:]:
+        if other.dims != dims:
+            raise ValueError(f"큐브 차원이 다릅니다: {dims} != {other.dims}")
+    if len(cubes) == 1:
+        return cubes[0]
+
+    cells = pd.concat([c.cells for c in cubes], ignore_index=True)
+    for dim in dims:
+        # 청크마다 카테고리 목록이 다를 수 있으므로 합집합으로 맞춤
+        if isinstance(cubes[0].cells[dim].dtype, pd.CategoricalDtype) or cells[dim].dtype == object:
+            cells[dim] = cells[dim].astype("category")
+    merged = (
+        cells.groupby(dims, observed=True, dropna=False, sort=False)[STAT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    return Cube(merged, dims)
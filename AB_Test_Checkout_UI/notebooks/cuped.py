@@ -0,0 +1,172 @@
+"""
+CUPED 분산 감소 - 실험 전 구매 이력을 공변량으로 사용
+=====================================
+
+실험 시작 이전(기본: 방문 로그의 첫 방문일 이전)의 주문 건수와 결제 금액을 고객별로
+집계해 공변량으로 쓰고, 전환율과 방문자당 매출에 대해 CUPED(회귀 보정)
+추정치를 계산합니다.
+
+조인은 문자열 merge 대신 정수 키 인덱스로 처리합니다.
+- order_id / customer_id를 정수 키로 변환
+- 결제 -> 주문: 주문 키를 직접 주소로 쓰는 배열 인덱스 (키가 성기면 정렬 +
+  searchsorted)
+- 주문 -> 고객: np.bincount로 고객 키별 건수/금액 합산
+- 고객 -> 방문자: 고객 키 배열 인덱싱
+
+사용법:
+    from cuped import pre_period_covariates, cuped_effects
+
+    covariates = pre_period_covariates(ab_test, orders, payments)
+    result = cuped_effects(ab_test, covariates)
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from schema import parse_int_key
+
+
+# 키 범위 대비 실제 키 수가 이 비율보다 작으면 직접 주소 대신 정렬 인덱스 사용
+_DENSE_KEY_RATIO = 0.25
+
+# 실험 전 기간에서 제외할 주문 상태
+EXCLUDED_STATUSES = ("취소",)
+
+
+class KeyIndex:
+    """정수 키 -> 행 위치 인덱스 (직접 주소 배열 또는 정렬 + searchsorted)
+
+    중복 키는 두 방식 모두 첫 번째 행 위치를 돌려줍니다.
+    """
+
+    def __init__(self, keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        self.size = keys.size
+        if keys.size and keys.min() >= 0 and keys.size >= _DENSE_KEY_RATIO * (keys.max() + 1):
+            self.table = np.full(keys.max() + 1, -1, dtype=np.int64)
+            if np.bincount(keys).max() > 1:
+                # 중복 키: 키별 첫 번째 행만 기록 (팬시 인덱스 대입은 순서가 보장되지 않음)
+                unique, first = np.unique(keys, return_index=True)
+                self.table[unique] = first
+            else:
+                self.table[keys] = np.arange(keys.size)
+            self.sorted_keys = None
+        else:
+            self.table = None
+            # 안정 정렬 + searchsorted(left)이므로 같은 키 중 원래 순서가 가장 앞선 행
+            self.order = np.argsort(keys, kind="stable")
+            self.sorted_keys = keys[self.order]
+
+    def lookup(self, keys):
+        """키 배열의 행 위치 (없는 키는 -1)"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.table is not None:
+            inside = (keys >= 0) & (keys < self.table.size)
+            pos = np.full(keys.size, -1, dtype=np.int64)
+            pos[inside] = self.table[keys[inside]]
+            return pos
+        idx = np.searchsorted(self.sorted_keys, keys)
+        idx_clipped = np.minimum(idx, max(self.size - 1, 0))
+        found = (idx < self.size) & (self.sorted_keys[idx_clipped] == keys)
+        return np.where(found, self.order[idx_clipped], -1)
+
+
+def pre_period_covariates(ab_test, orders, payments, start=None):
+    """방문자별 실험 전 주문 건수와 결제 금액 (ab_test 행 순서와 동일)
+
+    start: 실험 시작일 (이 날짜 이전 주문만 공변량에 사용, None이면 ab_test의 첫 방문일)
+    반환: DataFrame(columns=["pre_orders", "pre_spend"], index=ab_test.index)
+    """
+    start = pd.Timestamp(start) if start is not None else pd.to_datetime(ab_test["visit_date"]).min()
+    order_date = pd.to_datetime(orders["order_date"])
+    mask = (order_date < start).to_numpy()
+    if "order_status" in orders:
+        mask = mask & ~orders["order_status"].isin(EXCLUDED_STATUSES).to_numpy()
+    pre_orders = orders.loc[mask]
+
+    # 결제 -> 주문 (정수 키 인덱스)
+    payment_index = KeyIndex(parse_int_key(payments["order_id"], "ORD_"))
+    pos = payment_index.lookup(parse_int_key(pre_orders["order_id"], "ORD_"))
+    amounts = payments["total_amount"].to_numpy(dtype=float)
+    order_amount = np.where(pos >= 0, amounts[np.maximum(pos, 0)], 0.0)
+
+    # 주문 -> 고객 (고객 키별 합산)
+    visitor_keys = parse_int_key(ab_test["customer_id"], "CUST_")
+    order_customers = parse_int_key(pre_orders["customer_id"], "CUST_")
+    size = int(max(visitor_keys.max(initial=0), order_customers.max(initial=0))) + 1
+    count_by_customer = np.bincount(order_customers, minlength=size)
+    spend_by_customer = np.bincount(order_customers, weights=order_amount, minlength=size)
+
+    # 고객 -> 방문자
+    return pd.DataFrame({
+        "pre_orders": count_by_customer[visitor_keys].astype(np.float64),
+        "pre_spend": spend_by_customer[visitor_keys],
+    }, index=ab_test.index)
+
+
+def cuped_adjust(y, x):
+    """공변량 x(행렬)로 y를 회귀 보정: y - (x - mean(x)) @ theta
+
+    theta는 두 그룹을 합친 데이터에서 추정합니다 (처치와 무관한 공변량이므로
+    편향이 생기지 않음).
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 1:
+        x = x[:, None]
+    xc = x - x.mean(axis=0)
+    yc = y - y.mean()
+    cov_xx = xc.T @ xc
+    cov_xy = xc.T @ yc
+    theta = np.linalg.lstsq(cov_xx, cov_xy, rcond=None)[0]
+    return y - xc @ theta, theta
+
+
+def _mean_diff(y, is_treatment, alpha):
+    """그룹 평균 차이와 표준오차, 신뢰구간, p-value"""
+    y_a, y_b = y[~is_treatment], y[is_treatment]
+    diff = y_b.mean() - y_a.mean()
+    se = np.sqrt(y_a.var(ddof=1) / y_a.size + y_b.var(ddof=1) / y_b.size)
+    z = stats.norm.ppf(1 - alpha / 2)
+    return {
+        "diff": diff,
+        "se": se,
+        "ci_low": diff - z * se,
+        "ci_high": diff + z * se,
+        "p_value": 2 * stats.norm.sf(abs(diff / se)) if se > 0 else np.nan,
+    }
+
+
+def cuped_effects(ab_test, covariates, treatment="treatment", alpha=0.05,
+                  covariate_columns=("pre_orders", "pre_spend")):
+    """전환율 / 방문자당 매출에 대해 원 추정치와 CUPED 추정치 비교
+
+    반환: 지표별 1행 DataFrame (diff, se, CI, p-value, 분산 감소율)
+    """
+    is_treatment = (ab_test["test_group"] == treatment).to_numpy()
+    x = covariates[list(covariate_columns)].to_numpy(dtype=float)
+    metrics = {
+        "conversion": ab_test["converted"].to_numpy(dtype=float),
+        "revenue_per_visitor": ab_test["order_value"].fillna(0).to_numpy(dtype=float),
+    }
+
+    rows = []
+    for name, y in metrics.items():
+        raw = _mean_diff(y, is_treatment, alpha)
+        y_adj, theta = cuped_adjust(y, x)
+        adj = _mean_diff(y_adj, is_treatment, alpha)
+        rows.append({
+            "metric": name,
+            "diff": raw["diff"],
+            "se": raw["se"],
+            "p_value": raw["p_value"],
+            "cuped_diff": adj["diff"],
+            "cuped_se": adj["se"],
+            "cuped_ci_low": adj["ci_low"],
+            "cuped_ci_high": adj["ci_high"],
+            "cuped_p_value": adj["p_value"],
+            "variance_reduction": 1 - (adj["se"] / raw["se"]) ** 2,
+            "theta": theta.tolist(),
+        })
+    return pd.DataFrame(rows).set_index("metric")
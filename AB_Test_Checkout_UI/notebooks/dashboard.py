@@ -0,0 +1,244 @@
+"""
+HTML 대시보드 생성 - 분석 결과에서 3페이지 대시보드 렌더링
+=====================================
+
+Tableau 목업(Tableau/ab_test_dashboard_v2.html)과 같은 화면(Executive Summary /
+Segment Analysis / Statistical Validation)을 분석 결과 딕셔너리에서 바로 만듭니다.
+
+- 화면 구성과 차트 코드는 dashboard_template.html에 고정되어 있고, 숫자와
+  시계열은 템플릿의 <script id="dashboard-data"> 한 곳에 JSON으로 들어갑니다.
+- JSON에는 원본 행 없이 미리 집계한 값만 담습니다 (일별/누적 전환율과 신뢰구간,
+  디바이스·연령·지역 셀, 결제수단 비중, 세그먼트 검정 결과, 서식 적용된 KPI 문구).
+  크기는 실험 일수와 세그먼트 수에만 비례하므로 방문자 수가 늘어도 일정합니다.
+- 템플릿은 프로세스마다 한 번만 읽고, 렌더링은 JSON 직렬화 + 문자열 치환 한 번이라
+  batch_runner.py로 실험 수백 개의 대시보드를 한 번에 만들 수 있습니다.
+
+사용법:
+    from dashboard import write_dashboard
+
+    write_dashboard(results, "../outputs/ab_test_dashboard.html")
+
+    python ab_test_analysis.py --dashboard ../outputs/ab_test_dashboard.html
+    python batch_runner.py "../data/raw/experiments/*.csv" --output-dir ../outputs/batch/ --dashboards
+"""
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from plotting import AGE_ORDER
+from significance import proportion_confint
+
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard_template.html")
+
+# 템플릿에서 JSON으로 치환되는 자리
+PAYLOAD_MARKER = "__DASHBOARD_DATA__"
+
+DEFAULT_TITLE = "새 결제 페이지 A/B Test"
+DASHBOARD_FILE = "ab_test_dashboard.html"
+
+# 유의수준 / 지역 차트 개수
+ALPHA = 0.05
+TOP_REGIONS = 5
+
+# 세그먼트 요약 테이블에 넣을 세그먼트 검정 차원 (전체 행 다음 순서대로)
+TABLE_SEGMENTS = ["device", "age_group"]
+
+
+# =============================================================================
+# 서식
+# =============================================================================
+def _values(values, digits=2, scale=100):
+    """배열 -> JSON 리스트 (비율은 %로, 소수 자릿수 제한, NaN은 null)"""
+    values = np.asarray(values, dtype=float) * scale
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def _signed(value, fmt, unit=""):
+    """부호 붙인 숫자 문구 (음수는 목업과 같이 '−' 사용)"""
+    sign = "+" if value >= 0 else "−"
+    return f"{sign}{format(abs(value), fmt)}{unit}"
+
+
+def _delta(value, fmt=".1f"):
+    """KPI 변화율 문구 (↑ +1.4%)"""
+    return f"{'↑' if value >= 0 else '↓'} {_signed(value, fmt, '%')}"
+
+
+def _date_labels(index):
+    return [f"{d.month}/{d.day}" for d in index]
+
+
+def _pair(frame, labels=None, control="control", treatment="treatment"):
+    """control/treatment 피벗(%) -> [{label, a, b}] (없는 라벨은 제외, 그 밖의 그룹 열은 무시)"""
+    if labels is not None:
+        frame = frame.reindex([label for label in labels if label in frame.index])
+    return [{"label": str(label), "a": round(float(row[control]), 2), "b": round(float(row[treatment]), 2)}
+            for label, row in frame.iterrows()]
+
+
+# =============================================================================
+# 페이로드
+# =============================================================================
+def _text_fields(r, title, significant):
+    """KPI 카드 / 요약 문구 (서식 적용된 문자열)"""
+    stats = r["group_stats"]
+    n_a, n_b = int(stats.loc[r["control_arm"], "n"]), int(stats.loc[r["treatment_arm"], "n"])
+    rate_a, rate_b = r["control_rate"] * 100, r["treatment_rate"] * 100
+    aov_a, aov_b = r["aov_control"], r["aov_treatment"]
+    time_a, time_b = r["time_control"], r["time_treatment"]
+    time_change = (time_b / time_a - 1) * 100
+    p_value = r["p_value"]
+    state = r["sequential_state"]
+    return {
+        "title": title,
+        "status": f"순차 검정 종료 ({state['looks']}일차)" if state["stopped"]
+                  else f"테스트 진행중 ({state['looks']}일차)",
+        "visitors_a": f"{n_a:,}",
+        "visitors_b": f"{n_b:,}",
+        "visitors_delta": _delta((n_b / n_a - 1) * 100),
+        "rate_a": f"{rate_a:.2f}",
+        "rate_b": f"{rate_b:.2f}",
+        "rate_delta": _delta(r["relative_lift"]),
+        "aov_a": f"{aov_a:,.0f}",
+        "aov_b": f"{aov_b:,.0f}",
+        "aov_delta": _delta((aov_b / aov_a - 1) * 100),
+        "time_a": f"{time_a:.0f}",
+        "time_b": f"{time_b:.0f}",
+        "time_delta": _delta(time_change),
+        "time_saved": f"{time_a - time_b:.0f}초",
+        "time_saved_pct": _signed(time_change, ".1f"),
+        "rate_diff": _signed(rate_b - rate_a, ".2f", "%p"),
+        "rate_change": f"{rate_a:.2f}% → {rate_b:.2f}%",
+        "aov_diff": _signed(aov_b - aov_a, ",.0f").replace("+", "+₩").replace("−", "−₩"),
+        "aov_change": f"₩{aov_a:,.0f} → ₩{aov_b:,.0f}",
+        "time_diff": _signed(time_b - time_a, ".0f", "초"),
+        "time_change": f"{time_a:.0f}초 → {time_b:.0f}초",
+        "lift_pct": f"{r['relative_lift']:.0f}%",
+        "p_value": "p < 0.001" if p_value < 0.001 else f"p = {p_value:.3f}",
+        "verdict": "통계적으로 유의미한 결과" if significant else "통계적으로 유의하지 않음",
+        "confidence": f"{min(1 - p_value, 0.999) * 100:.1f}%",
+    }
+
+
+def _checks(r, significant, segments, alpha):
+    """검증 결과 체크 항목 [문구, 보조 문구, 통과 여부]"""
+    integrity = r["integrity"]
+    report = integrity["report"]
+    failed = report.loc[report["status"] == "fail", "check"].tolist()
+    improved = sum(row[3] > 0 for row in segments[1:])
+    consistent = improved == len(segments) - 1
+    return [
+        ["p < 0.001" if r["p_value"] < 0.001 else f"p = {r['p_value']:.3f}",
+         "유의수준 통과" if significant else f"유의수준 {alpha} 미달", bool(significant)],
+        ["무결성 검사 통과" if integrity["passed"] else "무결성 검사 실패",
+         "SRM·배정 이상 없음" if integrity["passed"] else ", ".join(failed), bool(integrity["passed"])],
+        ["새 UI 적용 권고" if significant and consistent else "추가 검토 필요",
+         "전 세그먼트 일관 개선" if consistent else f"개선 세그먼트 {improved}/{len(segments) - 1}개",
+         bool(significant and consistent)],
+    ]
+
+
+def _segment_rows(r):
+    """세그먼트 요약 테이블 행 [라벨, 기존(%), 변경(%), 차이(%p), 차이 CI 하한, 상한, 개선율(%), 유의]"""
+    def _row(label, test):
+        values = _values([test["rate_control"], test["rate_treatment"], test["diff"],
+                          test["diff_ci_low"], test["diff_ci_high"], test["lift"]])
+        return [str(label)] + values + [bool(test["significant"])]
+
+    rows = [_row("전체", r["overall_test"])]
+    for dims, _, result in r["segment_tests"]:
+        if len(dims) == 1 and dims[0] in TABLE_SEGMENTS:
+            if dims[0] == "age_group":
+                result = result.reindex([a for a in AGE_ORDER if a in result.index])
+            rows.extend(_row(label, test) for label, test in result.iterrows())
+    return rows
+
+
+def dashboard_payload(results, title=DEFAULT_TITLE, alpha=ALPHA):
+    """분석 결과 -> 대시보드 JSON 페이로드 (미리 집계한 값만, JSON 직렬화 가능)"""
+    r = results
+    significant = r["p_value"] < alpha
+    # 대시보드는 기준 그룹(a)과 주 비교 그룹(b) 두 그룹만 표시
+    control, treatment = r["control_arm"], r["treatment_arm"]
+    arms = {"control": control, "treatment": treatment}
+
+    daily = r["daily_counts"]
+    daily_rate = daily["converted_sum"] / daily["n"]
+    cumulative = r["cumulative_counts"]
+    cum = {"dates": _date_labels(cumulative.index)}
+    for arm, group in [("a", control), ("b", treatment)]:
+        low, high = proportion_confint(cumulative[("converted_sum", group)], cumulative[("n", group)], alpha)
+        cum[arm] = _values(r["cumulative_rate"][group], 3)
+        cum[f"{arm}_low"] = _values(low, 3)
+        cum[f"{arm}_high"] = _values(high, 3)
+
+    payment = r["payment_dist"].T.sort_values(treatment, ascending=False)
+    segments = _segment_rows(r)
+    return {
+        "alpha": alpha,
+        "significant": bool(significant),
+        "stopped": bool(r["sequential_state"]["stopped"]),
+        "confidence": round(min(1 - float(r["p_value"]), 0.999) * 100, 1),
+        "text": _text_fields(r, title, significant),
+        "good": {
+            "visitors_delta": not bool(r["integrity"]["srm"].iloc[0]["srm"]),
+            "rate_delta": bool(r["relative_lift"] >= 0),
+            "aov_delta": bool(r["aov_treatment"] >= r["aov_control"]),
+            "time_delta": bool(r["time_treatment"] <= r["time_control"]),
+        },
+        "daily": {
+            "dates": _date_labels(daily.index),
+            "a": _values(daily_rate[control]),
+            "b": _values(daily_rate[treatment]),
+        },
+        "cumulative": cum,
+        "devices": _pair(r["device_pivot"], **arms),
+        "ages": _pair(r["age_pivot"], AGE_ORDER, **arms),
+        "regions": _pair(r["region_pivot"].head(TOP_REGIONS), **arms),
+        "payments": _pair(payment.fillna(0), **arms),
+        "checks": _checks(r, significant, segments, alpha),
+        "segments": segments,
+    }
+
+
+# =============================================================================
+# 렌더링
+# =============================================================================
+@lru_cache(maxsize=4)
+def load_template(path=TEMPLATE_PATH):
+    """대시보드 템플릿 (프로세스당 한 번만 읽음)"""
+    with open(path, encoding="utf-8") as f:
+        template = f.read()
+    if PAYLOAD_MARKER not in template:
+        raise ValueError(f"템플릿에 데이터 자리({PAYLOAD_MARKER})가 없습니다: {path}")
+    return template
+
+
+def render_dashboard(payload, template_path=TEMPLATE_PATH):
+    """페이로드 -> HTML 문자열"""
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    # <script> 블록 안에 들어가므로 '</'가 태그를 닫지 않도록 이스케이프
+    data = data.replace("</", "<\\/")
+    return load_template(template_path).replace(PAYLOAD_MARKER, data, 1)
+
+
+def write_dashboard(results, path, title=DEFAULT_TITLE, verbose=True):
+    """분석 결과에서 대시보드 HTML 저장 -> 저장한 경로
+
+    path가 폴더이면 그 안에 ab_test_dashboard.html로 저장합니다.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, DASHBOARD_FILE)
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    html = render_dashboard(dashboard_payload(results, title=title))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    if verbose:
+        print(f"✅ '{os.path.basename(path)}' 저장 완료! ({len(html.encode('utf-8')) / 1024:,.1f}KB)")
+    return path
@@ -0,0 +1,171 @@
+"""
+데이터 로더 - 타입 지정 컬럼형 캐시
+=====================================
+
+입력 CSV 6종을 한 번만 파싱해서 타입이 지정된 Arrow(Feather v2) 파일로
+변환해 두고, 이후 실행에서는 CSV 대신 캐시 파일을 메모리 매핑으로 읽습니다.
+
+- 지역/디바이스/연령대/결제수단 같은 한글 라벨은 사전(dictionary) 인코딩된
+  카테고리 컬럼으로 저장됩니다 (schema.py의 고정 코드표 순서).
+- visit_date, order_date 등 날짜 컬럼은 실제 날짜 타입으로 저장됩니다.
+- 캐시 파일명에는 원본 CSV의 지문(fingerprint)이 포함되므로, 원본이 바뀌면
+  자동으로 다시 변환됩니다.
+- compact=True면 ID를 정수 키로, 숫자 컬럼을 더 작은 타입으로 바꾼 압축
+  표현(schema.compact_frame)으로 로드하고 별도 캐시 파일로 저장합니다.
+
+사용법:
+    from data_loader import load_table, load_all
+
+    ab_test = load_table("ab_test_checkout_ui", data_path="../data/raw/")
+    tables = load_all("../data/raw/", compact=True)
+
+pyarrow가 설치되어 있지 않으면 캐시 없이 타입 지정 CSV 파싱으로 동작합니다.
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow는 선택 의존성
+    pa = None
+    feather = None
+
+from instrumentation import count
+# TABLE_SCHEMAS / TABLE_NAMES / parse_int_key는 기존 import 경로 호환을 위해 다시 내보냄
+from schema import TABLE_NAMES, TABLE_SCHEMAS, compact_frame, encode_categories, parse_int_key
+
+
+# 스키마가 바뀌면 올려서 기존 캐시를 모두 무효화
+CACHE_VERSION = 2
+
+# 기본 캐시 폴더 (데이터 폴더 기준 상대 경로)
+CACHE_DIR_NAME = ".cache"
+
+# 지문 계산 시 앞/뒤에서 읽을 바이트 수
+_FINGERPRINT_BLOCK = 1 << 16
+
+
+def file_fingerprint(path):
+    """원본 파일 지문 (크기 + 수정시각 + 앞/뒤 블록 해시)"""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{CACHE_VERSION}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(_FINGERPRINT_BLOCK))
+        if stat.st_size > _FINGERPRINT_BLOCK:
+            f.seek(max(stat.st_size - _FINGERPRINT_BLOCK, _FINGERPRINT_BLOCK))
+            digest.update(f.read(_FINGERPRINT_BLOCK))
+    return digest.hexdigest()
+
+
+def _csv_dtypes(name):
+    """read_csv에 넘길 컬럼 타입 매핑"""
+    schema = TABLE_SCHEMAS[name]
+    dtype = {col: "category" for col in schema["categories"]}
+    dtype.update(schema["dtypes"])
+    return dtype
+
+
+def _parse_dates(df, name):
+    """스키마의 날짜/일시 컬럼을 datetime으로 변환하고 라벨은 고정 코드표로 인코딩"""
+    schema = TABLE_SCHEMAS[name]
+    for col in schema["dates"] + schema["datetimes"]:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    return encode_categories(df, name)
+
+
+def read_csv_typed(path, name, **kwargs):
+    """스키마에 맞춰 타입을 지정해 CSV 읽기"""
+    df = pd.read_csv(path, dtype=_csv_dtypes(name), encoding="utf-8-sig", **kwargs)
+    return _parse_dates(df, name)
+
+
+def iter_csv_typed(path, name, chunksize):
+    """스키마에 맞춰 타입을 지정한 CSV를 chunksize 행 단위로 읽기
+
+    전체 파일을 메모리에 올리지 않으므로 파일 크기와 관계없이 한 청크
+    분량의 메모리만 사용합니다.
+    """
+    reader = pd.read_csv(
+        path, dtype=_csv_dtypes(name), encoding="utf-8-sig", chunksize=chunksize
+    )
+    with reader:
+        for chunk in reader:
+            yield _parse_dates(chunk, name)
+
+
+def _to_arrow(df, name):
+    """DataFrame -> Arrow 테이블 (날짜 컬럼은 date32로 저장)"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for col in TABLE_SCHEMAS[name]["dates"]:
+        idx = table.schema.get_field_index(col)
+        if idx >= 0:
+            table = table.set_column(idx, col, table.column(col).cast(pa.date32()))
+    return table
+
+
+def _cache_path(cache_dir, stem, fingerprint):
+    return os.path.join(cache_dir, f"{stem}.{fingerprint}.arrow")
+
+
+def _remove_stale(cache_dir, stem, keep):
+    """같은 원본 파일의 이전 지문 캐시 파일 삭제"""
+    for fname in os.listdir(cache_dir):
+        if not (fname.startswith(f"{stem}.") and fname.endswith(".arrow")):
+            continue
+        fingerprint = fname[len(stem) + 1:-len(".arrow")]
+        if len(fingerprint) == 16 and all(c in "0123456789abcdef" for c in fingerprint):
+            path = os.path.join(cache_dir, fname)
+            if path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def load_table(name, data_path="./", cache_dir=None, use_cache=True, path=None, compact=False):
+    """테이블 하나를 로드 (캐시가 있으면 메모리 매핑으로 읽기)
+
+    첫 실행에서는 CSV를 파싱해 `<CSV 폴더>/.cache/<파일명>.<지문>.arrow`로
+    저장하고, 이후에는 해당 파일을 메모리 매핑으로 읽습니다.
+    path를 주면 `<data_path>/<name>.csv` 대신 해당 CSV를 name 스키마로 읽습니다.
+    compact=True면 압축 표현으로 변환해 `<파일명>.compact.<지문>.arrow`에 저장합니다.
+    """
+    csv_path = path or os.path.join(data_path, f"{name}.csv")
+    if not use_cache or pa is None:
+        df = read_csv_typed(csv_path, name)
+        return compact_frame(df, name) if compact else df
+
+    cache_dir = cache_dir or os.path.join(os.path.dirname(csv_path) or ".", CACHE_DIR_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(csv_path))[0] + (".compact" if compact else "")
+    cached = _cache_path(cache_dir, stem, file_fingerprint(csv_path))
+
+    if os.path.exists(cached):
+        count("cache_hits")
+    else:
+        count("cache_misses")
+        df = read_csv_typed(csv_path, name)
+        if compact:
+            df = compact_frame(df, name)
+        # 비압축으로 저장해야 메모리 매핑 시 복사 없이 읽을 수 있음
+        tmp_path = f"{cached}.tmp{os.getpid()}"
+        feather.write_feather(_to_arrow(df, name), tmp_path, compression="uncompressed")
+        os.replace(tmp_path, cached)
+        _remove_stale(cache_dir, stem, keep=cached)
+
+    table = feather.read_table(cached, memory_map=True)
+    return table.to_pandas(date_as_object=False)
+
+
+def load_all(data_path="./", cache_dir=None, use_cache=True, compact=False):
+    """입력 테이블 6종을 모두 로드해 {테이블명: DataFrame}으로 반환"""
+    return {
+        name: load_table(name, data_path, cache_dir=cache_dir, use_cache=use_cache, compact=compact)
+        for name in TABLE_NAMES
+    }
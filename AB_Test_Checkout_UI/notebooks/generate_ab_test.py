@@ -0,0 +1,187 @@
+"""
+A/B 테스트 방문자 로그 생성기 - 세그먼트별 효과 크기 지정
+=====================================
+
+ab_test_checkout_ui 테이블을 원본과 같은 스키마로 생성합니다. 방문자 i는
+generate_kr_ecommerce.py의 고객 i와 같은 지역/연령대/성별/디바이스를 가지며,
+고객 파일을 읽지 않고 같은 seed로 속성을 다시 계산합니다.
+
+효과 크기는 EFFECTS 딕셔너리(또는 --effects JSON 파일)로 지정합니다.
+  base_rate: control 전환율
+  conversion_uplift: treatment 전환율 절대 상승폭 (기본)
+  segment_uplift: {차원: {값: 추가 상승폭}} - 기본 상승폭에 더해짐
+  aov_lift: treatment 객단가 상대 변화, checkout_time_change: 결제시간 상대 변화
+실제로 사용한 설정은 출력 폴더에 ab_test_effects.json으로 함께 저장되므로,
+분석 결과가 알려진 효과를 복원하는지 확인할 수 있습니다.
+
+고객 ID(CUST_000001)의 자릿수는 고객 파일과 같도록 고객 수(--customers, 기본은
+방문자 수)로 정합니다.
+
+사용법:
+    python generate_ab_test.py --output-dir ../data/raw/ --visitors 1000000
+    python generate_ab_test.py --output-dir ../data/raw/ --visitors 2000000 --customers 500000
+    python generate_ab_test.py --visitors 100000000 --format parquet --effects effects.json
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from generate_kr_ecommerce import (
+    AGE_GROUPS, BLOCK_ROWS, DEFAULT_CUSTOMERS, DEFAULT_SEED, DEVICES, GENDERS, REGIONS,
+    ChunkWriter, block_rng, categorical, choice_codes, customer_attributes,
+    customer_frame, day_labels, format_ids, id_width, iter_blocks, output_path,
+)
+
+
+# 실험 기간
+VISIT_START, VISIT_DAYS = np.datetime64("2024-05-01"), 31
+
+# 기본 효과 (원본 샘플 결과와 비슷한 크기)
+EFFECTS = {
+    "treatment_share": 0.5,
+    "base_rate": 0.13,
+    "conversion_uplift": 0.049,
+    "segment_uplift": {
+        "age_group": {"20대": 0.019, "30대": 0.013, "40대": -0.007, "50대": -0.038, "60대 이상": -0.016},
+        "device": {"모바일": 0.008, "데스크톱": -0.015, "태블릿": -0.005},
+    },
+    "aov_mean": 80_400,
+    "aov_std": 39_000,
+    "aov_min": 10_000,
+    "aov_lift": 0.096,
+    "checkout_time_mean": 181,
+    "checkout_time_std": 59,
+    "checkout_time_min": 30,
+    "checkout_time_change": -0.33,
+    "payment_mix": {
+        "control": {"신용카드": 0.514, "카카오페이": 0.175, "네이버페이": 0.140,
+                    "토스페이": 0.082, "무통장입금": 0.056, "휴대폰결제": 0.033},
+        "treatment": {"신용카드": 0.361, "카카오페이": 0.254, "네이버페이": 0.199,
+                      "토스페이": 0.115, "무통장입금": 0.029, "휴대폰결제": 0.042},
+    },
+}
+
+# 세그먼트 차원 -> 범주 목록 (customer_attributes 코드 순서)
+SEGMENT_LEVELS = {"region": REGIONS, "age_group": AGE_GROUPS, "gender": GENDERS, "device": DEVICES}
+
+EFFECTS_FILE = "ab_test_effects.json"
+
+
+def load_effects(path=None):
+    """기본 효과에 JSON 파일의 값을 덮어써서 반환"""
+    effects = copy.deepcopy(EFFECTS)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            effects.update(json.load(f))
+    for dim, levels in effects["segment_uplift"].items():
+        unknown = set(levels) - set(SEGMENT_LEVELS.get(dim, {}))
+        if dim not in SEGMENT_LEVELS or unknown:
+            raise ValueError(f"알 수 없는 세그먼트: {dim} {sorted(unknown)}")
+    return effects
+
+
+def _uplift(attrs, effects):
+    """방문자별 treatment 전환율 상승폭 (기본 + 세그먼트 추가분)"""
+    uplift = np.full(attrs["region"].size, effects["conversion_uplift"])
+    for dim, levels in effects["segment_uplift"].items():
+        table = np.array([levels.get(level, 0.0) for level in SEGMENT_LEVELS[dim]])
+        uplift += table[attrs[dim]]
+    return uplift
+
+
+def visitor_block(seed, block, start, stop, effects, width=6):
+    """방문자 블록 하나의 ab_test_checkout_ui 프레임 (width: 고객 ID 자릿수, 파일 전체 공통)"""
+    size = stop - start
+    attrs = customer_attributes(seed, block, size)
+    rng = block_rng(seed, "ab_test", block)
+
+    treatment = rng.random(size) < effects["treatment_share"]
+    rate = effects["base_rate"] + np.where(treatment, _uplift(attrs, effects), 0.0)
+    converted = rng.random(size) < np.clip(rate, 0, 1)
+
+    aov_mean = effects["aov_mean"] * np.where(treatment, 1 + effects["aov_lift"], 1.0)
+    aov_std = effects["aov_std"] * np.where(treatment, 1 + effects["aov_lift"], 1.0)
+    order_value = np.maximum(np.rint(aov_mean + aov_std * rng.standard_normal(size)), effects["aov_min"])
+
+    time_scale = np.where(treatment, 1 + effects["checkout_time_change"], 1.0)
+    checkout = np.maximum(
+        np.rint((effects["checkout_time_mean"] + effects["checkout_time_std"] * rng.standard_normal(size))
+                * time_scale),
+        effects["checkout_time_min"],
+    )
+
+    # 결제수단은 그룹별 비율로 뽑고 미전환 행은 결측
+    methods = list(effects["payment_mix"]["control"])
+    codes = np.where(
+        treatment,
+        choice_codes(rng, {m: effects["payment_mix"]["treatment"][m] for m in methods}, size),
+        choice_codes(rng, effects["payment_mix"]["control"], size),
+    )
+    payment = pd.Categorical.from_codes(np.where(converted, codes, -1), categories=methods)
+
+    df = pd.DataFrame({"customer_id": format_ids("CUST_", np.arange(start + 1, stop + 1), width)})
+    for col, values in customer_frame(attrs).items():
+        df[col] = values
+    df["test_group"] = pd.Categorical.from_codes(treatment.astype(np.int8), categories=["control", "treatment"])
+    df["visit_date"] = pd.Categorical.from_codes(
+        rng.integers(0, VISIT_DAYS, size), categories=day_labels(VISIT_START, VISIT_DAYS)
+    )
+    df["converted"] = converted.astype(np.int8)
+    df["order_value"] = np.where(converted, order_value, 0).astype(np.int64)
+    df["checkout_time_sec"] = np.where(converted, checkout, np.nan)
+    df["payment_method"] = payment
+    return df
+
+
+def generate_ab_test(n_visitors, output_dir, fmt="csv", seed=DEFAULT_SEED, effects=None, verbose=True,
+                     n_customers=None):
+    """방문자 로그를 블록 단위로 생성하고 사용한 효과 설정을 함께 저장 -> 행 수
+
+    n_customers: 고객 파일(generate_customers)의 고객 수, ID 자릿수 기준 (None이면 n_visitors)
+    """
+    effects = effects or load_effects()
+    os.makedirs(output_dir, exist_ok=True)
+    start_time = time.perf_counter()
+    # 방문자 i = 고객 i이므로 자릿수는 블록마다가 아니라 전체 고객 수 기준 (generate_customers와 같게)
+    width = id_width(n_visitors if n_customers is None else n_customers, 6)
+    with ChunkWriter(output_path(output_dir, "ab_test_checkout_ui", fmt), fmt) as writer:
+        for block, start, stop in iter_blocks(n_visitors):
+            writer.write(visitor_block(seed, block, start, stop, effects, width))
+            if verbose and n_visitors > BLOCK_ROWS:
+                print(f"  ... 방문자 {stop:,}/{n_visitors:,}")
+    with open(os.path.join(output_dir, EFFECTS_FILE), "w", encoding="utf-8") as f:
+        json.dump(dict(effects, seed=seed, visitors=n_visitors), f, ensure_ascii=False, indent=2)
+    if verbose:
+        elapsed = time.perf_counter() - start_time
+        print(f"✅ ab_test_checkout_ui: {writer.rows:,}건 ({elapsed:.1f}초, {writer.rows / elapsed:,.0f}행/초)")
+        print(f"✅ 효과 설정 저장: {EFFECTS_FILE}")
+    return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A/B 테스트 방문자 로그 생성")
+    parser.add_argument("--output-dir", default="./", help="출력 폴더")
+    parser.add_argument("--visitors", type=int, default=DEFAULT_CUSTOMERS,
+                        help="방문자 수 (고객 수와 같게 두면 고객 i = 방문자 i)")
+    parser.add_argument("--customers", type=int, default=None,
+                        help="고객 파일의 고객 수 (고객 ID 자릿수 기준, 기본: 방문자 수)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="출력 형식")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="난수 시드 (기본 데이터와 같게)")
+    parser.add_argument("--effects", default=None, help="효과 설정 JSON 파일 (EFFECTS 키 덮어쓰기)")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("🧪 A/B 테스트 방문자 로그 생성")
+    print("=" * 60)
+    generate_ab_test(args.visitors, args.output_dir, args.format, args.seed, load_effects(args.effects),
+                     n_customers=args.customers)
+
+
+if __name__ == "__main__":
+    main()
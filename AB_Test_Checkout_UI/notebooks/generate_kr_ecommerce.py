@@ -0,0 +1,409 @@
+"""
+한국 이커머스 기본 데이터 생성기 - 청크 단위 벡터화 / 시드 고정
+=====================================
+
+kr_customers, kr_products, kr_orders, kr_order_items, kr_payments 5개 테이블을
+원본 샘플과 같은 스키마/분포로 생성합니다. 수백만~수억 행도 메모리 사용량이
+일정하도록 BLOCK_ROWS 행 단위 블록으로 만들어 바로 파일에 씁니다.
+
+- 모든 값은 NumPy 배열 연산으로 생성합니다 (행 단위 Python 반복문 없음).
+- 블록마다 (seed, 테이블, 블록 번호)로 난수 생성기를 만들기 때문에 같은
+  seed/행 수면 항상 같은 데이터가 나옵니다.
+- 출력 형식: CSV(utf-8-sig, 원본과 동일) 또는 Parquet(블록당 row group)
+  pyarrow가 있으면 CSV도 Arrow CSV writer로 기록합니다 (pandas to_csv보다
+  수 배 빠름).
+- 고객 속성(지역/연령대/성별/디바이스)은 customer_attributes()로 다시 계산할
+  수 있으므로, generate_ab_test.py는 고객 파일을 읽지 않고도 같은 속성의
+  방문자 로그를 만듭니다.
+
+사용법:
+    python generate_kr_ecommerce.py --output-dir ../data/raw/ --customers 1000000 --orders 2000000
+    python generate_kr_ecommerce.py --output-dir ../data/large/ --orders 100000000 --format parquet
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow는 선택 의존성
+    pa = None
+
+
+# 블록(청크) 크기 - 난수 시드 단위이기도 하므로 바꾸면 생성 결과가 달라짐
+BLOCK_ROWS = 1_000_000
+
+# 기본 규모 (원본 샘플과 동일)
+DEFAULT_CUSTOMERS = 20_000
+DEFAULT_ORDERS = 35_000
+DEFAULT_PRODUCTS = 500
+DEFAULT_SEED = 42
+
+# 테이블별 난수 스트림 구분 키
+STREAMS = {
+    "customers": 1, "products": 2, "orders": 3, "order_items": 4,
+    "payments": 5, "ab_test": 6,
+}
+
+# -----------------------------------------------------------------------------
+# 분포 (원본 샘플에서 관측한 비율)
+# -----------------------------------------------------------------------------
+REGIONS = {
+    "경기": 0.261, "서울": 0.193, "부산": 0.069, "경남": 0.061, "인천": 0.061,
+    "대구": 0.049, "경북": 0.046, "충남": 0.041, "광주": 0.031, "전북": 0.031,
+    "강원": 0.030, "전남": 0.029, "대전": 0.029, "충북": 0.028, "울산": 0.021,
+    "제주": 0.010, "세종": 0.009,
+}
+AGE_GROUPS = {"20대": 0.246, "30대": 0.305, "40대": 0.244, "50대": 0.154, "60대 이상": 0.050}
+GENDERS = {"남성": 0.445, "여성": 0.555}
+DEVICES = {"모바일": 0.653, "데스크톱": 0.297, "태블릿": 0.050}
+
+# 카테고리: (비중, 최저가, 최고가)
+CATEGORIES = {
+    "패션의류": (0.24, 16_000, 150_000),
+    "패션잡화": (0.16, 11_000, 99_000),
+    "뷰티": (0.14, 10_000, 79_000),
+    "생활용품": (0.12, 6_000, 48_000),
+    "전자제품": (0.10, 34_000, 497_000),
+    "식품": (0.10, 4_000, 30_000),
+    "스포츠": (0.08, 24_000, 191_000),
+    "도서": (0.06, 10_000, 29_000),
+}
+
+ORDER_STATUSES = {"배송완료": 0.846, "배송중": 0.071, "결제완료": 0.051, "취소": 0.031}
+PAYMENT_METHODS = {
+    "신용카드": 0.448, "카카오페이": 0.202, "네이버페이": 0.150,
+    "토스페이": 0.100, "무통장입금": 0.051, "휴대폰결제": 0.049,
+}
+ITEMS_PER_ORDER = {1: 0.553, 2: 0.251, 3: 0.117, 4: 0.049, 5: 0.030}
+QUANTITIES = {1: 0.799, 2: 0.151, 3: 0.050}
+
+SIGNUP_START, SIGNUP_DAYS = np.datetime64("2023-01-01"), 365
+ORDER_START, ORDER_DAYS = np.datetime64("2024-01-01"), 181
+
+# 무료배송 기준 / 배송비, 할인 (30% 주문에 5~15% 할인, 100원 단위)
+FREE_SHIPPING_MIN = 50_000
+SHIPPING_FEE = 3_000
+DISCOUNT_PROB = 0.30
+DISCOUNT_RATES = np.array([0.05, 0.075, 0.10, 0.125, 0.15])
+
+# 주문 고객 쏠림 정도 (클수록 소수 고객에 주문 집중)
+CUSTOMER_SKEW = 3.0
+
+
+# =============================================================================
+# 공통 유틸
+# =============================================================================
+def block_rng(seed, stream, block, sub=0):
+    """(seed, 테이블, 블록 번호[, 컬럼])별 독립 난수 생성기"""
+    return np.random.default_rng([seed, STREAMS[stream], block, sub])
+
+
+def iter_blocks(n_rows, block_rows=BLOCK_ROWS):
+    """(블록 번호, 시작 행, 끝 행) 이터레이터"""
+    for block, start in enumerate(range(0, n_rows, block_rows)):
+        yield block, start, min(start + block_rows, n_rows)
+
+
+def choice_codes(rng, probs, size):
+    """비율 딕셔너리 -> 범주 코드 배열 (누적확률 + searchsorted)"""
+    p = np.asarray(list(probs.values()), dtype=float)
+    cdf = np.cumsum(p / p.sum())
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), len(p) - 1)
+
+
+def categorical(codes, probs):
+    """범주 코드 -> pandas Categorical (CSV/Parquet 모두 라벨로 기록)"""
+    return pd.Categorical.from_codes(codes, categories=list(probs))
+
+
+def id_width(n, minimum):
+    """ID 숫자 자릿수 (원본 자릿수 이상, 행 수에 맞춰 늘어남)"""
+    return max(minimum, len(str(n)))
+
+
+def format_ids(prefix, numbers, width):
+    """정수 배열 -> 'CUST_000001' 형식 문자열 Series
+
+    문자열 연산 대신 고정폭 ASCII 바이트 행렬에 자릿수를 채워 만듭니다.
+    """
+    numbers = np.asarray(numbers, dtype=np.int64)
+    k = len(prefix)
+    chars = np.empty((numbers.size, k + width), dtype=np.uint8)
+    chars[:, :k] = np.frombuffer(prefix.encode("ascii"), dtype=np.uint8)
+    rest = numbers.copy()
+    for j in range(width - 1, -1, -1):
+        chars[:, k + j] = rest % 10 + ord("0")
+        rest //= 10
+    fixed = chars.view(f"S{k + width}").ravel()
+    if pa is not None:
+        strings = pa.array(fixed, type=pa.binary(k + width)).cast(pa.string())
+        return pd.Series(pd.arrays.ArrowStringArray(strings))
+    return pd.Series(fixed.astype(f"U{k + width}"))
+
+
+def day_labels(start, days):
+    """날짜 범위 -> 'YYYY-MM-DD' 라벨 목록"""
+    return [str(d) for d in start + np.arange(days)]
+
+
+class ChunkWriter:
+    """블록 단위로 CSV(utf-8-sig) 또는 Parquet 파일에 이어 쓰기"""
+
+    def __init__(self, path, fmt="csv"):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        if fmt == "csv":
+            # 원본과 같이 BOM으로 시작하는 UTF-8
+            self._file = open(path, "wb")
+            self._file.write("\ufeff".encode("utf-8"))
+        elif fmt == "parquet":
+            if pa is None:
+                raise ImportError("Parquet 출력에는 pyarrow가 필요합니다")
+        else:
+            raise ValueError(f"지원하지 않는 출력 형식: {fmt}")
+
+    def write(self, df):
+        if self.fmt == "csv":
+            if self.rows == 0:
+                self._file.write((",".join(df.columns) + "\n").encode("utf-8"))
+            if pa is not None:
+                # 값에 쉼표/따옴표가 없으므로 따옴표 없이 기록 (결측은 빈 칸)
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                table = pa.table(
+                    [c.cast(c.type.value_type) if pa.types.is_dictionary(c.type) else c
+                     for c in table.columns],
+                    names=table.column_names,
+                )
+                pa_csv.write_csv(table, self._file, pa_csv.WriteOptions(
+                    include_header=False, quoting_style="none"))
+            else:
+                self._file.write(df.to_csv(header=False, index=False).encode("utf-8"))
+        else:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def output_path(output_dir, name, fmt):
+    return os.path.join(output_dir, f"{name}.{'csv' if fmt == 'csv' else 'parquet'}")
+
+
+# =============================================================================
+# 고객
+# =============================================================================
+def customer_attributes(seed, block, size):
+    """고객 블록의 속성 코드 (지역, 연령대, 성별, 디바이스, 가입일 오프셋)
+
+    generate_ab_test.py에서도 같은 함수로 방문자 속성을 다시 만듭니다.
+    컬럼마다 별도 난수 스트림을 쓰므로 마지막 블록처럼 size가 작아도 앞쪽
+    행의 속성은 같습니다 (고객 수와 방문자 수가 달라도 고객 i의 속성 일치).
+    """
+    return {
+        "region": choice_codes(block_rng(seed, "customers", block, 1), REGIONS, size),
+        "age_group": choice_codes(block_rng(seed, "customers", block, 2), AGE_GROUPS, size),
+        "gender": choice_codes(block_rng(seed, "customers", block, 3), GENDERS, size),
+        "device": choice_codes(block_rng(seed, "customers", block, 4), DEVICES, size),
+        "signup_day": block_rng(seed, "customers", block, 5).integers(0, SIGNUP_DAYS, size),
+    }
+
+
+def customer_frame(attrs):
+    """속성 코드 -> 라벨 컬럼 딕셔너리 (customer_id 제외)"""
+    return {
+        "region": categorical(attrs["region"], REGIONS),
+        "age_group": categorical(attrs["age_group"], AGE_GROUPS),
+        "gender": categorical(attrs["gender"], GENDERS),
+        "device": categorical(attrs["device"], DEVICES),
+    }
+
+
+def generate_customers(n_customers, output_dir, fmt="csv", seed=DEFAULT_SEED):
+    width = id_width(n_customers, 6)
+    signup_labels = day_labels(SIGNUP_START, SIGNUP_DAYS)
+    with ChunkWriter(output_path(output_dir, "kr_customers", fmt), fmt) as writer:
+        for block, start, stop in iter_blocks(n_customers):
+            attrs = customer_attributes(seed, block, stop - start)
+            df = pd.DataFrame({"customer_id": format_ids("CUST_", np.arange(start + 1, stop + 1), width)})
+            for col, values in customer_frame(attrs).items():
+                df[col] = values
+            df["signup_date"] = pd.Categorical.from_codes(attrs["signup_day"], categories=signup_labels)
+            writer.write(df)
+    return writer.rows
+
+
+# =============================================================================
+# 상품
+# =============================================================================
+def product_table(n_products, seed=DEFAULT_SEED):
+    """상품 테이블 (카테고리별 가격 범위, 1000원 단위) - 주문상품 생성에도 사용"""
+    rng = block_rng(seed, "products", 0)
+    names = list(CATEGORIES)
+    # 원본처럼 카테고리 순서로 정렬된 상품 ID
+    category = np.sort(choice_codes(rng, {k: v[0] for k, v in CATEGORIES.items()}, n_products))
+    low = np.array([CATEGORIES[k][1] for k in names])[category]
+    high = np.array([CATEGORIES[k][2] for k in names])[category]
+    price = rng.integers(low // 1000, high // 1000 + 1) * 1000
+    return pd.DataFrame({
+        "product_id": format_ids("PROD_", np.arange(1, n_products + 1), id_width(n_products, 5)),
+        "category": pd.Categorical.from_codes(category, categories=names),
+        "price": price.astype(np.int64),
+    })
+
+
+def generate_products(n_products, output_dir, fmt="csv", seed=DEFAULT_SEED):
+    products = product_table(n_products, seed)
+    with ChunkWriter(output_path(output_dir, "kr_products", fmt), fmt) as writer:
+        writer.write(products)
+    return products
+
+
+# =============================================================================
+# 주문 / 주문상품 / 결제 (같은 블록에서 함께 생성)
+# =============================================================================
+def _coprime_multiplier(n):
+    """고객 순위 -> 고객 번호를 섞는 곱셈 상수 (n과 서로소)"""
+    a = 2_654_435_761 % max(n, 2) or 1
+    while np.gcd(a, n) != 1:
+        a += 1
+    return a
+
+
+def order_block(seed, block, start, stop, n_customers, products, order_width=7):
+    """주문 블록 하나의 (주문, 주문상품, 결제) 프레임 (order_width: 주문 ID 자릿수, 파일 전체 공통)"""
+    size = stop - start
+    rng = block_rng(seed, "orders", block)
+
+    # 주문 고객: 순위 기반 쏠림 분포를 고객 번호 전체에 고르게 섞음
+    rank = np.floor(n_customers * rng.random(size) ** CUSTOMER_SKEW).astype(np.int64)
+    customer = (rank * _coprime_multiplier(n_customers) + 7) % n_customers + 1
+    day = rng.integers(0, ORDER_DAYS, size)
+    minute = rng.integers(0, 24 * 60, size)
+    order_datetime = (ORDER_START + day).astype("datetime64[m]") + minute
+    order_ids = format_ids("ORD_", np.arange(start + 1, stop + 1), order_width)
+    orders = pd.DataFrame({
+        "order_id": order_ids,
+        "customer_id": format_ids("CUST_", customer, id_width(n_customers, 6)),
+        "order_datetime": order_datetime.astype("datetime64[s]"),
+        "order_date": pd.Categorical.from_codes(day, categories=day_labels(ORDER_START, ORDER_DAYS)),
+        "order_status": categorical(choice_codes(rng, ORDER_STATUSES, size), ORDER_STATUSES),
+    })
+
+    # 주문상품: 주문별 상품 수만큼 행을 펼침
+    rng = block_rng(seed, "order_items", block)
+    n_items = np.array(list(ITEMS_PER_ORDER))[choice_codes(rng, ITEMS_PER_ORDER, size)]
+    owner = np.repeat(np.arange(size), n_items)
+    first = np.cumsum(n_items) - n_items
+    item_seq = np.arange(owner.size) - first[owner] + 1
+    product = rng.integers(0, len(products), owner.size)
+    quantity = np.array(list(QUANTITIES))[choice_codes(rng, QUANTITIES, owner.size)]
+    unit_price = products["price"].to_numpy()[product]
+    total_price = unit_price * quantity
+    items = pd.DataFrame({
+        "order_id": order_ids.to_numpy()[owner],
+        "item_seq": item_seq,
+        "product_id": products["product_id"].to_numpy()[product],
+        "quantity": quantity,
+        "unit_price": unit_price,
+        "total_price": total_price,
+    })
+
+    # 결제: 주문상품 합계 + 배송비 - 할인
+    rng = block_rng(seed, "payments", block)
+    subtotal = np.bincount(owner, weights=total_price, minlength=size).astype(np.int64)
+    shipping = np.where(subtotal < FREE_SHIPPING_MIN, SHIPPING_FEE, 0)
+    rate = DISCOUNT_RATES[rng.integers(0, DISCOUNT_RATES.size, size)]
+    discount = np.where(rng.random(size) < DISCOUNT_PROB, np.round(subtotal * rate / 100) * 100, 0.0)
+    payments = pd.DataFrame({
+        "order_id": order_ids,
+        "payment_method": categorical(choice_codes(rng, PAYMENT_METHODS, size), PAYMENT_METHODS),
+        "subtotal": subtotal,
+        "shipping_fee": shipping,
+        "discount": discount,
+        "total_amount": (subtotal + shipping - discount).astype(float),
+    })
+    return orders, items, payments
+
+
+def generate_orders(n_orders, n_customers, products, output_dir, fmt="csv", seed=DEFAULT_SEED,
+                    verbose=True):
+    """주문/주문상품/결제 3개 파일을 블록 단위로 생성 -> 테이블별 행 수"""
+    paths = {name: output_path(output_dir, name, fmt) for name in ["kr_orders", "kr_order_items", "kr_payments"]}
+    with ChunkWriter(paths["kr_orders"], fmt) as w_orders, \
+            ChunkWriter(paths["kr_order_items"], fmt) as w_items, \
+            ChunkWriter(paths["kr_payments"], fmt) as w_payments:
+        # 자릿수는 전체 주문 수 기준으로 한 번만 정해 모든 블록에 같은 폭을 사용
+        order_width = id_width(n_orders, 7)
+        for block, start, stop in iter_blocks(n_orders):
+            orders, items, payments = order_block(seed, block, start, stop, n_customers, products,
+                                                  order_width)
+            w_orders.write(orders)
+            w_items.write(items)
+            w_payments.write(payments)
+            if verbose and n_orders > BLOCK_ROWS:
+                print(f"  ... 주문 {stop:,}/{n_orders:,}")
+    return {"kr_orders": w_orders.rows, "kr_order_items": w_items.rows, "kr_payments": w_payments.rows}
+
+
+# =============================================================================
+# 실행
+# =============================================================================
+def generate_all(output_dir, n_customers=DEFAULT_CUSTOMERS, n_orders=DEFAULT_ORDERS,
+                 n_products=DEFAULT_PRODUCTS, fmt="csv", seed=DEFAULT_SEED, verbose=True):
+    """기본 테이블 5종 생성 -> {테이블명: 행 수}"""
+    os.makedirs(output_dir, exist_ok=True)
+    rows = {}
+    start = time.perf_counter()
+    rows["kr_customers"] = generate_customers(n_customers, output_dir, fmt, seed)
+    products = generate_products(n_products, output_dir, fmt, seed)
+    rows["kr_products"] = len(products)
+    rows.update(generate_orders(n_orders, n_customers, products, output_dir, fmt, seed, verbose))
+    if verbose:
+        elapsed = time.perf_counter() - start
+        for name, n in rows.items():
+            print(f"✅ {name}: {n:,}건")
+        print(f"⏱️ {elapsed:.1f}초 ({sum(rows.values()) / elapsed:,.0f}행/초)")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="한국 이커머스 기본 데이터 생성")
+    parser.add_argument("--output-dir", default="./", help="출력 폴더")
+    parser.add_argument("--customers", type=int, default=DEFAULT_CUSTOMERS, help="고객 수")
+    parser.add_argument("--orders", type=int, default=DEFAULT_ORDERS, help="주문 수")
+    parser.add_argument("--products", type=int, default=DEFAULT_PRODUCTS, help="상품 수")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="출력 형식")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="난수 시드")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("🏭 한국 이커머스 기본 데이터 생성")
+    print("=" * 60)
+    generate_all(args.output_dir, args.customers, args.orders, args.products, args.format, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+단계별 계측 - 소요 시간 / CPU 시간 / 메모리 할당 / 행 수 / 캐시 적중
+=====================================
+
+파이프라인 단계를 `stage()` 블록으로 감싸면 단계마다 아래 값을 기록합니다.
+
+  wall_sec / cpu_sec : 경과 시간 / 프로세스 CPU 시간
+  alloc_peak_bytes   : 단계 중 tracemalloc 최대 할당량 (시작 시점 대비)
+  alloc_net_bytes    : 단계가 끝난 뒤 남은 할당량 (시작 시점 대비)
+                       (Python/NumPy 할당만 집계, Arrow 메모리 풀은 제외)
+  rows_in / rows_out : 단계 입력/출력 행 수 (단계에서 지정)
+  counters           : cache_hits / cache_misses 등 count()로 올린 값
+
+기록은 JSON Lines(한 단계 = 한 줄, 실행마다 이어 쓰기)와 Chrome trace 형식
+(chrome://tracing, https://ui.perfetto.dev 에서 열면 단계가 중첩된 막대로 표시)
+으로 저장합니다. profile로 단계 이름을 주면 그 단계만 cProfile로 프로파일해
+`profile_<단계>.prof`로 저장하고 상위 함수를 출력합니다.
+
+활성 Tracer가 없으면 stage()/count()는 아무것도 하지 않으므로, 다른 모듈은
+조건 없이 호출해도 됩니다.
+
+사용법:
+    from instrumentation import Tracer, stage, count
+
+    tracer = Tracer(metrics_path="metrics.jsonl", trace_path="trace.json", profile="test")
+    with tracer:
+        with stage("load") as span:
+            df = load_table(...)
+            span.rows_out = len(df)
+    tracer.write()
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# 프로파일 출력 함수 수
+PROFILE_TOP = 25
+
+# 현재 활성 Tracer (스레드별)
+_local = threading.local()
+
+
+class Span:
+    """단계 하나의 측정값 (rows_out 등은 블록 안에서 지정)"""
+
+    def __init__(self, name, depth, rows_in=None):
+        self.name = name
+        self.depth = depth
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.counters = {}
+        self.start_ts = None
+        self.wall_sec = None
+        self.cpu_sec = None
+        self.alloc_peak_bytes = None
+        self.alloc_net_bytes = None
+        self._alloc_start = None
+        self._alloc_max = None
+
+    def count(self, key, n=1):
+        self.counters[key] = self.counters.get(key, 0) + n
+
+    def to_dict(self):
+        return {
+            "stage": self.name,
+            "depth": self.depth,
+            "wall_sec": round(self.wall_sec, 6),
+            "cpu_sec": round(self.cpu_sec, 6),
+            "alloc_peak_bytes": self.alloc_peak_bytes,
+            "alloc_net_bytes": self.alloc_net_bytes,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            **self.counters,
+        }
+
+
+class Tracer:
+    """단계별 측정값 수집기
+
+    metrics_path: JSON Lines 파일 (이어 쓰기, 실행 ID/시각 포함)
+    trace_path: Chrome trace 이벤트 JSON 파일
+    profile: cProfile로 프로파일할 단계 이름 (profile_dir에 .prof 저장)
+    memory: tracemalloc으로 할당량 측정 (할당이 많은 단계는 느려짐)
+    """
+
+    def __init__(self, metrics_path=None, trace_path=None, profile=None, profile_dir=".",
+                 memory=True, verbose=True):
+        self.metrics_path = metrics_path
+        self.trace_path = trace_path
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.memory = memory
+        self.verbose = verbose
+        self.run_id = uuid.uuid4().hex[:12]
+        self.spans = []
+        self._stack = []
+        self._origin = None
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        self._previous = getattr(_local, "tracer", None)
+        _local.tracer = self
+        self._origin = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def __exit__(self, *exc):
+        _local.tracer = self._previous
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        return False
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        span = Span(name, len(self._stack), rows_in)
+        parent = self._stack[-1] if self._stack else None
+        self._stack.append(span)
+        profiler = cProfile.Profile() if name == self.profile else None
+        if self.memory and tracemalloc.is_tracing():
+            # 하위 단계가 최대값을 초기화하기 전에 상위 단계의 최대값을 보존
+            if parent is not None and parent._alloc_max is not None:
+                parent._alloc_max = max(parent._alloc_max, tracemalloc.get_traced_memory()[1])
+            span._alloc_start = span._alloc_max = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        span.start_ts = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield span
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            span.cpu_sec = time.process_time() - cpu_start
+            span.wall_sec = time.perf_counter() - span.start_ts
+            if span._alloc_start is not None:
+                current, peak = tracemalloc.get_traced_memory()
+                span._alloc_max = max(span._alloc_max, peak)
+                span.alloc_peak_bytes = span._alloc_max - span._alloc_start
+                span.alloc_net_bytes = current - span._alloc_start
+                if parent is not None and parent._alloc_max is not None:
+                    parent._alloc_max = max(parent._alloc_max, span._alloc_max)
+            self._stack.pop()
+            self.spans.append(span)
+            if profiler is not None:
+                self._dump_profile(name, profiler)
+
+    def count(self, key, n=1):
+        """열린 모든 단계의 카운터 증가 (상위 단계에도 합산)"""
+        for span in self._stack:
+            span.count(key, n)
+
+    def _dump_profile(self, name, profiler):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"profile_{name.replace('/', '_')}.prof")
+        profiler.dump_stats(path)
+        if self.verbose:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            print(f"\n🔬 '{name}' 단계 프로파일 (상위 {PROFILE_TOP}개, 누적 시간순)")
+            print(out.getvalue())
+            print(f"✅ 프로파일 저장: {path}")
+
+    # -------------------------------------------------------------------------
+    # 출력
+    # -------------------------------------------------------------------------
+    def records(self):
+        """시작 순서대로 정렬한 단계별 기록 목록"""
+        return [span.to_dict() for span in sorted(self.spans, key=lambda s: s.start_ts)]
+
+    def trace_events(self):
+        """Chrome trace 이벤트 (완료 이벤트 'X', 마이크로초 단위)"""
+        pid = os.getpid()
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start_ts):
+            record = span.to_dict()
+            events.append({
+                "name": span.name,
+                "cat": "stage",
+                "ph": "X",
+                "ts": round((span.start_ts - self._origin) * 1e6, 1),
+                "dur": round(span.wall_sec * 1e6, 1),
+                "pid": pid,
+                "tid": 0,
+                "args": {k: v for k, v in record.items() if k not in ("stage", "depth")},
+            })
+        return events
+
+    def write(self):
+        """metrics_path / trace_path에 기록 저장 -> 저장한 경로 목록"""
+        paths = []
+        if self.metrics_path:
+            now = datetime.now().isoformat(timespec="seconds")
+            _makedirs_for(self.metrics_path)
+            with open(self.metrics_path, "a", encoding="utf-8") as f:
+                for record in self.records():
+                    f.write(json.dumps(dict(run_id=self.run_id, timestamp=now, **record),
+                                       ensure_ascii=False) + "\n")
+            paths.append(self.metrics_path)
+        if self.trace_path:
+            _makedirs_for(self.trace_path)
+            with open(self.trace_path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms",
+                           "otherData": {"run_id": self.run_id}}, f, ensure_ascii=False)
+            paths.append(self.trace_path)
+        if self.verbose:
+            for path in paths:
+                print(f"✅ 계측 기록 저장: {path}")
+        return paths
+
+    def print_table(self):
+        """단계별 측정값 표 출력"""
+        print(f"\n{'단계':<24} {'경과(초)':>9} {'CPU(초)':>9} {'최대할당(MB)':>12} {'입력행':>12} {'출력행':>12}")
+        for record in self.records():
+            name = "  " * record["depth"] + record["stage"]
+            peak = record["alloc_peak_bytes"]
+            print(f"{name:<24} {record['wall_sec']:>9.3f} {record['cpu_sec']:>9.3f} "
+                  f"{'-' if peak is None else f'{peak / 2**20:,.1f}':>12} "
+                  f"{_fmt_rows(record['rows_in']):>12} {_fmt_rows(record['rows_out']):>12}")
+
+
+def _fmt_rows(rows):
+    return "-" if rows is None else f"{rows:,}"
+
+
+def _makedirs_for(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+# =============================================================================
+# 모듈 함수 (활성 Tracer가 없으면 아무것도 하지 않음)
+# =============================================================================
+def active_tracer():
+    """현재 스레드의 활성 Tracer (없으면 None)"""
+    return getattr(_local, "tracer", None)
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """활성 Tracer의 단계 블록 (없으면 값만 담는 빈 Span)"""
+    tracer = active_tracer()
+    if tracer is None:
+        yield Span(name, 0, rows_in)
+        return
+    with tracer.stage(name, rows_in) as span:
+        yield span
+
+
+def count(key, n=1):
+    """열린 단계의 카운터 증가 (cache_hits, cache_misses 등)"""
+    tracer = active_tracer()
+    if tracer is not None:
+        tracer.count(key, n)
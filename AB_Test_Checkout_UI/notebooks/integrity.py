@@ -0,0 +1,394 @@
+"""
+실험 무결성 검증 - SRM / 중복·교차 배정 / 고객 속성 일치 / 전환-주문 일치
+=====================================
+
+리포트를 내기 전에 실험 데이터 자체가 믿을 만한지 확인합니다.
+
+  SRM (Sample Ratio Mismatch)
+      전체와 방문일/디바이스/연령대/지역 셀마다 그룹 비율이 설계 비율(기본: 그룹 k개에
+      1/k씩)과 다른지 Chi-square 적합도 검정 (큐브에서 계산, 셀별 검정은 Holm 보정)
+  중복 / 교차 배정
+      같은 customer_id가 여러 번 나오거나 두 개 이상 그룹에 배정됐는지
+      (ID를 정수 키로 바꿔 키별 그룹 건수를 누적, 형식이 다르면 64비트 해시 키)
+  고객 속성 일치
+      방문자 로그의 지역/연령대/성별/디바이스가 kr_customers와 같은지
+      (정수 키 인덱스 조인 + 고정 코드표 코드 비교)
+  전환-주문 일치
+      converted 플래그와 방문일 ~ 방문일+ATTRIBUTION_DAYS일의 (취소 제외) 주문
+      존재 여부가 일치하는지
+
+그룹 목록은 고정하지 않고 큐브(multiarm.cube_arms) 또는 스캔한 청크의 라벨에서
+정하므로 control / treatment 외의 그룹(variant_b 등)도 정상 그룹으로 봅니다.
+그룹 라벨 이상은 라벨이 비어 있는 행(또는 arms로 지정한 목록 밖의 라벨)입니다.
+
+행 단위 검사는 IntegrityScanner가 청크를 한 번씩만 보며 누적하므로, 스트리밍
+집계와 같은 스캔에서 함께 수행할 수 있습니다 (observe로 청크를 통과시킴).
+검사 결과는 pass / warn / fail로 판정하며 fail이 하나라도 있으면 통과하지
+못한 것으로 봅니다.
+
+사용법:
+    from integrity import IntegrityScanner, run_integrity
+
+    scanner = IntegrityScanner(customers, orders)
+    cube = accumulate_chunks(scanner.observe(chunks))     # 한 번의 스캔
+    result = run_integrity(cube, scan=scanner.result())
+    print(result["report"])
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from cuped import EXCLUDED_STATUSES, KeyIndex
+from multiarm import CONTROL, arm_order, cube_arms
+from schema import CODE_TABLES, parse_int_key
+from significance import adjust_pvalues
+
+
+# SRM 판정 유의수준 (분석용 0.05보다 엄격하게)
+SRM_ALPHA = 0.001
+
+# 설계상 그룹별 배정 비율 ({그룹: 비율}, None이면 그룹 k개에 1/k씩)
+EXPECTED_SHARES = None
+
+# 셀별 SRM 검정 차원
+SRM_DIMENSIONS = [["visit_date"], ["device"], ["age_group"], ["region"]]
+
+# 고객 테이블과 비교할 속성
+ATTRIBUTE_COLUMNS = ["region", "age_group", "gender", "device"]
+
+# 전환으로 인정할 주문 기간 (방문일부터 N일 후까지)
+ATTRIBUTION_DAYS = 0
+
+# 전환-주문 불일치 비율이 이 값을 넘으면 경고
+CONVERSION_MISMATCH_WARN = 0.01
+
+# (고객, 일자) 쌍을 정수 하나로 묶을 때 일자 자리 크기
+_DAY_SLOTS = 1 << 20
+
+# 조밀 키 누적 배열의 최대 크기 (넘으면 키 목록 + 정렬 방식)
+_DENSE_KEY_LIMIT = 1 << 31
+
+STATUS_MARKS = {"pass": "✅", "warn": "⚠️", "fail": "❌"}
+
+
+# =============================================================================
+# SRM
+# =============================================================================
+def expected_shares(arms, shares=EXPECTED_SHARES):
+    """그룹 목록 -> 설계 배정 비율 배열 (shares가 None이면 1/k, 아니면 합이 1이 되도록 정규화)"""
+    if shares is None:
+        return np.full(len(arms), 1 / len(arms))
+    missing = [arm for arm in arms if arm not in shares]
+    if missing:
+        raise ValueError(f"배정 비율이 지정되지 않은 그룹: {missing}")
+    weights = np.array([shares[arm] for arm in arms], dtype=float)
+    return weights / weights.sum()
+
+
+def srm_chi2(counts, shares):
+    """그룹 비율 적합도 Chi-square ((셀 수, 그룹 수) 건수 배열) -> (chi2, p-value), 자유도 k-1"""
+    counts = np.atleast_2d(np.asarray(counts, dtype=float))
+    total = counts.sum(axis=1, keepdims=True)
+    expected = total * np.asarray(shares, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chi2 = ((counts - expected) ** 2 / expected).sum(axis=1)
+    chi2 = np.where(total[:, 0] > 0, chi2, 0.0)
+    return chi2, stats.chi2.sf(chi2, counts.shape[1] - 1)
+
+
+def srm_checks(cube, dimensions=SRM_DIMENSIONS, shares=EXPECTED_SHARES, alpha=SRM_ALPHA,
+               control=CONTROL, arms=None):
+    """전체 + 차원별 셀 SRM 검정 -> DataFrame (dimension, segment, 그룹별 건수/비율, chi2, p-value, srm)
+
+    arms를 주지 않으면 큐브에 있는 그룹 전체(기준 그룹이 맨 앞)를 사용합니다.
+    그룹별 건수는 n_<그룹>, 비율은 share_<그룹> 컬럼입니다.
+    """
+    arms = cube_arms(cube, control) if arms is None else list(arms)
+    probs = expected_shares(arms, shares)
+    frames = []
+    for dims in [[]] + [list(d) for d in dimensions]:
+        counts = cube.rollup(dims + ["test_group"])["n"]
+        counts = counts.unstack("test_group", fill_value=0) if dims else counts.to_frame().T
+        if dims:
+            segment = counts.index.to_frame(index=False).astype(str).agg(" / ".join, axis=1).to_numpy()
+        else:
+            segment = np.array(["전체"])
+        counts = counts.reindex(columns=arms, fill_value=0).to_numpy(dtype=float)
+        chi2, p = srm_chi2(counts, probs)
+        frame = pd.DataFrame({"dimension": " × ".join(dims) or "overall", "segment": segment})
+        total = np.maximum(counts.sum(axis=1), 1)
+        for k, arm in enumerate(arms):
+            frame[f"n_{arm}"] = counts[:, k].astype(np.int64)
+        for k, arm in enumerate(arms):
+            frame[f"share_{arm}"] = counts[:, k] / total
+        frame["chi2"] = chi2
+        frame["p_value"] = p
+        frame["p_adjusted"] = adjust_pvalues(p, "holm") if dims else p
+        frames.append(frame)
+    result = pd.concat(frames, ignore_index=True)
+    result["srm"] = result["p_adjusted"] < alpha
+    return result
+
+
+def srm_arms(srm):
+    """SRM 결과의 그룹 목록 (n_<그룹> 컬럼 순서)"""
+    return [col[2:] for col in srm.columns if col.startswith("n_")]
+
+
+# =============================================================================
+# 행 단위 검사 (청크 누적)
+# =============================================================================
+def integer_keys(values, prefix="CUST_"):
+    """ID -> (정수 키, 해시 여부)
+
+    'CUST_000001' 형식이면 숫자 부분, 이미 정수면 그대로, 그 밖의 형식은
+    64비트 해시를 키로 사용합니다.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.to_numpy(dtype=np.int64), False
+    if values.str.startswith(prefix).all():
+        try:
+            return parse_int_key(values, prefix), False
+        except (ValueError, TypeError):
+            pass
+    hashed = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+    return hashed.view(np.int64), True
+
+
+def _day_numbers(values):
+    """날짜 -> 1970-01-01 기준 일수 (정수)"""
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+class IntegrityScanner:
+    """방문자 로그 청크를 한 번씩만 보며 중복/교차 배정, 속성 일치, 전환-주문 일치 누적
+
+    customers / orders가 없으면 해당 검사는 건너뜁니다.
+    arms를 주면 그 목록 밖의 라벨을 그룹 라벨 이상으로 세고, 주지 않으면 청크에서
+    처음 보는 라벨을 그룹으로 추가합니다 (라벨이 비어 있는 행만 이상).
+    """
+
+    def __init__(self, customers=None, orders=None, attribution_days=ATTRIBUTION_DAYS,
+                 arms=None, control=CONTROL):
+        self.fixed_arms = arms is not None
+        self.groups = list(arms) if arms is not None else []
+        self.control = control
+        self.attribution_days = attribution_days
+        self.rows = 0
+        self.unknown_group_rows = 0
+        self.hashed = False
+        # 조밀 키: 그룹별 키 건수 배열 (255에서 포화), 해시 키: 그룹별 키 목록
+        self.arm_counts = [np.zeros(0, dtype=np.uint8) for _ in self.groups]
+        self.arm_keys = [[] for _ in self.groups]
+
+        self.customer_index = None
+        if customers is not None:
+            keys, _ = integer_keys(customers["customer_id"])
+            self.customer_index = KeyIndex(keys)
+            self.customer_codes = {}
+            for col in ATTRIBUTE_COLUMNS:
+                if col in customers:
+                    values = customers[col]
+                    categories = (list(values.cat.categories) if isinstance(values.dtype, pd.CategoricalDtype)
+                                  else CODE_TABLES[col])
+                    codes = pd.Categorical(values, categories=categories).codes
+                    self.customer_codes[col] = (categories, np.asarray(codes))
+            self.attribute_mismatch = dict.fromkeys(self.customer_codes, 0)
+            self.unknown_customers = 0
+
+        self.order_pairs = None
+        if orders is not None:
+            valid = ~orders["order_status"].isin(EXCLUDED_STATUSES).to_numpy() \
+                if "order_status" in orders else np.ones(len(orders), dtype=bool)
+            keys, _ = integer_keys(orders["customer_id"][valid])
+            self.order_customers = np.unique(keys)
+            self.order_customer_index = KeyIndex(self.order_customers)
+            customer_pos = np.searchsorted(self.order_customers, keys)
+            days = _day_numbers(orders["order_date"][valid])
+            self.order_pairs = np.sort(customer_pos * _DAY_SLOTS + days)
+            # [전환 여부, 주문 여부] 2×2 건수
+            self.conversion = np.zeros((2, 2), dtype=np.int64)
+
+    # -------------------------------------------------------------------------
+    def observe(self, chunks):
+        """청크를 누적하면서 그대로 다시 내보냄 (다른 집계와 같은 스캔에서 사용)"""
+        for chunk in chunks:
+            self.update(chunk)
+            yield chunk
+
+    def update(self, chunk):
+        """청크 하나 누적"""
+        self.rows += len(chunk)
+        keys, hashed = integer_keys(chunk["customer_id"])
+        labels = chunk["test_group"]
+        if not self.fixed_arms:
+            for label in pd.unique(labels.dropna().astype(str)):
+                if label not in self.groups:
+                    self._add_arm(label)
+        arm = np.asarray(pd.Categorical(labels, categories=self.groups).codes)
+        self.unknown_group_rows += int((arm < 0).sum())
+        self._count_assignments(keys, arm, hashed)
+
+        if self.customer_index is not None:
+            pos = self.customer_index.lookup(keys)
+            found = pos >= 0
+            self.unknown_customers += int((~found).sum())
+            for col, (categories, codes) in self.customer_codes.items():
+                visitor_codes = np.asarray(pd.Categorical(chunk[col], categories=categories).codes)
+                self.attribute_mismatch[col] += int((visitor_codes[found] != codes[pos[found]]).sum())
+
+        if self.order_pairs is not None:
+            customer_pos = self.order_customer_index.lookup(keys)
+            days = _day_numbers(chunk["visit_date"])
+            base = np.maximum(customer_pos, 0) * _DAY_SLOTS + days
+            lo = np.searchsorted(self.order_pairs, base, side="left")
+            hi = np.searchsorted(self.order_pairs, base + self.attribution_days, side="right")
+            has_order = (customer_pos >= 0) & (hi > lo)
+            converted = chunk["converted"].to_numpy() == 1
+            np.add.at(self.conversion, (converted.astype(np.int64), has_order.astype(np.int64)), 1)
+
+    def _add_arm(self, label):
+        self.groups.append(label)
+        self.arm_counts.append(np.zeros(0, dtype=np.uint8))
+        self.arm_keys.append([])
+
+    def _count_assignments(self, keys, arm, hashed):
+        if hashed and not self.hashed:
+            self._to_key_lists()
+        if not self.hashed and keys.size and (keys.min() < 0 or keys.max() >= _DENSE_KEY_LIMIT):
+            self._to_key_lists()
+        for i in range(len(self.groups)):
+            arm_keys = keys[arm == i]
+            if self.hashed:
+                self.arm_keys[i].append(arm_keys)
+                continue
+            if not arm_keys.size:
+                continue
+            unique, counts = np.unique(arm_keys, return_counts=True)
+            if unique[-1] >= self.arm_counts[i].size:
+                grown = np.zeros(max(int(unique[-1]) + 1, 2 * self.arm_counts[i].size), dtype=np.uint8)
+                grown[:self.arm_counts[i].size] = self.arm_counts[i]
+                self.arm_counts[i] = grown
+            self.arm_counts[i][unique] = np.minimum(self.arm_counts[i][unique] + counts, 255)
+
+    def _to_key_lists(self):
+        """조밀 키 건수 배열 -> 키 목록 (해시 키나 범위가 큰 키가 나오면 전환)"""
+        for i, counts in enumerate(self.arm_counts):
+            present = np.flatnonzero(counts)
+            if present.size:
+                self.arm_keys[i].append(np.repeat(present, counts[present]).astype(np.int64))
+            self.arm_counts[i] = np.zeros(0, dtype=np.uint8)
+        self.hashed = True
+
+    # -------------------------------------------------------------------------
+    def result(self):
+        """누적 결과 딕셔너리"""
+        if self.hashed:
+            keys = [np.concatenate(k) for k in self.arm_keys if k]
+            keys = keys or [np.zeros(0, dtype=np.int64)]
+            _, total = np.unique(np.concatenate(keys), return_counts=True)
+            # 그룹마다 고유 키로 줄인 뒤 합쳐서 두 번 이상 나오면 여러 그룹에 배정된 고객
+            _, arms_per_key = np.unique(np.concatenate([np.unique(k) for k in keys]), return_counts=True)
+            cross_arm = int((arms_per_key > 1).sum())
+        else:
+            size = max([c.size for c in self.arm_counts], default=0)
+            total = np.zeros(size, dtype=np.int64)
+            arms_per_key = np.zeros(size, dtype=np.int64)
+            for c in self.arm_counts:
+                total[:c.size] += c
+                arms_per_key[:c.size] += c > 0
+            total = total[total > 0]
+            cross_arm = int((arms_per_key > 1).sum())
+        result = {
+            "rows": self.rows,
+            "arms": arm_order(self.groups, self.control),
+            "unknown_group_rows": self.unknown_group_rows,
+            "customers": int(total.size),
+            "duplicate_customers": int((total > 1).sum()),
+            "duplicate_rows": int(np.clip(total - 1, 0, None).sum()),
+            "cross_arm_customers": int(cross_arm),
+            "hashed_keys": self.hashed,
+        }
+        if self.customer_index is not None:
+            result["unknown_customers"] = self.unknown_customers
+            result["attribute_mismatch"] = dict(self.attribute_mismatch)
+        if self.order_pairs is not None:
+            c = self.conversion
+            result["converted_with_order"] = int(c[1, 1])
+            result["converted_without_order"] = int(c[1, 0])
+            result["order_without_conversion"] = int(c[0, 1])
+            result["conversion_mismatch_rate"] = float(c[1, 0] + c[0, 1]) / max(self.rows, 1)
+        return result
+
+
+def scan_frame(ab_test, customers=None, orders=None, **options):
+    """방문자 로그 DataFrame 전체를 한 번에 검사 -> scanner.result()"""
+    scanner = IntegrityScanner(customers, orders, **options)
+    scanner.update(ab_test)
+    return scanner.result()
+
+
+# =============================================================================
+# 판정
+# =============================================================================
+def integrity_report(srm, scan=None, conversion_warn=CONVERSION_MISMATCH_WARN):
+    """검사별 판정 표 (check, status, detail)"""
+    rows = []
+
+    def add(check, status, detail):
+        rows.append({"check": check, "status": status, "detail": detail})
+
+    overall = srm[srm["dimension"] == "overall"].iloc[0]
+    counts = " / ".join(f"{arm} {overall[f'n_{arm}']:,} ({overall[f'share_{arm}']:.2%})" for arm in srm_arms(srm))
+    add("srm_overall", "fail" if overall["srm"] else "pass", f"{counts}, p={overall['p_value']:.4f}")
+    cells = srm[srm["dimension"] != "overall"]
+    flagged = cells[cells["srm"]]
+    detail = f"이상 셀 {len(flagged)}개 / {len(cells)}개"
+    if len(flagged):
+        worst = flagged.sort_values("p_adjusted").iloc[0]
+        detail += f" (최소 p: {worst['dimension']}={worst['segment']}, {worst['p_adjusted']:.2e})"
+    add("srm_segments", "fail" if len(flagged) else "pass", detail)
+
+    if scan is not None:
+        add("unknown_test_group", "fail" if scan["unknown_group_rows"] else "pass",
+            f"그룹 라벨 이상 {scan['unknown_group_rows']:,}행")
+        add("duplicate_assignment", "warn" if scan["duplicate_rows"] else "pass",
+            f"중복 고객 {scan['duplicate_customers']:,}명 ({scan['duplicate_rows']:,}행)")
+        add("cross_arm_assignment", "fail" if scan["cross_arm_customers"] else "pass",
+            f"두 개 이상 그룹에 배정된 고객 {scan['cross_arm_customers']:,}명")
+        if "attribute_mismatch" in scan:
+            mismatched = sum(scan["attribute_mismatch"].values())
+            detail = ", ".join(f"{k} {v:,}" for k, v in scan["attribute_mismatch"].items())
+            add("customer_attributes", "fail" if mismatched else "pass",
+                f"속성 불일치 {mismatched:,}건 ({detail})")
+            add("unknown_customers", "warn" if scan["unknown_customers"] else "pass",
+                f"고객 테이블에 없는 방문자 {scan['unknown_customers']:,}명")
+        if "conversion_mismatch_rate" in scan:
+            rate = scan["conversion_mismatch_rate"]
+            add("conversion_orders", "warn" if rate > conversion_warn else "pass",
+                f"전환했지만 주문 없음 {scan['converted_without_order']:,}건, "
+                f"주문 있지만 미전환 {scan['order_without_conversion']:,}건 (불일치 {rate:.1%})")
+    return pd.DataFrame(rows)
+
+
+def run_integrity(cube, ab_test=None, customers=None, orders=None, scan=None, control=CONTROL,
+                  **srm_options):
+    """SRM + 행 단위 검사 + 판정
+
+    그룹 목록은 큐브에서 정합니다 (multiarm.cube_arms, 기준 그룹이 맨 앞).
+    scan을 주지 않으면 ab_test(있을 때)를 같은 그룹 목록으로 직접 검사합니다.
+    반환: {"srm": DataFrame, "scan": dict 또는 None, "report": DataFrame, "passed": bool}
+    """
+    arms = cube_arms(cube, control)
+    srm = srm_checks(cube, control=control, arms=arms, **srm_options)
+    if scan is None and ab_test is not None:
+        scan = scan_frame(ab_test, customers, orders, arms=arms, control=control)
+    report = integrity_report(srm, scan)
+    return {"srm": srm, "scan": scan, "report": report, "passed": not (report["status"] == "fail").any()}
+
+
+def format_report(report):
+    """판정 표 -> 출력용 줄 목록"""
+    return [f"  {STATUS_MARKS[row.status]} {row.check}: {row.detail}" for row in report.itertuples()]
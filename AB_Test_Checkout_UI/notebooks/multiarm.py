@@ -0,0 +1,210 @@
+"""
+다중 그룹 비교 - N개 그룹 × 여러 지표 일괄 검정
+=====================================
+
+control / treatment 두 그룹을 가정하지 않고, 큐브의 test_group에 있는 모든
+그룹(예: control, variant_a, variant_b, ...)을 한 번에 비교합니다.
+
+큐브 rollup으로 (세그먼트 셀 × 그룹) 충분통계량 배열을 한 번 만든 뒤,
+비교 쌍 (기준 그룹 인덱스, 비교 그룹 인덱스) 배열로 열을 골라
+(셀 × 비교 쌍) 배열 연산 한 번으로 모든 비교를 계산합니다.
+그룹을 늘려도 파이프라인을 쌍마다 다시 돌리지 않습니다.
+
+  conversion    : 전환율, 두 비율 Z-검정 (합동 표준오차)
+  aov           : 객단가 (전환 고객 기준), Welch t-검정
+  checkout_time : 결제시간 (값이 있는 행 기준), Welch t-검정
+
+비교 방식
+  mode="control" : 기준 그룹 대비 나머지 그룹 (k-1개 비교)
+  mode="all"     : 모든 그룹 쌍 (k(k-1)/2개 비교)
+
+다중비교 보정은 세그먼트 셀마다 (비교 쌍 × 지표) 전체를 하나의 family로 두고
+Holm(기본) / Bonferroni / BH 방법으로 행 단위 일괄 보정합니다.
+
+사용법:
+    from multiarm import compare_arms, cube_arms
+
+    cube_arms(cube)                                       # ['control', 'treatment', 'variant_b']
+    compare_arms(cube)                                    # 전체, control 대비
+    compare_arms(cube, ["device"], mode="all", correction="bonferroni")
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+# 지표: 이름 -> (검정 종류, 건수, 합계, 제곱합) 큐브 통계량
+METRICS = {
+    "conversion": ("proportion", "n", "converted_sum", "converted_sumsq"),
+    "aov": ("mean", "converted_sum", "order_value_sum", "order_value_sumsq"),
+    "checkout_time": ("mean", "checkout_time_sec_n", "checkout_time_sec_sum", "checkout_time_sec_sumsq"),
+}
+
+CONTROL = "control"
+ALPHA = 0.05
+
+COMPARISON_COLUMNS = [
+    "metric", "arm_a", "arm_b", "n_a", "n_b", "mean_a", "mean_b",
+    "diff", "diff_ci_low", "diff_ci_high", "lift", "stat", "p_value", "p_adjusted", "significant",
+]
+
+
+# =============================================================================
+# 그룹별 통계량
+# =============================================================================
+def arm_order(arms, control=CONTROL):
+    """그룹 라벨 정렬 (기준 그룹을 맨 앞에)"""
+    arms = sorted(str(arm) for arm in arms)
+    if control in arms:
+        arms.remove(control)
+        arms.insert(0, control)
+    return arms
+
+
+def cube_arms(cube, control=CONTROL):
+    """큐브에 방문자가 있는 그룹 라벨 목록 (기준 그룹을 맨 앞에, 결측 라벨 제외)"""
+    totals = cube.rollup("test_group")["n"]
+    return arm_order(totals.index[totals.index.notna() & (totals > 0).to_numpy()], control)
+
+
+def arm_statistics(cube, dims=(), arms=None, control=CONTROL):
+    """(세그먼트 셀 × 그룹) 충분통계량 배열
+
+    반환: (셀 인덱스, 그룹 목록, {통계량: (셀 수, 그룹 수) 배열})
+    세그먼트 셀에 없는 그룹은 0으로 채웁니다.
+    """
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    columns = sorted({col for _, *cols in METRICS.values() for col in cols})
+    rolled = cube.rollup(dims + ["test_group"])[columns]
+    if arms is None:
+        arms = cube_arms(cube, control)
+    wide = rolled.unstack("test_group", fill_value=0)
+    if not dims:
+        wide = wide.to_frame().T
+        wide.index = pd.Index(["전체"], name="segment")
+    wide.columns = pd.MultiIndex.from_tuples([(stat, str(arm)) for stat, arm in wide.columns])
+    wide = wide.reindex(columns=pd.MultiIndex.from_product([columns, arms]), fill_value=0)
+    values = wide.to_numpy(dtype=float).reshape(len(wide), len(columns), len(arms))
+    return wide.index, arms, {col: values[:, k, :] for k, col in enumerate(columns)}
+
+
+def comparison_pairs(n_arms, mode="control"):
+    """비교 쌍 (기준 인덱스 배열, 비교 인덱스 배열)"""
+    if mode == "control":
+        others = np.arange(1, n_arms)
+        return np.zeros(others.size, dtype=np.int64), others
+    if mode == "all":
+        return np.triu_indices(n_arms, k=1)
+    raise ValueError(f"지원하지 않는 비교 방식: {mode}")
+
+
+# =============================================================================
+# 검정 / 보정
+# =============================================================================
+def _compare(kind, n, total, sumsq, ref, other, alpha):
+    """(셀 × 쌍) 배열로 한 지표의 모든 비교 계산"""
+    z_crit = stats.norm.ppf(1 - alpha / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / n
+        var = np.clip((sumsq - total * mean) / (n - 1), 0, None)
+        n_a, n_b = n[:, ref], n[:, other]
+        mean_a, mean_b = mean[:, ref], mean[:, other]
+        diff = mean_b - mean_a
+        se = np.sqrt(var[:, ref] / n_a + var[:, other] / n_b)
+        if kind == "proportion":
+            # Z-검정은 합동 비율, 신뢰구간은 비합동 표준오차 (significance.two_proportion_test와 같음)
+            pooled = (total[:, ref] + total[:, other]) / (n_a + n_b)
+            se_diff = np.sqrt(mean_a * (1 - mean_a) / n_a + mean_b * (1 - mean_b) / n_b)
+            stat = diff / np.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+            p_value = 2 * stats.norm.sf(np.abs(stat))
+            low, high = diff - z_crit * se_diff, diff + z_crit * se_diff
+            valid = (n_a > 0) & (n_b > 0)
+        else:
+            # Welch t-검정 (Welch-Satterthwaite 자유도)
+            va, vb = var[:, ref] / n_a, var[:, other] / n_b
+            df = (va + vb) ** 2 / (va ** 2 / (n_a - 1) + vb ** 2 / (n_b - 1))
+            stat = diff / se
+            p_value = 2 * stats.t.sf(np.abs(stat), df)
+            t_crit = stats.t.ppf(1 - alpha / 2, df)
+            low, high = diff - t_crit * se, diff + t_crit * se
+            valid = (n_a > 1) & (n_b > 1)
+        lift = diff / mean_a
+    out = {"n_a": n_a, "n_b": n_b, "mean_a": mean_a, "mean_b": mean_b, "diff": diff,
+           "diff_ci_low": low, "diff_ci_high": high, "lift": lift, "stat": stat, "p_value": p_value}
+    for key in ["diff_ci_low", "diff_ci_high", "stat", "p_value"]:
+        out[key] = np.where(valid, out[key], np.nan)
+    return out
+
+
+def adjust_rows(p_values, method="holm"):
+    """행마다 독립적으로 다중비교 보정 (2차원 배열, NaN은 그대로 두고 보정 대상에서 제외)
+
+    significance.adjust_pvalues의 행 단위 일괄 버전입니다.
+    """
+    p = np.atleast_2d(np.asarray(p_values, dtype=float))
+    valid = ~np.isnan(p)
+    if method == "none":
+        return p.copy()
+    m = valid.sum(axis=1, keepdims=True)
+    if method == "bonferroni":
+        return np.where(valid, np.minimum(p * m, 1.0), np.nan)
+
+    # NaN은 정렬 시 맨 뒤로 (inf), 순위 k는 0부터
+    order = np.argsort(np.where(valid, p, np.inf), axis=1, kind="stable")
+    ranked = np.take_along_axis(np.where(valid, p, np.inf), order, axis=1)
+    k = np.arange(p.shape[1])
+    if method == "holm":
+        adjusted = np.maximum.accumulate(ranked * (m - k), axis=1)
+    elif method == "bh":
+        adjusted = ranked * m / (k + 1)
+        adjusted = np.minimum.accumulate(adjusted[:, ::-1], axis=1)[:, ::-1]
+    else:
+        raise ValueError(f"지원하지 않는 보정 방법: {method}")
+
+    out = np.empty_like(p)
+    np.put_along_axis(out, order, np.minimum(adjusted, 1.0), axis=1)
+    return np.where(valid, out, np.nan)
+
+
+def compare_arms(cube, dims=(), metrics=tuple(METRICS), mode="control", control=CONTROL,
+                 arms=None, alpha=ALPHA, correction="holm"):
+    """N개 그룹 × 지표 비교를 세그먼트 셀 전체에 대해 일괄 수행
+
+    반환: 세그먼트(dims 컬럼 또는 segment) × metric × (arm_a, arm_b) 긴 형식 DataFrame
+      arm_a가 기준 그룹이며 diff = mean_b - mean_a, lift = diff / mean_a
+      p_adjusted: 세그먼트 셀마다 (비교 쌍 × 지표) family 보정
+    """
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    index, arms, values = arm_statistics(cube, dims, arms=arms, control=control)
+    if len(arms) < 2:
+        raise ValueError(f"비교할 그룹이 2개 이상 필요합니다: {arms}")
+    ref, other = comparison_pairs(len(arms), mode)
+
+    results = {}
+    for metric in metrics:
+        kind, n_col, sum_col, sumsq_col = METRICS[metric]
+        results[metric] = _compare(kind, values[n_col], values[sum_col], values[sumsq_col],
+                                   ref, other, alpha)
+    # (셀 × (지표 × 쌍)) 배열 -> 셀마다 family 보정
+    p_adjusted = adjust_rows(np.hstack([results[m]["p_value"] for m in metrics]), correction)
+
+    n_cells, n_pairs = len(index), ref.size
+    arms = np.asarray(arms, dtype=object)
+    frames = []
+    for k, metric in enumerate(metrics):
+        frame = pd.DataFrame({
+            "metric": metric,
+            "arm_a": np.tile(arms[ref], n_cells),
+            "arm_b": np.tile(arms[other], n_cells),
+        })
+        for key, value in results[metric].items():
+            frame[key] = value.ravel()
+        frame["p_adjusted"] = p_adjusted[:, k * n_pairs:(k + 1) * n_pairs].ravel()
+        frame["significant"] = frame["p_adjusted"] < alpha
+        frame.index = index.repeat(n_pairs)
+        frames.append(frame)
+    out = pd.concat(frames)
+    for col in ["n_a", "n_b"]:
+        out[col] = out[col].round().astype(np.int64)
+    return out[COMPARISON_COLUMNS].reset_index()
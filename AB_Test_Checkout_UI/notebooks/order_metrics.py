@@ -0,0 +1,252 @@
+"""
+주문 라인 지표 - 주문/주문상품/상품/결제 조인과 델타 방법 비율 지표
+=====================================
+
+실험 기간(방문일 범위) 안에 방문자(고객)가 낸 주문을 방문자에게 귀속시키고,
+주문상품·상품·결제 테이블을 정수 키로 조인해 방문자별 합계를 만든 뒤
+그룹별 비율 지표를 비교합니다.
+
+  revenue_per_visitor : 결제 금액 합계 / 방문자
+  orders_per_visitor  : 주문 수 / 방문자
+  aov                 : 결제 금액 합계 / 주문 수
+  items_per_order     : 상품 수량 합계 / 주문 수
+  discount_rate       : 할인 합계 / 상품 금액(subtotal) 합계
+  shipping_per_order  : 배송비 합계 / 주문 수
+  share:<카테고리>    : 카테고리 매출 / 주문상품 매출 합계
+
+무작위 배정 단위는 방문자이므로 분자/분모 모두 방문자별 합계로 두고, 비율의
+분산은 델타 방법으로 계산합니다 (그룹별 n, Σx, Σy, Σx², Σy², Σxy만 필요).
+
+조인은 문자열 merge 대신 정수 키 인덱스(cuped.KeyIndex)로 처리합니다.
+- 주문 -> 방문자: 고객 키 인덱스
+- 결제 / 주문상품 -> 주문: 주문 키 인덱스 (키가 조밀하면 직접 주소 배열)
+- 주문상품 -> 상품 카테고리: 상품 키 인덱스 + 고정 코드표 코드
+주문상품은 청크 이터레이터로도 받을 수 있어 수억 행도 청크 분량의 메모리로
+처리합니다 (방문자별 누적 배열: 방문자 수 × (지표 수 + 카테고리 수)).
+
+사용법:
+    from order_metrics import order_metrics
+
+    result = order_metrics(ab_test, orders, payments, products, order_items)
+
+    python order_metrics.py --data-path ../data/raw/ --chunk-size 5000000
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from cuped import EXCLUDED_STATUSES, KeyIndex
+from schema import CODE_TABLES, parse_int_key
+from significance import adjust_pvalues
+
+
+# 비율 지표: 이름 -> (분자 합계, 분모 합계; None이면 방문자 1명)
+RATIO_METRICS = {
+    "revenue_per_visitor": ("revenue", None),
+    "orders_per_visitor": ("orders", None),
+    "aov": ("revenue", "orders"),
+    "items_per_order": ("items", "orders"),
+    "discount_rate": ("discount", "subtotal"),
+    "shipping_per_order": ("shipping_fee", "orders"),
+}
+
+# 카테고리 비중 지표 접두사 (분모: 주문상품 매출 합계)
+SHARE_PREFIX = "share:"
+CATEGORY_PREFIX = "category:"
+
+# 주문상품 청크 크기 (CLI 스트리밍)
+DEFAULT_CHUNK_SIZE = 5_000_000
+
+
+# =============================================================================
+# 조인 / 방문자별 합계
+# =============================================================================
+def attribute_orders(ab_test, orders, start=None, end=None):
+    """실험 기간 주문을 방문자에 귀속 -> 주문 행별 방문자 위치 (귀속 안 되면 -1)
+
+    start / end(포함)를 주지 않으면 방문일 범위를 사용하고, 취소 주문은 제외합니다.
+    """
+    visit_date = pd.to_datetime(ab_test["visit_date"])
+    start = pd.Timestamp(start) if start is not None else visit_date.min()
+    end = pd.Timestamp(end) if end is not None else visit_date.max()
+
+    order_date = pd.to_datetime(orders["order_date"]).to_numpy()
+    in_window = (order_date >= start.to_datetime64()) & (order_date <= end.to_datetime64())
+    if "order_status" in orders:
+        in_window &= ~orders["order_status"].isin(EXCLUDED_STATUSES).to_numpy()
+
+    visitor_index = KeyIndex(parse_int_key(ab_test["customer_id"], "CUST_"))
+    order_visitor = visitor_index.lookup(parse_int_key(orders["customer_id"], "CUST_"))
+    return np.where(in_window, order_visitor, -1)
+
+
+def _through(index, keys, values):
+    """키 -> 행 위치 -> 값 (키가 없으면 -1)"""
+    pos = index.lookup(keys)
+    return np.where(pos >= 0, values[np.maximum(pos, 0)], -1)
+
+
+def visitor_order_sums(ab_test, orders, payments, products, items, start=None, end=None):
+    """방문자별 주문/결제/주문상품 합계 (ab_test 행 순서와 동일)
+
+    items: 주문상품 DataFrame 또는 DataFrame 청크 이터레이터
+    반환: DataFrame(columns=[orders, revenue, subtotal, discount, shipping_fee,
+                             items, line_revenue, category:<카테고리>...])
+    """
+    n = len(ab_test)
+    order_visitor = attribute_orders(ab_test, orders, start, end)
+    order_index = KeyIndex(parse_int_key(orders["order_id"], "ORD_"))
+    attributed = order_visitor >= 0
+
+    sums = {"orders": np.bincount(order_visitor[attributed], minlength=n).astype(np.float64)}
+
+    # 결제 -> 주문 -> 방문자
+    pay_visitor = _through(order_index, parse_int_key(payments["order_id"], "ORD_"), order_visitor)
+    paid = pay_visitor >= 0
+    for src, name in [("total_amount", "revenue"), ("subtotal", "subtotal"),
+                      ("discount", "discount"), ("shipping_fee", "shipping_fee")]:
+        values = payments[src].to_numpy(dtype=np.float64, na_value=0.0)
+        sums[name] = np.bincount(pay_visitor[paid], weights=values[paid], minlength=n)
+
+    # 주문상품 -> 주문 -> 방문자, 주문상품 -> 상품 카테고리 (청크 단위 누적)
+    categories = CODE_TABLES["category"]
+    category = pd.Categorical(products["category"], categories=categories)
+    product_index = KeyIndex(parse_int_key(products["product_id"], "PROD_"))
+    product_category = np.asarray(category.codes, dtype=np.int64)
+    n_cat = len(categories)
+
+    quantity = np.zeros(n)
+    line_revenue = np.zeros(n)
+    category_revenue = np.zeros(n * n_cat)
+    chunks = [items] if isinstance(items, pd.DataFrame) else items
+    for chunk in chunks:
+        visitor = _through(order_index, parse_int_key(chunk["order_id"], "ORD_"), order_visitor)
+        keep = visitor >= 0
+        if not keep.any():
+            continue
+        visitor = visitor[keep]
+        price = chunk["total_price"].to_numpy(dtype=np.float64)[keep]
+        quantity += np.bincount(visitor, weights=chunk["quantity"].to_numpy(dtype=np.float64)[keep],
+                                minlength=n)
+        line_revenue += np.bincount(visitor, weights=price, minlength=n)
+        cat = _through(product_index, parse_int_key(chunk["product_id"], "PROD_")[keep], product_category)
+        known = cat >= 0
+        category_revenue += np.bincount(visitor[known] * n_cat + cat[known], weights=price[known],
+                                        minlength=n * n_cat)
+    sums["items"] = quantity
+    sums["line_revenue"] = line_revenue
+
+    out = pd.DataFrame(sums, index=ab_test.index)
+    category_revenue = category_revenue.reshape(n, n_cat)
+    for i, name in enumerate(categories):
+        out[f"{CATEGORY_PREFIX}{name}"] = category_revenue[:, i]
+    return out
+
+
+# =============================================================================
+# 델타 방법 비율 검정
+# =============================================================================
+def ratio_moments(x, y, groups, n_groups):
+    """그룹별 충분통계량 (n, Σx, Σy, Σx², Σy², Σxy)"""
+    def total(values):
+        return np.bincount(groups, weights=values, minlength=n_groups)
+
+    return {
+        "n": np.bincount(groups, minlength=n_groups).astype(np.float64),
+        "sx": total(x), "sy": total(y), "sxx": total(x * x), "syy": total(y * y), "sxy": total(x * y),
+    }
+
+
+def delta_ratio(m):
+    """충분통계량 -> 비율 (Σx/Σy)과 델타 방법 분산 (배열 입력)"""
+    n = m["n"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx, my = m["sx"] / n, m["sy"] / n
+        ratio = mx / my
+        var_x = (m["sxx"] - n * mx * mx) / (n - 1)
+        var_y = (m["syy"] - n * my * my) / (n - 1)
+        cov = (m["sxy"] - n * mx * my) / (n - 1)
+        var = (var_x - 2 * ratio * cov + ratio * ratio * var_y) / (n * my * my)
+    return ratio, np.clip(var, 0, None)
+
+
+def ratio_metric_tests(sums, test_group, control="control", treatment="treatment",
+                       alpha=0.05, correction="holm"):
+    """방문자별 합계로 그룹별 비율 지표 비교 (델타 방법)
+
+    반환: 지표별 1행 DataFrame (control, treatment, diff, lift, se, CI, z, p-value, 보정 p-value)
+    """
+    test_group = pd.Series(test_group).astype(str).to_numpy()
+    groups = np.full(test_group.size, 2, dtype=np.int64)
+    groups[test_group == control] = 0
+    groups[test_group == treatment] = 1
+    ones = np.ones(len(sums))
+
+    metrics = dict(RATIO_METRICS)
+    for col in sums.columns:
+        if col.startswith(CATEGORY_PREFIX):
+            metrics[SHARE_PREFIX + col[len(CATEGORY_PREFIX):]] = (col, "line_revenue")
+
+    z_crit = stats.norm.ppf(1 - alpha / 2)
+    rows = []
+    for name, (num, den) in metrics.items():
+        x = sums[num].to_numpy(dtype=np.float64)
+        y = ones if den is None else sums[den].to_numpy(dtype=np.float64)
+        ratio, var = delta_ratio(ratio_moments(x, y, groups, 3))
+        diff = ratio[1] - ratio[0]
+        se = np.sqrt(var[0] + var[1])
+        z = diff / se if se > 0 else np.nan
+        rows.append({
+            "metric": name,
+            "control": ratio[0],
+            "treatment": ratio[1],
+            "diff": diff,
+            "lift": diff / ratio[0] if ratio[0] else np.nan,
+            "se": se,
+            "ci_low": diff - z_crit * se,
+            "ci_high": diff + z_crit * se,
+            "z": z,
+            "p_value": 2 * stats.norm.sf(abs(z)) if se > 0 else np.nan,
+        })
+    result = pd.DataFrame(rows).set_index("metric")
+    result["p_adjusted"] = adjust_pvalues(result["p_value"].to_numpy(), correction)
+    return result
+
+
+def order_metrics(ab_test, orders, payments, products, items, start=None, end=None, **test_options):
+    """주문 라인 지표 전체 계산 (조인 -> 방문자별 합계 -> 델타 방법 검정)"""
+    sums = visitor_order_sums(ab_test, orders, payments, products, items, start, end)
+    return ratio_metric_tests(sums, ab_test["test_group"], **test_options)
+
+
+def main(argv=None):
+    from data_loader import iter_csv_typed, load_table
+
+    parser = argparse.ArgumentParser(description="주문 라인 매출/카테고리 지표 (델타 방법)")
+    parser.add_argument("--data-path", default="../data/raw/", help="입력 CSV 폴더")
+    parser.add_argument("--visitor-path", default=None, help="방문자 로그 CSV")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="주문상품 청크 크기 (행)")
+    parser.add_argument("--output", default=None, help="결과 CSV 저장 경로")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("🧾 주문 라인 지표 (델타 방법)")
+    print("=" * 60)
+    tables = {name: load_table(name, args.data_path, compact=True)
+              for name in ["kr_orders", "kr_payments", "kr_products"]}
+    ab_test = load_table("ab_test_checkout_ui", args.data_path, path=args.visitor_path, compact=True)
+    items = iter_csv_typed(os.path.join(args.data_path, "kr_order_items.csv"), "kr_order_items",
+                           args.chunk_size)
+    result = order_metrics(ab_test, tables["kr_orders"], tables["kr_payments"], tables["kr_products"], items)
+    print(result[["control", "treatment", "diff", "lift", "ci_low", "ci_high", "p_adjusted"]].round(4).to_string())
+    if args.output:
+        result.to_csv(args.output, encoding="utf-8-sig")
+        print(f"\n✅ 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+차트 렌더링 - 집계값 기반 헤드리스 병렬 렌더링
+=====================================
+
+분석 결과에서 차트에 필요한 값만 뽑은 작은 페이로드(chart_payload)를 만들고,
+이 페이로드만으로 차트 2종을 그립니다.
+
+- 그룹 목록은 분석 결과의 arms(기준 그룹이 맨 앞)를 따르므로 3개 이상 그룹도
+  막대/선/박스플롯에 모두 그립니다.
+- 박스플롯은 원본 행 대신 미리 계산한 분위수/수염 값(ax.bxp)으로 그립니다.
+- 비대화형 백엔드(Agg)를 사용하므로 서버/배치 환경에서 plt.show()로
+  멈추지 않습니다.
+- matplotlib은 렌더링할 때만 import 하므로, 차트를 끄면(--no-plots)
+  import 비용도 들지 않습니다.
+- 차트 2종은 워커 프로세스에서 동시에 렌더링할 수 있습니다.
+- 한글 폰트는 설치된 후보(Malgun Gothic, AppleGothic, NanumGothic,
+  Noto Sans CJK) 중 있는 것을 자동으로 사용합니다.
+
+사용법:
+    from plotting import chart_payload, render_all
+
+    payload = chart_payload(results)
+    paths = render_all(payload, "../outputs/figures/", workers=2)
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# 한글 폰트 후보 (앞에서부터 설치된 폰트를 사용)
+FONT_CANDIDATES = [
+    "Malgun Gothic", "AppleGothic", "NanumGothic", "NanumBarunGothic",
+    "Noto Sans CJK KR", "Noto Sans KR", "UnDotum",
+]
+
+# 저장 해상도
+DPI = 150
+
+# 그룹 색상 (그 밖의 그룹은 ARM_PALETTE 순서대로)
+COLORS = {"control": "#6B7280", "treatment": "#3B82F6"}
+ARM_PALETTE = ["#F59E0B", "#10B981", "#EF4444", "#8B5CF6", "#EC4899", "#14B8A6"]
+
+# 막대 차트 라벨
+ARM_LABELS = {"control": "Control\n(기존 UI)", "treatment": "Treatment\n(새 UI)"}
+
+# 연령대 표시 순서
+AGE_ORDER = ["20대", "30대", "40대", "50대", "60대 이상"]
+
+# 차트 파일명
+OVERVIEW_FILE = "ab_test_analysis_result.png"
+VALIDATION_FILE = "ab_test_statistical_validation.png"
+
+
+# =============================================================================
+# 페이로드 (차트에 필요한 집계값만)
+# =============================================================================
+def box_stats(values, whis=1.5):
+    """ax.bxp용 박스플롯 통계 (중앙값, 사분위수, 1.5 IQR 수염; 이상치 생략)"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return None
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+    return {
+        "med": med,
+        "q1": q1,
+        "q3": q3,
+        "whislo": inside.min() if inside.size else q1,
+        "whishi": inside.max() if inside.size else q3,
+        "fliers": [],
+    }
+
+
+def _frame_payload(frame):
+    """DataFrame -> {"index": [...], "columns": {col: [...]}}"""
+    return {
+        "index": [str(i) for i in frame.index],
+        "columns": {str(col): frame[col].to_numpy(dtype=float) for col in frame.columns},
+    }
+
+
+def arm_colors(arms):
+    """그룹 -> 색상 (control / treatment는 고정, 나머지는 팔레트 순서)"""
+    others = iter(ARM_PALETTE * (len(arms) // len(ARM_PALETTE) + 1))
+    return {arm: COLORS[arm] if arm in COLORS else next(others) for arm in arms}
+
+
+def chart_payload(results):
+    """분석 결과 딕셔너리에서 차트용 집계값만 추출 (프로세스 간 전달용)"""
+    r = results
+    arms = list(r["arms"])
+    daily = r["daily_conversion"]
+    daily_rate = daily.pivot(index="visit_date", columns="test_group", values="전환율")
+
+    box = None
+    converted_df = r.get("converted_df")
+    if converted_df is not None:
+        groups = converted_df["test_group"].to_numpy()
+        values = converted_df["order_value"].to_numpy(dtype=float)
+        box = {g: box_stats(values[groups == g]) for g in arms}
+
+    cumulative_n = r["cumulative_counts"]["n"]
+    return {
+        "arms": arms,
+        "treatment": r["treatment_arm"],
+        "rates": {g: float(r["group_summary"].loc[g, "conversion_rate"]) for g in arms},
+        "relative_lift": float(r["relative_lift"]),
+        "ci": {g: (float(ci["low"]), float(ci["high"])) for g, ci in r["arm_ci"].iterrows()},
+        "device": _frame_payload(r["device_pivot"][arms]),
+        "age": _frame_payload(r["age_pivot"][arms].reindex(AGE_ORDER)),
+        "daily_dates": daily_rate.index.to_numpy(),
+        "daily_rate": {g: daily_rate[g].to_numpy(dtype=float) for g in arms},
+        "order_value_box": box,
+        "payment": _frame_payload(r["payment_dist"].T),
+        "cumulative_n": {g: cumulative_n[g].to_numpy(dtype=float) for g in arms},
+        "cumulative_rate": {g: r["cumulative_rate"][g].to_numpy(dtype=float) for g in arms},
+    }
+
+
+# =============================================================================
+# matplotlib 설정
+# =============================================================================
+def _pyplot(interactive=False):
+    """matplotlib을 지연 import 하고 한글 폰트 설정"""
+    import matplotlib
+    if not interactive:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager
+
+    installed = {f.name for f in font_manager.fontManager.ttflist}
+    fonts = [name for name in FONT_CANDIDATES if name in installed]
+    if not fonts:
+        warnings.warn("한글 폰트를 찾지 못했습니다. 한글 라벨이 깨질 수 있습니다 "
+                      f"(후보: {', '.join(FONT_CANDIDATES)})")
+    plt.rcParams["font.family"] = fonts + ["sans-serif"]
+    plt.rcParams["axes.unicode_minus"] = False
+    plt.style.use("seaborn-v0_8-whitegrid")
+    # 스타일 적용 후 폰트 설정이 덮어써지지 않도록 다시 지정
+    plt.rcParams["font.family"] = fonts + ["sans-serif"]
+    return plt
+
+
+def _offsets(n, width):
+    """그룹 n개를 나란히 놓을 때 중심 기준 위치"""
+    return (np.arange(n) - (n - 1) / 2) * width
+
+
+def _grouped_bars(ax, data, arms, colors, total_width=0.7):
+    x = np.arange(len(data["index"]))
+    width = total_width / len(arms)
+    for arm, offset in zip(arms, _offsets(len(arms), width)):
+        ax.bar(x + offset, data["columns"][arm], width, label=arm.capitalize(), color=colors[arm])
+    ax.set_xticks(x)
+    return x
+
+
+# =============================================================================
+# 8. 분석 결과 차트 (2x3)
+# =============================================================================
+def render_overview(payload, path, dpi=DPI, show=False):
+    plt = _pyplot(interactive=show)
+    p = payload
+    arms = p["arms"]
+    colors = arm_colors(arms)
+
+    fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+    fig.suptitle("A/B 테스트 분석 결과 - 새 결제 UI 테스트", fontsize=16, fontweight="bold")
+
+    # 8-1. 전환율 비교 막대 그래프
+    ax1 = axes[0, 0]
+    conversion_rates = [p["rates"][arm] * 100 for arm in arms]
+    bars = ax1.bar([ARM_LABELS.get(arm, arm) for arm in arms], conversion_rates,
+                   color=[colors[arm] for arm in arms], edgecolor="black", linewidth=1.2)
+    ax1.set_ylabel("전환율 (%)")
+    ax1.set_title("그룹별 전환율 비교")
+    ax1.set_ylim(0, max(conversion_rates) * 1.3)
+    for bar, rate in zip(bars, conversion_rates):
+        ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.5,
+                 f"{rate:.2f}%", ha="center", va="bottom", fontweight="bold", fontsize=11)
+    position = arms.index(p["treatment"])
+    treatment_rate = p["rates"][p["treatment"]]
+    ax1.annotate(f"+{p['relative_lift']:.1f}%", xy=(position, treatment_rate*100),
+                 xytext=(position + 0.3, treatment_rate*100 + 2),
+                 fontsize=12, color="green", fontweight="bold",
+                 arrowprops=dict(arrowstyle="->", color="green"))
+
+    # 8-2. 디바이스별 전환율
+    ax2 = axes[0, 1]
+    _grouped_bars(ax2, p["device"], arms, colors)
+    ax2.set_ylabel("전환율 (%)")
+    ax2.set_title("디바이스별 전환율")
+    ax2.set_xticklabels(p["device"]["index"])
+    ax2.legend()
+    ax2.set_ylim(0, max(np.nanmax(v) for v in p["device"]["columns"].values()) * 1.3)
+
+    # 8-3. 연령대별 전환율
+    ax3 = axes[0, 2]
+    _grouped_bars(ax3, p["age"], arms, colors)
+    ax3.set_ylabel("전환율 (%)")
+    ax3.set_title("연령대별 전환율")
+    ax3.set_xticklabels(p["age"]["index"], rotation=45, ha="right")
+    ax3.legend()
+
+    # 8-4. 일별 전환율 추이
+    ax4 = axes[1, 0]
+    for group in arms:
+        ax4.plot(p["daily_dates"], p["daily_rate"][group] * 100,
+                 marker="o", markersize=4, label=group.capitalize(), color=colors[group], linewidth=2)
+    ax4.set_ylabel("전환율 (%)")
+    ax4.set_xlabel("날짜")
+    ax4.set_title("일별 전환율 추이")
+    ax4.legend()
+    ax4.tick_params(axis="x", rotation=45)
+
+    # 8-5. 객단가 분포 (미리 계산한 분위수로 박스플롯)
+    ax5 = axes[1, 1]
+    box = p["order_value_box"]
+    if box is not None and all(box.values()):
+        ax5.bxp([dict(box[g], label=g) for g in arms], showfliers=False)
+    else:
+        ax5.text(0.5, 0.5, "원본 행 없음 (스트리밍/상태 저장소 모드)",
+                 ha="center", va="center", transform=ax5.transAxes)
+    ax5.set_ylabel("주문 금액 (원)")
+    ax5.set_xlabel("그룹")
+    ax5.set_title("그룹별 객단가 분포")
+
+    # 8-6. 결제 수단 비교
+    ax6 = axes[1, 2]
+    payment = p["payment"]
+    y = np.arange(len(payment["index"]))
+    height = 0.5 / len(arms)
+    for offset, group in zip(_offsets(len(arms), height), arms):
+        if group in payment["columns"]:
+            ax6.barh(y + offset, payment["columns"][group], height, label=group, color=colors[group])
+    ax6.set_yticks(y)
+    ax6.set_yticklabels(payment["index"])
+    ax6.set_xlabel("비중 (%)")
+    ax6.set_title("결제 수단 비중")
+    ax6.legend(title="그룹")
+
+    plt.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    if show:
+        plt.show()
+    plt.close(fig)
+    return path
+
+
+# =============================================================================
+# 9. 통계적 검증 차트 (1x2)
+# =============================================================================
+def render_validation(payload, path, dpi=DPI, show=False):
+    plt = _pyplot(interactive=show)
+    p = payload
+    arms = p["arms"]
+    colors = arm_colors(arms)
+    ci_control, ci_treatment = p["ci"][arms[0]], p["ci"][p["treatment"]]
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    fig.suptitle("통계적 검증 시각화", fontsize=14, fontweight="bold")
+
+    # 9-1. 신뢰구간 에러바
+    ax1 = axes[0]
+    for group in arms:
+        mean, ci = p["rates"][group] * 100, p["ci"][group]
+        ax1.errorbar([group.capitalize()], [mean], yerr=[[mean - ci[0] * 100], [ci[1] * 100 - mean]],
+                     fmt="o", markersize=10, capsize=10, capthick=2, elinewidth=2,
+                     color=colors[group])
+    ax1.set_ylabel("전환율 (%)")
+    ax1.set_title("95% 신뢰구간")
+    ax1.set_ylim(10, 22)
+    if ci_control[1] < ci_treatment[0]:
+        ax1.text((len(arms) - 1) / 2, 20, "✅ 신뢰구간 겹치지 않음\n→ 통계적으로 유의미",
+                 ha="center", fontsize=10, color="green",
+                 bbox=dict(boxstyle="round", facecolor="lightgreen", alpha=0.5))
+
+    # 9-2. 누적 전환율 추이 (일 단위 누적 지점)
+    ax2 = axes[1]
+    for group in arms:
+        ax2.plot(p["cumulative_n"][group], p["cumulative_rate"][group] * 100,
+                 label=group.capitalize(), color=colors[group], linewidth=2)
+    ax2.set_xlabel("누적 샘플 수")
+    ax2.set_ylabel("누적 전환율 (%)")
+    ax2.set_title("누적 전환율 추이 (수렴 확인)")
+    ax2.legend()
+    for group in arms:
+        ax2.axhline(y=p["rates"][group]*100, color=colors[group], linestyle="--", alpha=0.5)
+
+    plt.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    if show:
+        plt.show()
+    plt.close(fig)
+    return path
+
+
+RENDERERS = [(render_overview, OVERVIEW_FILE), (render_validation, VALIDATION_FILE)]
+
+
+def _render_task(args):
+    renderer, payload, path, dpi = args
+    return renderer(payload, path, dpi=dpi)
+
+
+def render_all(payload, output_dir="./", workers=None, dpi=DPI, show=False):
+    """차트 2종 렌더링 -> 저장 경로 목록
+
+    workers가 2 이상이면 차트마다 워커 프로세스에서 동시에 렌더링합니다
+    (기본: CPU가 2개 이상일 때만). show=True면 현재 프로세스에서 그리고 화면에 표시합니다.
+    """
+    tasks = [(renderer, payload, os.path.join(output_dir, fname), dpi) for renderer, fname in RENDERERS]
+    if workers is None:
+        workers = min(len(tasks), os.cpu_count() or 1)
+    if show or workers <= 1:
+        return [renderer(payload, path, dpi=dpi, show=show) for renderer, payload, path, dpi in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_task, tasks))
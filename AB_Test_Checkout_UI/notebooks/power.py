@@ -0,0 +1,365 @@
+"""
+검정력 / 실험 기간 플래너 - 관측 기준값 기반 벡터화 몬테카를로
+=====================================
+
+이전 실험 결과(ab_test_checkout_ui.csv 큐브)에서 control 전환율, 디바이스별
+트래픽 비중과 전환율, 객단가 분산, 일 방문자 수를 기준값으로 뽑아
+다음 질문에 답합니다.
+
+- 필요한 표본 수 / 최소 검출 효과(MDE) / 검정력: 정규근사 닫힌 형식
+- 디바이스 층화 트래픽을 반영한 검정력: 가상 실험 수만 건을 이항/정규
+  난수 배열로 한꺼번에 시뮬레이션 (Python 반복문 없음)
+- 유의미해질 때까지 걸리는 기간: 일별 누적 건수를 시뮬레이션해 mSPRT
+  (sequential.py와 같은 항상 유효한 p-value)로 처음 기각되는 날 계산
+
+시뮬레이션은 SIM_BLOCK개씩 블록으로 나누고 블록마다 SeedSequence에서
+파생한 시드를 사용하므로 워커 수와 관계없이 같은 seed면 같은 결과가 나옵니다.
+
+사용법:
+    from power import baseline_from_cube, sample_size_proportions, simulate_power
+
+    baseline = baseline_from_cube(cube)
+    sample_size_proportions(baseline["rate"], relative_mde=0.10)
+    simulate_power(baseline, lifts=[0.05, 0.10, 0.20], n_per_arm=10_000)
+
+    python power.py --data-path ../data/raw/ --lifts 0.05 0.1 0.2 --n-per-arm 10000
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from sequential import msprt_lambda
+
+
+# 시뮬레이션 블록 크기 (시드 단위)
+SIM_BLOCK = 4096
+
+# 이 작업량(시뮬레이션 수 × 효과 수 × 일수) 미만이면 현재 프로세스에서 계산
+PARALLEL_THRESHOLD = 20_000_000
+
+# 기본 시뮬레이션 수
+DEFAULT_SIMULATIONS = 20_000
+
+# 일별 건수의 기대 전환/미전환 수가 이 값 이상이면 정규근사 난수 사용
+# (이항/포아송 난수보다 수 배 빠르고 일별 수백 명 규모에서는 오차가 무시할 수준)
+NORMAL_APPROX_MIN = 30
+
+
+# =============================================================================
+# 기준값
+# =============================================================================
+def baseline_from_cube(cube, control="control", segment="device"):
+    """관측 큐브의 control 그룹에서 설계 기준값 추출
+
+    반환 딕셔너리:
+      rate: 전환율, segments: 세그먼트별 트래픽 비중(share)과 전환율(rate)
+      aov_mean, aov_std: 전환 고객 객단가 평균/표준편차
+      daily_visitors: 일 평균 전체 방문자 수 (두 그룹 합)
+    """
+    overall = cube.summary("test_group").loc[control]
+    by_segment = cube.summary(["test_group", segment]).loc[control]
+    daily = cube.rollup("visit_date")["n"]
+    return {
+        "rate": float(overall["conversion_rate"]),
+        "segments": pd.DataFrame({
+            "share": by_segment["visitors"] / by_segment["visitors"].sum(),
+            "rate": by_segment["conversion_rate"],
+        }),
+        "aov_mean": float(overall["aov_mean"]),
+        "aov_std": float(overall["aov_std"]),
+        "daily_visitors": float(daily.mean()),
+    }
+
+
+def _segments(baseline):
+    segments = baseline.get("segments")
+    if segments is None or len(segments) == 0:
+        return np.array([1.0]), np.array([baseline["rate"]])
+    return segments["share"].to_numpy(dtype=float), segments["rate"].to_numpy(dtype=float)
+
+
+# =============================================================================
+# 닫힌 형식 (정규근사)
+# =============================================================================
+def _z(alpha, power):
+    return stats.norm.ppf(1 - alpha / 2), stats.norm.ppf(power)
+
+
+def sample_size_proportions(rate, absolute_mde=None, relative_mde=None,
+                            alpha=0.05, power=0.8, ratio=1.0):
+    """두 비율 검정의 그룹당 필요 표본 수 (control 기준, treatment = ratio × control)"""
+    if (absolute_mde is None) == (relative_mde is None):
+        raise ValueError("absolute_mde와 relative_mde 중 하나만 지정하세요")
+    p1 = np.asarray(rate, dtype=float)
+    delta = absolute_mde if absolute_mde is not None else p1 * np.asarray(relative_mde, dtype=float)
+    p2 = p1 + delta
+    z_a, z_b = _z(alpha, power)
+    p_bar = (p1 + ratio * p2) / (1 + ratio)
+    n = (
+        z_a * np.sqrt(p_bar * (1 - p_bar) * (1 + 1 / ratio))
+        + z_b * np.sqrt(p1 * (1 - p1) + p2 * (1 - p2) / ratio)
+    ) ** 2 / delta ** 2
+    return np.ceil(n)
+
+
+def power_proportions(n_per_arm, rate, absolute_diff, alpha=0.05):
+    """그룹당 n명일 때 두 비율 검정의 검정력 (양측)"""
+    n = np.asarray(n_per_arm, dtype=float)
+    p1 = np.asarray(rate, dtype=float)
+    p2 = p1 + np.asarray(absolute_diff, dtype=float)
+    z_a = stats.norm.ppf(1 - alpha / 2)
+    p_bar = (p1 + p2) / 2
+    se0 = np.sqrt(2 * p_bar * (1 - p_bar) / n)
+    se1 = np.sqrt((p1 * (1 - p1) + p2 * (1 - p2)) / n)
+    delta = np.abs(p2 - p1)
+    return stats.norm.cdf((delta - z_a * se0) / se1) + stats.norm.cdf((-delta - z_a * se0) / se1)
+
+
+def mde_proportions(n_per_arm, rate, alpha=0.05, power=0.8):
+    """그룹당 n명으로 검출 가능한 최소 전환율 차이 (절대값, %p 아님)"""
+    n = np.atleast_1d(np.asarray(n_per_arm, dtype=float))
+    p1 = float(rate)
+    # 검정력은 차이에 대해 단조 증가하므로 모든 n에 대해 한꺼번에 이분법
+    lo = np.zeros(n.shape)
+    hi = np.full(n.shape, 1 - p1 - 1e-9)
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        below = power_proportions(n, p1, mid, alpha) < power
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+    return hi if np.ndim(n_per_arm) else hi[0]
+
+
+def sample_size_means(std, absolute_mde, alpha=0.05, power=0.8):
+    """평균 차이(객단가 등) 검정의 그룹당 필요 표본 수"""
+    z_a, z_b = _z(alpha, power)
+    return np.ceil(2 * (z_a + z_b) ** 2 * np.asarray(std, dtype=float) ** 2
+                   / np.asarray(absolute_mde, dtype=float) ** 2)
+
+
+def mde_means(n_per_arm, std, alpha=0.05, power=0.8):
+    """그룹당 n명으로 검출 가능한 최소 평균 차이"""
+    z_a, z_b = _z(alpha, power)
+    return (z_a + z_b) * np.asarray(std, dtype=float) * np.sqrt(2 / np.asarray(n_per_arm, dtype=float))
+
+
+# =============================================================================
+# 몬테카를로 시뮬레이션
+# =============================================================================
+def _simulate_block(task):
+    """가상 실험 블록 하나 -> 효과별 (전환율 기각 수, 객단가 기각 수)"""
+    seed_seq, n_sims, baseline, lifts, n_per_arm, alpha = task
+    rng = np.random.default_rng(seed_seq)
+    share, rate = _segments(baseline)
+    z_crit = stats.norm.ppf(1 - alpha / 2)
+
+    # 세그먼트별 트래픽 (n_sims, 세그먼트) - 효과와 무관하므로 한 번만 뽑음
+    n_a = rng.multinomial(n_per_arm, share, size=n_sims)
+    n_b = rng.multinomial(n_per_arm, share, size=n_sims)
+    x_a = rng.binomial(n_a, rate).sum(axis=1)
+
+    conv_reject = np.empty(len(lifts), dtype=np.int64)
+    aov_reject = np.empty(len(lifts), dtype=np.int64)
+    aov_mean, aov_std = baseline.get("aov_mean"), baseline.get("aov_std")
+    for i, lift in enumerate(lifts):
+        x_b = rng.binomial(n_b, np.clip(rate * (1 + lift), 0, 1)).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p_pool = (x_a + x_b) / (2 * n_per_arm)
+            se = np.sqrt(p_pool * (1 - p_pool) * 2 / n_per_arm)
+            z = (x_b - x_a) / n_per_arm / se
+        conv_reject[i] = np.sum(np.abs(z) >= z_crit)
+
+        if aov_mean and aov_std:
+            # 전환 고객 수만큼의 표본 평균 ~ 정규 (중심극한정리)
+            buyers_a, buyers_b = np.maximum(x_a, 2), np.maximum(x_b, 2)
+            mean_a = aov_mean + aov_std / np.sqrt(buyers_a) * rng.standard_normal(n_sims)
+            mean_b = aov_mean * (1 + lift) + aov_std / np.sqrt(buyers_b) * rng.standard_normal(n_sims)
+            z_aov = (mean_b - mean_a) / (aov_std * np.sqrt(1 / buyers_a + 1 / buyers_b))
+            aov_reject[i] = np.sum(np.abs(z_aov) >= z_crit)
+        else:
+            aov_reject[i] = 0
+    return conv_reject, aov_reject
+
+
+def _count_draws(rng, n, p):
+    """n명 중 전환 수 난수 (기대 건수가 충분히 크면 정규근사)"""
+    n = np.asarray(n)
+    mean = n * p
+    if min(mean.mean(), (n - mean).mean()) >= NORMAL_APPROX_MIN:
+        draws = np.rint(mean + np.sqrt(mean * (1 - p)) * rng.standard_normal(n.shape))
+        return np.clip(draws, 0, n).astype(np.int64)
+    return rng.binomial(n, p)
+
+
+def _visitor_draws(rng, lam, size):
+    """일 방문자 수 난수 (포아송, 평균이 크면 정규근사)"""
+    if lam >= NORMAL_APPROX_MIN:
+        return np.maximum(np.rint(lam + np.sqrt(lam) * rng.standard_normal(size)), 0).astype(np.int64)
+    return rng.poisson(lam, size=size)
+
+
+def _days_block(task):
+    """가상 실험 블록 하나 -> 효과별 mSPRT 첫 기각일 (미기각은 0)"""
+    seed_seq, n_sims, baseline, lifts, days, alpha, tau = task
+    rng = np.random.default_rng(seed_seq)
+    share, rate = _segments(baseline)
+    p_a = float(share @ rate)
+    per_arm = baseline["daily_visitors"] / 2
+
+    daily_a = _visitor_draws(rng, per_arm, (n_sims, days))
+    daily_b = _visitor_draws(rng, per_arm, (n_sims, days))
+    n_a, n_b = daily_a.cumsum(axis=1), daily_b.cumsum(axis=1)
+    x_a = _count_draws(rng, daily_a, p_a).cumsum(axis=1)
+
+    first = np.zeros((len(lifts), n_sims), dtype=np.int64)
+    for i, lift in enumerate(lifts):
+        p_b = min(p_a * (1 + lift), 1.0)
+        x_b = _count_draws(rng, daily_b, p_b).cumsum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r_a, r_b = x_a / n_a, x_b / n_b
+            variance = r_a * (1 - r_a) / n_a + r_b * (1 - r_b) / n_b
+            lam = msprt_lambda(r_b - r_a, variance, tau)
+        # 항상 유효한 p-value = min(1, 1/max Λ) < alpha  <=>  Λ >= 1/alpha
+        reject = np.nan_to_num(lam, nan=0.0) >= 1 / alpha
+        any_reject = reject.any(axis=1)
+        first[i] = np.where(any_reject, reject.argmax(axis=1) + 1, 0)
+    return first
+
+
+def _run_blocks(func, make_task, n_sims, seed, work, workers):
+    n_blocks = -(-n_sims // SIM_BLOCK)
+    seeds = np.random.SeedSequence(seed).spawn(n_blocks)
+    sizes = [min(SIM_BLOCK, n_sims - i * SIM_BLOCK) for i in range(n_blocks)]
+    tasks = [make_task(s, size) for s, size in zip(seeds, sizes)]
+    if workers is None:
+        workers = (os.cpu_count() or 1) if work >= PARALLEL_THRESHOLD else 1
+    workers = max(1, min(workers, n_blocks))
+    if workers == 1:
+        return [func(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, tasks))
+
+
+def simulate_power(baseline, lifts, n_per_arm, alpha=0.05, n_sims=DEFAULT_SIMULATIONS,
+                   seed=0, workers=None):
+    """디바이스 층화 트래픽을 반영한 몬테카를로 검정력
+
+    lifts: 상대 효과 목록 (0.1 = 전환율/객단가 10% 상승)
+    반환: 효과별 전환율/객단가 검정력과 닫힌 형식 검정력 비교 DataFrame
+    """
+    lifts = np.atleast_1d(np.asarray(lifts, dtype=float))
+    blocks = _run_blocks(
+        _simulate_block,
+        lambda s, size: (s, size, baseline, lifts, int(n_per_arm), alpha),
+        n_sims, seed, n_sims * len(lifts) * 4, workers,
+    )
+    conv = sum(b[0] for b in blocks) / n_sims
+    aov = sum(b[1] for b in blocks) / n_sims
+    rate = baseline["rate"]
+    return pd.DataFrame({
+        "lift": lifts,
+        "absolute_diff": rate * lifts,
+        "power_conversion": conv,
+        "power_conversion_closed_form": power_proportions(n_per_arm, rate, rate * lifts, alpha),
+        "power_aov": aov,
+    }).set_index("lift")
+
+
+def power_curve(baseline, lifts, n_values, alpha=0.05, n_sims=DEFAULT_SIMULATIONS, seed=0, workers=None):
+    """표본 수 × 효과 검정력 표 (행: 그룹당 표본 수, 열: 효과)"""
+    rows = {}
+    for i, n in enumerate(n_values):
+        result = simulate_power(baseline, lifts, n, alpha=alpha, n_sims=n_sims,
+                                seed=[seed, i], workers=workers)
+        rows[int(n)] = result["power_conversion"]
+    return pd.DataFrame(rows).T.rename_axis("n_per_arm")
+
+
+def days_to_significance(baseline, lifts, max_days=60, alpha=0.05, tau=0.02,
+                         n_sims=DEFAULT_SIMULATIONS, seed=0, workers=None):
+    """일별로 결과를 확인할 때(mSPRT) 유의미해지기까지 걸리는 기간 분포
+
+    반환: 효과별 max_days 안에 기각될 확률, 기각된 실험의 중앙값/평균/90% 일수
+    """
+    lifts = np.atleast_1d(np.asarray(lifts, dtype=float))
+    blocks = _run_blocks(
+        _days_block,
+        lambda s, size: (s, size, baseline, lifts, int(max_days), alpha, tau),
+        n_sims, seed, n_sims * len(lifts) * max_days, workers,
+    )
+    first = np.concatenate(blocks, axis=1)
+    rows = []
+    for lift, days in zip(lifts, first):
+        hit = days[days > 0]
+        rows.append({
+            "lift": lift,
+            "prob_significant": hit.size / days.size,
+            "median_days": np.median(hit) if hit.size else np.nan,
+            "mean_days": hit.mean() if hit.size else np.nan,
+            "p90_days": np.percentile(hit, 90) if hit.size else np.nan,
+        })
+    return pd.DataFrame(rows).set_index("lift")
+
+
+# =============================================================================
+# 실행
+# =============================================================================
+def main(argv=None):
+    from cube import Cube
+    from data_loader import load_table
+
+    parser = argparse.ArgumentParser(description="A/B 테스트 검정력 / 실험 기간 플래너")
+    parser.add_argument("--data-path", default="../data/raw/", help="이전 실험 방문자 로그가 있는 폴더")
+    parser.add_argument("--lifts", type=float, nargs="+", default=[0.05, 0.10, 0.20, 0.30],
+                        help="상대 효과 목록 (0.1 = 10%% 상승)")
+    parser.add_argument("--n-per-arm", type=int, default=10_000, help="그룹당 표본 수")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--power", type=float, default=0.8)
+    parser.add_argument("--simulations", type=int, default=DEFAULT_SIMULATIONS)
+    parser.add_argument("--max-days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    cube = Cube.from_frame(load_table("ab_test_checkout_ui", args.data_path))
+    baseline = baseline_from_cube(cube)
+
+    print("=" * 60)
+    print("📐 설계 기준값 (이전 실험 control 그룹)")
+    print("=" * 60)
+    print(f"  전환율: {baseline['rate']:.2%}")
+    print(f"  객단가: {baseline['aov_mean']:,.0f}원 (표준편차 {baseline['aov_std']:,.0f}원)")
+    print(f"  일 방문자: {baseline['daily_visitors']:,.0f}명")
+    print(baseline["segments"].round(4))
+
+    lifts = np.asarray(args.lifts)
+    # 객단가는 전환 고객 기준 검정이므로 필요 구매자 수를 전환율로 나눠 방문자 수로 환산
+    buyers = sample_size_means(baseline["aov_std"], baseline["aov_mean"] * lifts,
+                               alpha=args.alpha, power=args.power)
+    print("\n[필요 표본 수 (그룹당 방문자 수, 닫힌 형식)]")
+    print(pd.DataFrame({
+        "전환율": sample_size_proportions(baseline["rate"], relative_mde=lifts,
+                                      alpha=args.alpha, power=args.power),
+        "객단가": np.ceil(buyers / baseline["rate"]),
+        "객단가(구매자)": buyers,
+    }, index=pd.Index(lifts, name="lift")).astype(np.int64))
+
+    mde = mde_proportions(args.n_per_arm, baseline["rate"], alpha=args.alpha, power=args.power)
+    print(f"\n[그룹당 {args.n_per_arm:,}명일 때 MDE] 전환율 {mde:.2%}p "
+          f"(상대 {mde / baseline['rate']:.1%})")
+
+    print(f"\n[몬테카를로 검정력 (시뮬레이션 {args.simulations:,}회)]")
+    print(simulate_power(baseline, lifts, args.n_per_arm, alpha=args.alpha,
+                         n_sims=args.simulations, seed=args.seed).round(4))
+
+    print(f"\n[유의미해지기까지 기간 (mSPRT, 최대 {args.max_days}일)]")
+    print(days_to_significance(baseline, lifts, max_days=args.max_days, alpha=args.alpha,
+                               n_sims=args.simulations, seed=args.seed).round(2))
+
+
+if __name__ == "__main__":
+    main()
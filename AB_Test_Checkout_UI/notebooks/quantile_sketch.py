@@ -0,0 +1,279 @@
+"""
+분위수 스케치 - 병합 가능한 로그 버킷 분위수 요약 (p50/p90/p99, 분위수 처리 효과)
+=====================================
+
+결제 소요 시간 / 객단가의 분위수를 원본 행 없이 구하기 위한 요약입니다.
+값 x(>0)를 로그 버킷 k = ceil(log_γ x), γ = (1+α)/(1-α)에 넣고 셀(그룹 ×
+방문일 × 디바이스 × 연령대)마다 버킷별 건수만 저장합니다 (DDSketch 방식).
+버킷 대표값 2γ^k/(γ+1)은 버킷 안 모든 값과의 상대 오차가 α 이하이므로,
+어떤 분위수든 상대 오차 α(기본 1%) 안에서 구할 수 있습니다. 0 이하 값은
+별도의 0 버킷에 모읍니다.
+
+- 큐브처럼 건수만 담고 있어 청크/파일/방문일/워커 단위로 만든 스케치를
+  그대로 더해 병합할 수 있습니다 (병합 순서와 관계없이 결과가 같음).
+- 상태 저장소(state_store.py)에 방문일 파티션별로 함께 저장됩니다.
+- 분위수 처리 효과의 신뢰구간: 그룹별 분위수의 순서통계량(이항 분포)
+  신뢰구간 폭으로 표준오차를 근사하고, 두 그룹을 합쳐 차이의 정규 근사
+  신뢰구간을 만듭니다 (재표본 없이 스케치만으로 계산).
+
+사용법:
+    from quantile_sketch import QuantileSketch
+
+    sketch = QuantileSketch.from_frame(ab_test)
+    sketch.quantiles("checkout_time_sec", ["test_group"], [0.5, 0.9, 0.99])
+    sketch.quantile_effects("checkout_time_sec", by=["device"])
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+# 스케치 셀 차원 (지역/성별/결제수단은 합쳐서 버킷 행 수를 줄임)
+SKETCH_DIMENSIONS = ["test_group", "visit_date", "device", "age_group"]
+
+# 스케치 지표 -> 대상 행 조건 컬럼 (값이 1인 행만, None이면 결측 아닌 모든 행)
+SKETCH_METRICS = {
+    "order_value": "converted",
+    "checkout_time_sec": None,
+}
+
+# 분위수 상대 오차
+RELATIVE_ACCURACY = 0.01
+
+# 기본 분위수
+QUANTILES = [0.5, 0.9, 0.99]
+
+# 0 이하 값의 버킷 키
+ZERO_KEY = np.iinfo(np.int32).min
+
+# 청크 스케치를 몇 개 모을 때마다 병합할지
+MERGE_EVERY = 8
+
+
+def _gamma(accuracy):
+    return (1 + accuracy) / (1 - accuracy)
+
+
+def bucket_keys(values, accuracy=RELATIVE_ACCURACY):
+    """값 -> 로그 버킷 키 (int32, 0 이하 값은 ZERO_KEY)"""
+    values = np.asarray(values, dtype=float)
+    keys = np.full(values.shape, ZERO_KEY, dtype=np.int32)
+    positive = values > 0
+    keys[positive] = np.ceil(np.log(values[positive]) / np.log(_gamma(accuracy)))
+    return keys
+
+
+def bucket_values(keys, accuracy=RELATIVE_ACCURACY):
+    """버킷 키 -> 대표값 (버킷 안 값과의 상대 오차 accuracy 이하)"""
+    keys = np.asarray(keys)
+    gamma = _gamma(accuracy)
+    values = 2 * gamma ** np.where(keys == ZERO_KEY, 0, keys).astype(float) / (gamma + 1)
+    return np.where(keys == ZERO_KEY, 0.0, values)
+
+
+def _label(q):
+    """0.5 -> 'p50', 0.999 -> 'p99.9'"""
+    return f"p{q * 100:g}"
+
+
+# =============================================================================
+# 스케치 셀
+# =============================================================================
+def sketch_cells(df, dims=SKETCH_DIMENSIONS, metrics=SKETCH_METRICS, accuracy=RELATIVE_ACCURACY):
+    """원본 프레임을 한 번 스캔해 (차원 × 지표 × 버킷) 건수 계산"""
+    frames = []
+    for metric, condition in metrics.items():
+        values = df[metric].to_numpy(dtype=float, na_value=np.nan)
+        keep = ~np.isnan(values)
+        if condition is not None:
+            keep &= df[condition].to_numpy() == 1
+        part = pd.DataFrame({dim: df[dim].to_numpy()[keep] for dim in dims})
+        for dim in dims:
+            if isinstance(df[dim].dtype, pd.CategoricalDtype):
+                part[dim] = pd.Categorical(part[dim], categories=df[dim].cat.categories)
+        part["metric"] = metric
+        part["key"] = bucket_keys(values[keep], accuracy)
+        frames.append(
+            part.groupby(dims + ["metric", "key"], observed=True, dropna=False, sort=False)
+            .size().rename("count").reset_index()
+        )
+    cells = pd.concat(frames, ignore_index=True)
+    cells["metric"] = cells["metric"].astype(pd.CategoricalDtype(list(metrics)))
+    return cells
+
+
+def merge_sketch_cells(frames, dims=SKETCH_DIMENSIONS):
+    """여러 스케치 셀 프레임 병합 (버킷 건수 합산)"""
+    frames = list(frames)
+    if len(frames) == 1:
+        return frames[0]
+    cells = pd.concat(frames, ignore_index=True)
+    for col in dims + ["metric"]:
+        # 청크마다 카테고리 목록이 다를 수 있으므로 합집합으로 맞춤
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype) or cells[col].dtype == object:
+            cells[col] = cells[col].astype("category")
+    return (
+        cells.groupby(dims + ["metric", "key"], observed=True, dropna=False, sort=False)["count"]
+        .sum()
+        .reset_index()
+    )
+
+
+class QuantileSketch:
+    """셀별 로그 버킷 분위수 스케치"""
+
+    def __init__(self, cells, dims=SKETCH_DIMENSIONS, accuracy=RELATIVE_ACCURACY):
+        self.dims = list(dims)
+        self.cells = cells
+        self.accuracy = accuracy
+
+    @classmethod
+    def from_frame(cls, df, dims=SKETCH_DIMENSIONS, metrics=SKETCH_METRICS, accuracy=RELATIVE_ACCURACY):
+        """방문자 로그 DataFrame에서 스케치 생성 (단일 스캔)"""
+        return cls(sketch_cells(df, dims, metrics, accuracy), dims, accuracy)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def merge(self, other):
+        """다른 스케치와 합치기 (청크/파일/일자 단위 부분 스케치 병합)"""
+        return merge_sketches([self, other])
+
+    def _sorted_counts(self, metric, by):
+        """by 그룹별로 연속, 그룹 안에서 버킷 키 오름차순인 건수 배열"""
+        cells = self.cells[self.cells["metric"] == metric]
+        counts = cells.groupby(list(by) + ["key"], observed=True, dropna=False)["count"].sum()
+        counts = counts[counts > 0]
+        if by:
+            codes, groups = counts.index.droplevel("key").factorize()
+            groups = groups.set_names(list(by))
+        else:
+            codes, groups = np.zeros(len(counts), dtype=np.int64), pd.Index(["전체"])
+        keys = counts.index.get_level_values("key").to_numpy()
+        return keys, counts.to_numpy(dtype=float), codes, groups
+
+    def _values_at_ranks(self, keys, cum, start, end, ranks):
+        """그룹별 순위(0부터, 그룹 시작 기준) -> 버킷 대표값"""
+        idx = np.searchsorted(cum, start + ranks, side="right")
+        idx = np.clip(idx, 0, end)
+        return bucket_values(keys[idx], self.accuracy)
+
+    def quantile_table(self, metric, by=("test_group",), qs=QUANTILES, alpha=0.05):
+        """그룹별 분위수와 순서통계량 신뢰구간 -> DataFrame (n, p50, p50_low, p50_high, ...)
+
+        신뢰구간 순위가 0 ~ n-1 밖이면 (표본이 적어 꼬리 분위수를 감쌀 수 없으면) 결측입니다.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        keys, counts, codes, groups = self._sorted_counts(metric, by)
+        n = np.bincount(codes, weights=counts, minlength=len(groups))
+        cum = np.cumsum(counts)
+        start = np.concatenate([[0.0], np.cumsum(n)[:-1]])
+        end = np.searchsorted(cum, np.cumsum(n), side="left")
+        z = stats.norm.ppf(1 - alpha / 2)
+
+        table = pd.DataFrame({"n": n.astype(np.int64)}, index=groups)
+        for q in qs:
+            spread = z * np.sqrt(n * q * (1 - q))
+            label = _label(q)
+            table[label] = self._values_at_ranks(keys, cum, start, end, np.floor(q * (n - 1)))
+            low, high = np.floor(n * q - spread), np.ceil(n * q + spread)
+            table[f"{label}_low"] = np.where(
+                low >= 0, self._values_at_ranks(keys, cum, start, end, np.clip(low, 0, n - 1)), np.nan)
+            table[f"{label}_high"] = np.where(
+                high <= n - 1, self._values_at_ranks(keys, cum, start, end, np.clip(high, 0, n - 1)), np.nan)
+        return table
+
+    def quantiles(self, metric, by=("test_group",), qs=QUANTILES):
+        """그룹별 분위수 -> DataFrame (n, p50, p90, ...)"""
+        table = self.quantile_table(metric, by, qs)
+        return table[["n"] + [_label(q) for q in qs]]
+
+    def quantile_effects(self, metric, by=(), qs=QUANTILES, alpha=0.05,
+                         control="control", treatment="treatment"):
+        """세그먼트 × 분위수별 treatment - control 차이와 신뢰구간
+
+        반환: (by..., quantile) 인덱스 DataFrame
+              (n_control, n_treatment, control, treatment, diff, rel_diff, ci_low, ci_high, p_value)
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        table = self.quantile_table(metric, by + ["test_group"], qs, alpha).reset_index()
+        arms = {}
+        for arm, name in [("control", control), ("treatment", treatment)]:
+            part = table[table["test_group"].astype(str) == name].drop(columns="test_group")
+            arms[arm] = part.set_index(by) if by else part.reset_index(drop=True)
+        c, t = arms["control"].align(arms["treatment"], join="inner", axis=0)
+        z = stats.norm.ppf(1 - alpha / 2)
+
+        frames = []
+        for q in qs:
+            label = _label(q)
+            se_c = (c[f"{label}_high"] - c[f"{label}_low"]) / (2 * z)
+            se_t = (t[f"{label}_high"] - t[f"{label}_low"]) / (2 * z)
+            se = np.sqrt(se_c ** 2 + se_t ** 2)
+            diff = t[label] - c[label]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                p_value = np.where(se > 0, 2 * stats.norm.sf(np.abs(diff / se)), np.nan)
+            frame = pd.DataFrame({
+                "quantile": label,
+                "n_control": c["n"],
+                "n_treatment": t["n"],
+                "control": c[label],
+                "treatment": t[label],
+                "diff": diff,
+                "rel_diff": diff / c[label],
+                "ci_low": diff - z * se,
+                "ci_high": diff + z * se,
+                "p_value": p_value,
+            })
+            frames.append(frame.reset_index(drop=not by))
+        result = pd.concat(frames, ignore_index=True).set_index(by + ["quantile"])
+        if by:
+            result = result.sort_index(level=by, sort_remaining=False, kind="mergesort")
+        return result
+
+
+def merge_sketches(sketches):
+    """여러 스케치를 한 번에 병합"""
+    sketches = list(sketches)
+    if not sketches:
+        raise ValueError("병합할 스케치가 없습니다")
+    first = sketches[0]
+    for other in sketches[1:]:
+        if other.dims != first.dims or other.accuracy != first.accuracy:
+            raise ValueError(f"스케치 구성이 다릅니다: {first.dims} != {other.dims} "
+                             f"또는 {first.accuracy} != {other.accuracy}")
+    if len(sketches) == 1:
+        return first
+    return QuantileSketch(merge_sketch_cells([s.cells for s in sketches], first.dims),
+                          first.dims, first.accuracy)
+
+
+class SketchBuilder:
+    """청크를 받아 스케치를 누적 (observe로 큐브 집계와 같은 스캔에서 사용)"""
+
+    def __init__(self, dims=SKETCH_DIMENSIONS, metrics=SKETCH_METRICS, accuracy=RELATIVE_ACCURACY,
+                 merge_every=MERGE_EVERY):
+        self.dims = list(dims)
+        self.metrics = metrics
+        self.accuracy = accuracy
+        self.merge_every = merge_every
+        self.pending = []
+
+    def update(self, chunk):
+        """청크 하나 누적"""
+        self.pending.append(sketch_cells(chunk, self.dims, self.metrics, self.accuracy))
+        if len(self.pending) >= self.merge_every:
+            self.pending = [merge_sketch_cells(self.pending, self.dims)]
+
+    def observe(self, chunks):
+        """청크를 누적하면서 그대로 다시 내보냄"""
+        for chunk in chunks:
+            self.update(chunk)
+            yield chunk
+
+    def result(self):
+        """누적한 스케치 (청크가 없었으면 None)"""
+        if not self.pending:
+            return None
+        return QuantileSketch(merge_sketch_cells(self.pending, self.dims), self.dims, self.accuracy)
@@ -0,0 +1,399 @@
+"""
+쿼리 백엔드 - 큐브/스케치 집계를 CSV·Parquet 파일에 직접 실행 (pandas / DuckDB / Polars)
+=====================================
+
+그룹 전환율, 디바이스·연령대·지역 피벗, 결제수단 분포, 일별 추이는 모두
+충분통계량 큐브의 rollup이고, 중앙값은 분위수 스케치에서 계산합니다.
+이 모듈은 큐브와 스케치를 만드는 GROUP BY 집계 두 개를 DataFrame 대신
+컬럼형 엔진에서 파일에 바로 실행합니다. 원본 행은 메모리에 올리지 않고
+(큐브 셀 × 통계량) 결과만 pandas로 가져오므로, aggregate() 이후의 결과는
+pandas 경로와 같습니다.
+
+  pandas : 기준 구현 (파일 전체를 읽은 뒤 Cube.from_frame / QuantileSketch.from_frame)
+  duckdb : 내장 DuckDB SQL (read_csv / read_parquet, 다중 스레드 스캔)
+  polars : Polars 지연(lazy) 쿼리 (scan_csv / scan_parquet, 다중 스레드 스캔)
+
+- 프로젝션 pushdown: 큐브 차원과 지표 컬럼만 읽습니다 (customer_id 등은 읽지 않음).
+- 조건 pushdown: filters를 주면 스캔 단계에서 행을 거릅니다. 형식은
+  pandas.read_parquet과 같은 [(컬럼, 연산자, 값), ...] 이며, 연산자는
+  ==, !=, <, <=, >, >=, in, not in 입니다.
+- 셀 통계량 타입과 카테고리 코드표는 pandas 경로와 같게 맞춥니다
+  (건수 int64, 합계/제곱합 float64, 라벨은 schema.py 고정 코드표).
+- duckdb / polars는 선택 의존성이며, 해당 백엔드를 고를 때만 import합니다.
+
+사용법:
+    from query_backend import scan_visitors
+
+    cube, sketch = scan_visitors("../data/raw/ab_test_checkout_ui.csv", backend="duckdb")
+    cube.pivot("device")
+    cube, sketch = scan_visitors(["exp_2024_05.parquet", "exp_2024_06.parquet"], backend="polars",
+                                 filters=[("visit_date", ">=", "2024-05-15"), ("device", "in", ["모바일"])])
+
+    python ab_test_analysis.py --backend duckdb --no-plots
+"""
+
+import datetime
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from cube import CUBE_DIMENSIONS, CUBE_METRICS, STAT_COLUMNS, Cube
+from data_loader import read_csv_typed
+from quantile_sketch import RELATIVE_ACCURACY, SKETCH_DIMENSIONS, SKETCH_METRICS, ZERO_KEY, QuantileSketch
+from schema import TABLE_SCHEMAS, encode_category
+
+
+BACKENDS = ["pandas", "duckdb", "polars"]
+DEFAULT_BACKEND = "pandas"
+
+# 방문자 로그 스키마
+VISITOR_TABLE = "ab_test_checkout_ui"
+
+# 설치 안내 (선택 의존성)
+_INSTALL_HINT = {
+    "duckdb": "pip install duckdb",
+    "polars": "pip install polars",
+}
+
+_OPERATORS = ["==", "!=", "<", "<=", ">", ">=", "in", "not in"]
+
+# CSV 경로(read_csv_typed)의 날짜 해상도 (pandas 버전마다 다르므로 엔진 결과를 여기에 맞춤)
+_DATE_UNIT = pd.to_datetime(pd.Series(["2024-01-01"])).dt.unit
+
+
+# =============================================================================
+# 공통
+# =============================================================================
+def _engine(backend):
+    """선택 의존성 엔진 모듈 import (해당 백엔드를 쓸 때만)"""
+    try:
+        return importlib.import_module(backend)
+    except ImportError as exc:
+        raise ImportError(f"{backend} 백엔드에는 {backend} 패키지가 필요합니다: "
+                          f"{_INSTALL_HINT[backend]}") from exc
+
+
+def _paths(paths):
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    paths = [os.fspath(path) for path in paths]
+    if not paths:
+        raise ValueError("집계할 파일이 없습니다")
+    return paths
+
+
+def _is_parquet(paths):
+    """파일 형식 판별 (확장자 기준, 모든 파일이 같은 형식이어야 함)"""
+    kinds = {os.path.splitext(path)[1].lower() in (".parquet", ".pq") for path in paths}
+    if len(kinds) > 1:
+        raise ValueError("CSV와 Parquet 파일을 함께 집계할 수 없습니다")
+    return kinds.pop()
+
+
+def _check_filters(filters):
+    filters = [tuple(f) for f in (filters or [])]
+    for column, op, _ in filters:
+        if op not in _OPERATORS:
+            raise ValueError(f"지원하지 않는 연산자: {op} ({column})")
+    return filters
+
+
+def _filter_value(column, value, date_type):
+    """날짜 컬럼 조건값을 엔진의 날짜 타입으로 변환 ('2024-05-15' 등)"""
+    if column not in TABLE_SCHEMAS[VISITOR_TABLE]["dates"]:
+        return value
+    if isinstance(value, (list, tuple, set)):
+        return [_filter_value(column, v, date_type) for v in value]
+    value = pd.Timestamp(value)
+    return value.date() if date_type is datetime.date else value
+
+
+def _columns(dims, filters):
+    """스캔할 컬럼 (차원 + 지표 + 조건 컬럼, 나머지는 읽지 않음)"""
+    columns = list(dict.fromkeys(list(dims) + SKETCH_DIMENSIONS + CUBE_METRICS))
+    return columns + [column for column, _, _ in filters if column not in columns]
+
+
+def _cells_frame(frame, dims, stat_columns):
+    """엔진 결과 -> pandas 경로와 같은 타입의 셀 프레임"""
+    frame = frame.reset_index(drop=True)
+    for dim in dims:
+        if dim in TABLE_SCHEMAS[VISITOR_TABLE]["dates"]:
+            frame[dim] = pd.to_datetime(frame[dim]).dt.as_unit(_DATE_UNIT)
+        else:
+            frame[dim] = encode_category(frame[dim].astype(object).astype("category"), dim)
+    for col, dtype in stat_columns.items():
+        frame[col] = frame[col].fillna(0).astype(dtype)
+    return frame[list(dims) + list(stat_columns)]
+
+
+def _stat_types():
+    """큐브 통계량 컬럼 타입 (건수 int64, 합계/제곱합 float64)"""
+    return {col: np.int64 if col == "n" or col.endswith("_n") else np.float64 for col in STAT_COLUMNS}
+
+
+def _log_gamma(accuracy):
+    """로그 버킷 밑 ln γ (quantile_sketch.bucket_keys와 같은 값)"""
+    return float(np.log((1 + accuracy) / (1 - accuracy)))
+
+
+def _sketch_frame(frame, dims, metrics):
+    """엔진 결과 -> sketch_cells와 같은 형식 (차원 + metric + key + count)"""
+    metric = pd.Categorical(frame["metric"].astype(object), categories=list(metrics))
+    cells = _cells_frame(frame, dims, {"key": np.int32, "count": np.int64})
+    cells.insert(len(dims), "metric", metric)
+    return cells
+
+
+# =============================================================================
+# pandas (기준 구현)
+# =============================================================================
+_PANDAS_OPS = {
+    "==": lambda col, v: col == v,
+    "!=": lambda col, v: col != v,
+    "<": lambda col, v: col < v,
+    "<=": lambda col, v: col <= v,
+    ">": lambda col, v: col > v,
+    ">=": lambda col, v: col >= v,
+    "in": lambda col, v: col.isin(v),
+    "not in": lambda col, v: ~col.isin(v),
+}
+
+
+def _filter_frame(df, filters):
+    """조건 적용 (SQL과 같게 결측값 행은 어떤 조건에서도 제외)"""
+    if not filters:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        col = df[column]
+        mask &= (_PANDAS_OPS[op](col, _filter_value(column, value, pd.Timestamp)) & col.notna()).to_numpy()
+    return df[mask]
+
+
+def _read_pandas(path, columns):
+    if not _is_parquet([path]):
+        return read_csv_typed(path, VISITOR_TABLE, usecols=columns)
+    df = pd.read_parquet(path, columns=columns)
+    for col in TABLE_SCHEMAS[VISITOR_TABLE]["dates"]:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col]).dt.as_unit(_DATE_UNIT)
+    for col in TABLE_SCHEMAS[VISITOR_TABLE]["categories"]:
+        if col in df.columns:
+            df[col] = encode_category(df[col], col)
+    return df
+
+
+def _scan_pandas(paths, dims, filters, accuracy, with_sketch):
+    columns = _columns(dims, filters)
+    frames = [_read_pandas(path, columns) for path in paths]
+    df = _filter_frame(frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True), filters)
+    sketch = QuantileSketch.from_frame(df, accuracy=accuracy) if with_sketch else None
+    return Cube.from_frame(df, dims), sketch
+
+
+# =============================================================================
+# DuckDB
+# =============================================================================
+_DUCKDB_TYPES = {"int8": "TINYINT", "int64": "BIGINT", "float64": "DOUBLE"}
+
+
+def _sql_name(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_string(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _duckdb_source(paths):
+    """read_csv / read_parquet 테이블 함수 (CSV는 스키마 타입 지정)
+
+    Parquet의 날짜 컬럼은 문자열/타임스탬프로 저장된 경우도 있으므로 DATE로 맞춥니다.
+    """
+    files = "[" + ", ".join(_sql_string(path) for path in paths) + "]"
+    schema = TABLE_SCHEMAS[VISITOR_TABLE]
+    if _is_parquet(paths):
+        dates = ", ".join(f"CAST({_sql_name(col)} AS DATE) AS {_sql_name(col)}" for col in schema["dates"])
+        return f"(SELECT * REPLACE ({dates}) FROM read_parquet({files}))"
+    types = {col: "VARCHAR" for col in schema["categories"]}
+    types.update({col: "DATE" for col in schema["dates"]})
+    types.update({col: _DUCKDB_TYPES[dtype] for col, dtype in schema["dtypes"].items()})
+    struct = ", ".join(f"{_sql_string(col)}: {_sql_string(kind)}" for col, kind in types.items())
+    return f"read_csv({files}, header = true, types = {{{struct}}})"
+
+
+def _duckdb_where(filters, extra=()):
+    """조건 -> (WHERE 절, 바인딩 값 목록)"""
+    clauses, params = list(extra), []
+    for column, op, value in filters:
+        value = _filter_value(column, value, datetime.date)
+        if op in ("in", "not in"):
+            value = list(value)
+            placeholders = ", ".join("?" * len(value)) or "NULL"
+            clauses.append(f"{_sql_name(column)} {op.upper()} ({placeholders})")
+            params.extend(value)
+        else:
+            clauses.append(f"{_sql_name(column)} {'=' if op == '==' else op} ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _duckdb_dims(dims):
+    dates = TABLE_SCHEMAS[VISITOR_TABLE]["dates"]
+    return ", ".join(f"CAST({_sql_name(dim)} AS {'DATE' if dim in dates else 'VARCHAR'}) AS {_sql_name(dim)}"
+                     for dim in dims)
+
+
+def _scan_duckdb(paths, dims, filters, accuracy, with_sketch, threads):
+    duckdb = _engine("duckdb")
+    source = _duckdb_source(paths)
+    con = duckdb.connect()
+    try:
+        if threads:
+            con.execute(f"SET threads = {int(threads)}")
+
+        stats = ["COUNT(*) AS n"]
+        for metric in CUBE_METRICS:
+            value = f"CAST({_sql_name(metric)} AS DOUBLE)"
+            stats += [f"COUNT({_sql_name(metric)}) AS {metric}_n",
+                      f"SUM({value}) AS {metric}_sum",
+                      f"SUM({value} * {value}) AS {metric}_sumsq"]
+        where, params = _duckdb_where(filters)
+        group = ", ".join(str(k + 1) for k in range(len(dims)))
+        sql = f"SELECT {_duckdb_dims(dims)}, {', '.join(stats)} FROM {source}{where} GROUP BY {group}"
+        cube = Cube(_cells_frame(con.execute(sql, params).df(), dims, _stat_types()), dims)
+        if not with_sketch:
+            return cube, None
+
+        # 로그 버킷 키: bucket_keys와 같은 식 (ceil(ln x / ln γ), 0 이하는 ZERO_KEY)
+        log_gamma = _log_gamma(accuracy)
+        parts, sketch_params = [], []
+        group = ", ".join(str(k + 1) for k in range(len(SKETCH_DIMENSIONS) + 2))
+        for metric, condition in SKETCH_METRICS.items():
+            value = f"CAST({_sql_name(metric)} AS DOUBLE)"
+            extra = [f"{_sql_name(metric)} IS NOT NULL"]
+            if condition is not None:
+                extra.append(f"{_sql_name(condition)} = 1")
+            where, params = _duckdb_where(filters, extra)
+            parts.append(
+                f"SELECT {_duckdb_dims(SKETCH_DIMENSIONS)}, {_sql_string(metric)} AS metric, "
+                f"CASE WHEN {value} > 0 THEN CAST(CEIL(LN({value}) / ?) AS INTEGER) ELSE {ZERO_KEY} END AS key, "
+                f"COUNT(*) AS count FROM {source}{where} GROUP BY {group}"
+            )
+            sketch_params += [log_gamma] + params
+        frame = con.execute(" UNION ALL ".join(parts), sketch_params).df()
+    finally:
+        con.close()
+    sketch = QuantileSketch(_sketch_frame(frame, SKETCH_DIMENSIONS, SKETCH_METRICS), SKETCH_DIMENSIONS, accuracy)
+    return cube, sketch
+
+
+# =============================================================================
+# Polars
+# =============================================================================
+def _polars_frame(pl, paths):
+    """scan_csv / scan_parquet 지연 프레임 (CSV는 스키마 타입 지정)
+
+    Parquet의 날짜 컬럼은 문자열/타임스탬프로 저장된 경우도 있으므로 Date로 맞춥니다.
+    """
+    schema = TABLE_SCHEMAS[VISITOR_TABLE]
+    if _is_parquet(paths):
+        lf = pl.scan_parquet(paths)
+        types = lf.collect_schema()
+        return lf.with_columns([
+            pl.col(col).str.to_date() if types[col] == pl.String else pl.col(col).cast(pl.Date)
+            for col in schema["dates"]
+        ])
+    types = {col: pl.String for col in schema["categories"]}
+    types.update({col: pl.Date for col in schema["dates"]})
+    types.update({col: getattr(pl, dtype.capitalize()) for col, dtype in schema["dtypes"].items()})
+    return pl.scan_csv(paths, schema_overrides=types)
+
+
+def _polars_filter(pl, lf, filters):
+    for column, op, value in filters:
+        col = pl.col(column)
+        value = _filter_value(column, value, datetime.date)
+        if op == "in":
+            expr = col.is_in(list(value))
+        elif op == "not in":
+            expr = ~col.is_in(list(value))
+        else:
+            expr = {"==": col.__eq__, "!=": col.__ne__, "<": col.__lt__, "<=": col.__le__,
+                    ">": col.__gt__, ">=": col.__ge__}[op](value)
+        lf = lf.filter(expr & col.is_not_null())
+    return lf
+
+
+def _polars_dims(pl, dims):
+    dates = TABLE_SCHEMAS[VISITOR_TABLE]["dates"]
+    return [pl.col(dim).cast(pl.Date if dim in dates else pl.String) for dim in dims]
+
+
+def _scan_polars(paths, dims, filters, accuracy, with_sketch):
+    pl = _engine("polars")
+    lf = _polars_filter(pl, _polars_frame(pl, paths), filters)
+
+    stats = [pl.len().alias("n")]
+    for metric in CUBE_METRICS:
+        value = pl.col(metric).cast(pl.Float64)
+        stats += [pl.col(metric).count().alias(f"{metric}_n"),
+                  value.sum().alias(f"{metric}_sum"),
+                  (value * value).sum().alias(f"{metric}_sumsq")]
+    queries = [lf.group_by(_polars_dims(pl, dims)).agg(stats)]
+
+    if with_sketch:
+        log_gamma = _log_gamma(accuracy)
+        parts = []
+        for metric, condition in SKETCH_METRICS.items():
+            value = pl.col(metric).cast(pl.Float64)
+            part = lf.filter(pl.col(metric).is_not_null())
+            if condition is not None:
+                part = part.filter(pl.col(condition) == 1)
+            key = pl.when(value > 0).then((value.log() / log_gamma).ceil()).otherwise(ZERO_KEY)
+            parts.append(
+                part.group_by(_polars_dims(pl, SKETCH_DIMENSIONS) + [pl.lit(metric).alias("metric"),
+                                                                      key.cast(pl.Int32).alias("key")])
+                .agg(pl.len().alias("count"))
+            )
+        queries.append(pl.concat(parts))
+
+    # 큐브/스케치 쿼리를 한 번에 실행 (공통 스캔은 엔진이 공유)
+    frames = [frame.to_pandas() for frame in pl.collect_all(queries)]
+    cube = Cube(_cells_frame(frames[0], dims, _stat_types()), dims)
+    if not with_sketch:
+        return cube, None
+    sketch = QuantileSketch(_sketch_frame(frames[1], SKETCH_DIMENSIONS, SKETCH_METRICS), SKETCH_DIMENSIONS, accuracy)
+    return cube, sketch
+
+
+# =============================================================================
+# 실행
+# =============================================================================
+def scan_visitors(paths, backend=DEFAULT_BACKEND, dims=CUBE_DIMENSIONS, filters=None,
+                  accuracy=RELATIVE_ACCURACY, with_sketch=True, threads=None):
+    """방문자 로그 파일(CSV 또는 Parquet, 여러 개 가능) -> (큐브, 분위수 스케치)
+
+    backend: "pandas" / "duckdb" / "polars" (결과는 세 백엔드가 같음)
+    filters: [(컬럼, 연산자, 값), ...] 스캔 단계 조건 (결측값 행은 제외)
+    with_sketch=False면 큐브만 집계하고 스케치는 None
+    threads: DuckDB 스캔 스레드 수 (None이면 CPU 수, Polars는 POLARS_MAX_THREADS 환경 변수)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 백엔드: {backend} (선택: {', '.join(BACKENDS)})")
+    paths = _paths(paths)
+    dims = list(dims)
+    filters = _check_filters(filters)
+    if backend == "duckdb":
+        return _scan_duckdb(paths, dims, filters, accuracy, with_sketch, threads)
+    if backend == "polars":
+        return _scan_polars(paths, dims, filters, accuracy, with_sketch)
+    return _scan_pandas(paths, dims, filters, accuracy, with_sketch)
+
+
+def scan_cube(paths, backend=DEFAULT_BACKEND, dims=CUBE_DIMENSIONS, filters=None, threads=None):
+    """방문자 로그 파일 -> 큐브만 (예: dims=["test_group", "device"]로 디바이스 피벗용 큐브)"""
+    return scan_visitors(paths, backend, dims, filters, with_sketch=False, threads=threads)[0]
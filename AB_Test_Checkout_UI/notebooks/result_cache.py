@@ -0,0 +1,197 @@
+"""
+결과 캐시 - 입력 지문 기반 분석 단계 메모이제이션
+=====================================
+
+입력 CSV와 분석 옵션이 그대로인데 리포트 문구만 고쳐서 다시 실행할 때,
+큐브 / 분위수 스케치 / 검정 결과(부트스트랩 포함) / 차트를 다시 계산하지 않고
+디스크에 저장해 둔 결과를 그대로 사용합니다.
+
+- 캐시 키 = 단계 이름 + 입력 지문 + 파라미터 + 분석 코드 지문의 해시.
+  입력 지문은 원본 파일 지문(data_loader.file_fingerprint) 또는 앞 단계의 키이므로,
+  원본 CSV가 바뀌면 그 뒤의 모든 단계 키가 함께 바뀝니다 (load → analyze → plots).
+- 분석 코드 지문은 단계가 의존하는 모듈(code)만의 구문 트리 해시입니다.
+  주석/서식 변경과 exclude로 지정한 함수(리포트 출력 등)는 지문에 들어가지 않으므로,
+  리포트 문구나 데이터 생성/벤치마크 스크립트를 고쳐도 결과는 그대로 적중합니다.
+  code를 주지 않으면 이 폴더의 .py 파일 전체를 사용합니다.
+- 항목 하나가 pickle 파일 하나(`<단계>.<키>.pkl`)이며 임시 파일에 쓴 뒤
+  os.replace로 교체합니다 (여러 프로세스가 같은 폴더를 써도 안전).
+- 적중할 때마다 파일 수정시각을 갱신하고, 저장 후 전체 크기가 max_bytes를
+  넘으면 가장 오래 사용하지 않은 항목부터 지웁니다 (LRU).
+- 적중/누락은 계측 카운터(result_cache_hits / result_cache_misses)로 기록됩니다.
+
+사용법:
+    from result_cache import ResultCache
+
+    cache = ResultCache("../outputs/.cache/results", max_bytes=256 * 1024 ** 2)
+    key = cache.key("analyze", inputs=[data_key], params={"bootstrap_replicates": 2000},
+                    code=["bootstrap", "significance"])
+    results = cache.get("analyze", key)
+    if results is None:
+        results = analyze(data)
+        cache.put("analyze", key, results)
+
+    python ab_test_analysis.py --result-cache ../outputs/.cache/results
+"""
+
+import ast
+import hashlib
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+
+from instrumentation import count
+
+
+# 저장 형식이 바뀌면 올려서 기존 캐시를 모두 무효화
+RESULT_CACHE_VERSION = 1
+
+# 기본 최대 크기 (바이트)
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+# 분석 코드 폴더 (코드 지문 대상)
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_SUFFIX = ".pkl"
+
+
+# =============================================================================
+# 캐시 키
+# =============================================================================
+@lru_cache(maxsize=None)
+def _module_digest(path, exclude):
+    """모듈 하나의 구문 트리 해시 (exclude 함수 제외, 단계가 여러 개여도 파일당 한 번 파싱)"""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read())
+    tree.body = [node for node in tree.body
+                 if not (isinstance(node, ast.FunctionDef) and node.name in exclude)]
+    return hashlib.blake2b(ast.dump(tree).encode(), digest_size=8).digest()
+
+
+@lru_cache(maxsize=32)
+def code_fingerprint(modules=None, exclude=(), folder=CODE_DIR):
+    """분석 코드 지문 (모듈 이름 + 구문 트리 해시, 조합마다 프로세스당 한 번)
+
+    modules: 모듈 이름 튜플 (None이면 폴더 안 .py 전체)
+    exclude: 지문에서 뺄 최상위 함수 이름 튜플 (결과에 영향이 없는 리포트 출력 등)
+    """
+    if modules is None:
+        modules = tuple(fname[:-3] for fname in os.listdir(folder) if fname.endswith(".py"))
+    digest = hashlib.blake2b(digest_size=8)
+    for name in sorted(modules):
+        digest.update(name.encode() + b"\0" + _module_digest(os.path.join(folder, f"{name}.py"), exclude))
+    return digest.hexdigest()
+
+
+def cache_key(stage, inputs=(), params=None, code=None, exclude=()):
+    """단계 이름 + 입력 지문 목록 + 파라미터 + 의존 모듈 코드 -> 캐시 키 (16진수 32자)
+
+    params는 repr이 결정적인 값(숫자, 문자열, 튜플/리스트 등)만 담아야 합니다.
+    code / exclude는 code_fingerprint의 modules / exclude입니다.
+    """
+    fingerprint = code_fingerprint(None if code is None else tuple(code), tuple(exclude))
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{RESULT_CACHE_VERSION}:{fingerprint}:{stage}".encode())
+    for item in inputs:
+        digest.update(b"\0" + str(item).encode())
+    for name, value in sorted((params or {}).items()):
+        digest.update(f"\0{name}={value!r}".encode())
+    return digest.hexdigest()
+
+
+# =============================================================================
+# 캐시 저장소
+# =============================================================================
+class ResultCache:
+    """단계 결과를 pickle 파일로 저장하는 크기 제한 LRU 캐시"""
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, stage, inputs=(), params=None, code=None, exclude=()):
+        return cache_key(stage, inputs, params, code, exclude)
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}.{key}{_SUFFIX}")
+
+    def get(self, stage, key, default=None):
+        """저장된 결과 (없거나 읽을 수 없으면 default)"""
+        path = self._path(stage, key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            value = None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # 손상되었거나 클래스 구조가 바뀐 항목은 지우고 누락으로 처리
+            self._remove(path)
+            value = None
+        else:
+            try:
+                os.utime(path)  # LRU 순서 갱신
+            except OSError:
+                pass
+            self.hits += 1
+            count("result_cache_hits")
+            return value
+        self.misses += 1
+        count("result_cache_misses")
+        return default
+
+    def put(self, stage, key, value):
+        """결과 저장 (원자적 교체) 후 크기 제한 초과분 정리"""
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(stage, key))
+        except BaseException:
+            self._remove(tmp)
+            raise
+        self.evict()
+        return value
+
+    def entries(self):
+        """캐시 항목 목록 [(최근 사용 시각, 크기, 경로)] (오래된 순)"""
+        entries = []
+        for fname in os.listdir(self.cache_dir):
+            if not fname.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, fname)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """전체 크기가 max_bytes 이하가 될 때까지 오래 사용하지 않은 항목 삭제 -> 삭제 수"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        return self.evict(0)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
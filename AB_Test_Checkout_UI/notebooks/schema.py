@@ -0,0 +1,248 @@
+"""
+스키마 - 테이블 타입 정의 / 고정 코드표 / 압축 표현
+=====================================
+
+입력 테이블 6종의 컬럼 타입과, 메모리를 줄이기 위한 압축(compact) 표현을
+정의합니다.
+
+- 코드표(CODE_TABLES): 지역/연령대/성별/디바이스/그룹/결제수단/주문상태/
+  카테고리 라벨의 고정 순서 목록입니다. 모든 테이블·파일·청크가 같은 코드를
+  쓰므로 청크별 큐브나 실험별 결과를 합쳐도 카테고리가 어긋나지 않습니다.
+  (순서는 가나다순이라 pandas가 추론하는 순서와 같고, 코드표에 없는 라벨은
+  경고 후 뒤에 추가됩니다.)
+- 압축 표현(compact_frame):
+  * customer_id / order_id / product_id ('CUST_000001' 등)를 정수 키로 변환
+    (int32, 범위를 넘으면 int64)
+  * 숫자 컬럼을 값이 손실되지 않는 가장 작은 타입으로 변환
+    (정수 -> int8/16/32, 실수 -> 왕복 변환이 정확할 때만 float32)
+  집계(큐브, 부트스트랩)는 float64로 변환해 계산하므로 결과는 같습니다.
+
+사용법:
+    from schema import compact_frame, format_int_key, frame_bytes
+
+    compact = compact_frame(ab_test, "ab_test_checkout_ui")
+    print(frame_bytes(ab_test) / frame_bytes(compact))
+    format_int_key(compact["customer_id"], "customer_id")   # -> 'CUST_000001'
+
+    python schema.py --data-path ../data/raw/    # 테이블별 메모리 비교
+"""
+
+import argparse
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+# ID 컬럼 -> (접두사, 숫자 자릿수)
+ID_FORMATS = {
+    "customer_id": ("CUST_", 6),
+    "order_id": ("ORD_", 7),
+    "product_id": ("PROD_", 5),
+}
+
+# 라벨 컬럼별 고정 코드표 (가나다순)
+CODE_TABLES = {
+    "region": [
+        "강원", "경기", "경남", "경북", "광주", "대구", "대전", "부산", "서울",
+        "세종", "울산", "인천", "전남", "전북", "제주", "충남", "충북",
+    ],
+    "age_group": ["20대", "30대", "40대", "50대", "60대 이상"],
+    "gender": ["남성", "여성"],
+    "device": ["데스크톱", "모바일", "태블릿"],
+    "test_group": ["control", "treatment"],
+    "payment_method": ["네이버페이", "무통장입금", "신용카드", "카카오페이", "토스페이", "휴대폰결제"],
+    "order_status": ["결제완료", "배송완료", "배송중", "취소"],
+    "category": ["도서", "뷰티", "생활용품", "스포츠", "식품", "전자제품", "패션의류", "패션잡화"],
+}
+
+# 테이블별 스키마 정의
+#   ids: 정수 키로 변환할 ID 컬럼 (compact)
+#   categories: 사전 인코딩할 라벨 컬럼
+#   dates: 날짜 타입으로 변환할 컬럼
+#   datetimes: 일시 타입으로 변환할 컬럼
+#   dtypes: 숫자 컬럼 타입 (compact에서는 더 작은 타입으로 변환)
+TABLE_SCHEMAS = {
+    "kr_customers": {
+        "ids": ["customer_id"],
+        "categories": ["region", "age_group", "gender", "device"],
+        "dates": ["signup_date"],
+        "datetimes": [],
+        "dtypes": {},
+    },
+    "kr_orders": {
+        "ids": ["order_id", "customer_id"],
+        "categories": ["order_status"],
+        "dates": ["order_date"],
+        "datetimes": ["order_datetime"],
+        "dtypes": {},
+    },
+    "kr_products": {
+        "ids": ["product_id"],
+        "categories": ["category"],
+        "dates": [],
+        "datetimes": [],
+        "dtypes": {"price": "int64"},
+    },
+    "kr_order_items": {
+        "ids": ["order_id", "product_id"],
+        "categories": [],
+        "dates": [],
+        "datetimes": [],
+        "dtypes": {
+            "item_seq": "int64",
+            "quantity": "int64",
+            "unit_price": "int64",
+            "total_price": "int64",
+        },
+    },
+    "kr_payments": {
+        "ids": ["order_id"],
+        "categories": ["payment_method"],
+        "dates": [],
+        "datetimes": [],
+        "dtypes": {
+            "subtotal": "int64",
+            "shipping_fee": "int64",
+            "discount": "float64",
+            "total_amount": "float64",
+        },
+    },
+    "ab_test_checkout_ui": {
+        "ids": ["customer_id"],
+        "categories": [
+            "region", "age_group", "gender", "device",
+            "test_group", "payment_method",
+        ],
+        "dates": ["visit_date"],
+        "datetimes": [],
+        "dtypes": {
+            "converted": "int8",
+            "order_value": "int64",
+            "checkout_time_sec": "float64",
+        },
+    },
+}
+
+TABLE_NAMES = list(TABLE_SCHEMAS)
+
+_INT32_MAX = np.iinfo(np.int32).max
+
+
+# =============================================================================
+# ID <-> 정수 키
+# =============================================================================
+def parse_int_key(values, prefix):
+    """'CUST_000001' 같은 접두사 + 숫자 ID를 정수 키 배열로 변환
+
+    문자열 병합 대신 정수 키로 조인/인덱싱할 때 사용합니다.
+    이미 정수 키로 변환된 컬럼(compact)은 그대로 int64 배열로 반환합니다.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.to_numpy(dtype=np.int64)
+    return values.str.slice(len(prefix)).astype(np.int64).to_numpy()
+
+
+def int_key_column(values, column):
+    """ID 컬럼 -> 가장 작은 정수 키 배열 (int32, 범위를 넘으면 int64)"""
+    keys = parse_int_key(values, ID_FORMATS[column][0])
+    if keys.size and keys.min() >= 0 and keys.max() <= _INT32_MAX:
+        return keys.astype(np.int32)
+    return keys
+
+
+def format_int_key(keys, column):
+    """정수 키 -> 원래 ID 문자열 ('CUST_000001', 출력/저장용)"""
+    prefix, width = ID_FORMATS[column]
+    return pd.Series(keys).astype(str).str.zfill(width).radd(prefix)
+
+
+# =============================================================================
+# 코드표 / 타입 축소
+# =============================================================================
+def encode_category(values, column):
+    """라벨 컬럼을 고정 코드표 순서의 카테고리로 변환 (코드표에 없으면 뒤에 추가)"""
+    table = CODE_TABLES.get(column)
+    values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+    if table is None:
+        return values
+    known = set(table)
+    unknown = sorted(str(c) for c in values.cat.categories if c not in known)
+    if unknown:
+        warnings.warn(f"{column}: 코드표에 없는 라벨 {unknown} (코드표 뒤에 추가)")
+    return values.cat.set_categories(table + unknown)
+
+
+def encode_categories(df, name):
+    """스키마의 라벨 컬럼을 모두 고정 코드표로 변환"""
+    for col in TABLE_SCHEMAS[name]["categories"]:
+        if col in df.columns:
+            df[col] = encode_category(df[col], col)
+    return df
+
+
+def downcast_numeric(values):
+    """값이 손실되지 않는 가장 작은 숫자 타입으로 변환
+
+    정수는 int8/16/32 중 범위에 맞는 타입으로, 실수는 float32로 왕복 변환했을
+    때 값(결측 포함)이 그대로일 때만 float32로 바꿉니다.
+    """
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return pd.to_numeric(values, downcast="integer")
+    if pd.api.types.is_float_dtype(values.dtype) and values.dtype != np.float32:
+        original = values.to_numpy(dtype=np.float64)
+        narrowed = original.astype(np.float32)
+        if np.array_equal(narrowed.astype(np.float64), original, equal_nan=True):
+            return pd.Series(narrowed, index=values.index, name=values.name)
+    return values
+
+
+def compact_frame(df, name):
+    """테이블을 압축 표현으로 변환 (ID -> 정수 키, 고정 코드표, 숫자 타입 축소)"""
+    schema = TABLE_SCHEMAS[name]
+    out = df.copy(deep=False)
+    for col in schema["ids"]:
+        if col in out.columns:
+            out[col] = int_key_column(out[col], col)
+    encode_categories(out, name)
+    for col in schema["dtypes"]:
+        if col in out.columns:
+            out[col] = downcast_numeric(out[col])
+    return out
+
+
+def frame_bytes(df):
+    """문자열 포함 실제 메모리 사용량 (바이트)"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def main(argv=None):
+    from data_loader import read_csv_typed
+
+    parser = argparse.ArgumentParser(description="테이블별 메모리 사용량 비교 (기본 vs 압축)")
+    parser.add_argument("--data-path", default="../data/raw/", help="입력 CSV 폴더")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("🗜️ 압축 스키마 메모리 비교")
+    print("=" * 60)
+    print(f"\n{'테이블':<22} {'행 수':>12} {'기본(MB)':>10} {'압축(MB)':>10} {'배율':>7}")
+    total_before = total_after = 0
+    for name in TABLE_NAMES:
+        path = os.path.join(args.data_path, f"{name}.csv")
+        if not os.path.exists(path):
+            continue
+        df = read_csv_typed(path, name)
+        before, after = frame_bytes(df), frame_bytes(compact_frame(df, name))
+        total_before += before
+        total_after += after
+        print(f"{name:<22} {len(df):>12,} {before / 2**20:>10.2f} {after / 2**20:>10.2f} {before / after:>6.1f}x")
+    if total_after:
+        print(f"{'합계':<22} {'':>12} {total_before / 2**20:>10.2f} {total_after / 2**20:>10.2f} "
+              f"{total_before / total_after:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
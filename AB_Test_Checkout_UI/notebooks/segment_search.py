@@ -0,0 +1,199 @@
+"""
+세그먼트 탐색 - 다차원 세그먼트 조합의 이질적 처리 효과(HTE) 순위
+=====================================
+
+지역 × 연령대 × 성별 × 디바이스 (× 결제수단) 차원의 모든 조합
+(예: "region=울산 / age_group=20대", "device=모바일 / gender=여성")에 대해
+세그먼트 안의 처리 효과가 나머지(여집합)의 처리 효과와 얼마나 다른지 계산하고,
+차이가 크고 믿을 만한 세그먼트 순서로 정렬합니다.
+
+- 큐브를 탐색 차원의 가장 세밀한 셀로 한 번만 rollup 하고, 차원 조합마다
+  셀 코드를 정수 키로 합쳐 np.bincount로 (세그먼트 × 그룹) 합계를 만듭니다
+  (조합마다 groupby 하지 않음).
+- 최소 지지도(그룹별 최소 표본 수) 가지치기: 지지도는 차원을 추가할수록
+  줄어들므로(anti-monotone) 지지도를 통과한 세그먼트가 하나도 없는 조합의
+  상위 조합은 탐색하지 않고, 통과하지 못한 셀은 검정하지 않습니다.
+- 효과/분산은 세그먼트 배열 전체에 대해 한 번에 계산합니다.
+    hte = (세그먼트 효과) - (여집합 효과),  Var = 두 효과 분산의 합
+- 검정한 세그먼트 전체에 다중비교 보정(기본 BH)을 적용하고, 경험적 베이즈
+  축소 추정값(hte_shrunk)으로 순위를 매겨 표본이 작은 세그먼트의 우연한 큰
+  차이가 위로 올라오지 않게 합니다.
+
+결제수단은 전환 고객에만 있으므로 객단가(aov) 탐색에서만 차원으로 사용합니다.
+
+사용법:
+    from segment_search import search_segments
+
+    search_segments(cube, metric="conversion", min_support=100).head(10)
+    search_segments(cube, metric="aov", max_order=2)
+"""
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from multiarm import METRICS
+from significance import adjust_pvalues
+
+
+# 탐색 차원 (지표별)
+SEARCH_DIMENSIONS = {
+    "conversion": ["region", "age_group", "gender", "device"],
+    "aov": ["region", "age_group", "gender", "device", "payment_method"],
+}
+
+# 그룹별 최소 표본 수 (전환율: 방문자, 객단가: 전환 고객)
+MIN_SUPPORT = {"conversion": 100, "aov": 30}
+
+ALPHA = 0.05
+
+
+# =============================================================================
+# 세그먼트 집계
+# =============================================================================
+def _base_cells(cube, dims, metric, control, treatment):
+    """탐색 차원의 가장 세밀한 셀 -> (차원별 코드, 라벨, 그룹 코드, 통계량 배열)"""
+    _, n_col, sum_col, sumsq_col = METRICS[metric]
+    cells = cube.rollup(dims + ["test_group"])[[n_col, sum_col, sumsq_col]].reset_index()
+    arm = pd.Categorical(cells["test_group"], categories=[control, treatment]).codes
+    cells = cells[arm >= 0]
+    arm = arm[arm >= 0].astype(np.int64)
+
+    codes, labels = [], []
+    for dim in dims:
+        code, uniques = pd.factorize(cells[dim], sort=True)
+        codes.append(code.astype(np.int64))
+        labels.append(np.asarray(uniques.astype(str), dtype=object))
+    values = [cells[col].to_numpy(dtype=float) for col in (n_col, sum_col, sumsq_col)]
+    return codes, labels, arm, values
+
+
+def _segment_sums(codes, labels, arm, values, subset):
+    """차원 조합 하나 -> 세그먼트 키 순서의 (세그먼트 × 그룹) 건수/합계/제곱합
+
+    결측 라벨(코드 -1)이 있는 셀은 해당 조합에서 제외합니다.
+    """
+    key = np.zeros(arm.size, dtype=np.int64)
+    size = 1
+    valid = np.ones(arm.size, dtype=bool)
+    for d in subset:
+        valid &= codes[d] >= 0
+        key = key * len(labels[d]) + np.maximum(codes[d], 0)
+        size *= len(labels[d])
+    slot = (key * 2 + arm)[valid]
+    return [np.bincount(slot, weights=v[valid], minlength=size * 2).reshape(size, 2) for v in values]
+
+
+def _decode(keys, labels, subset):
+    """세그먼트 키 -> 차원별 라벨 배열"""
+    decoded = {}
+    for d in reversed(subset):
+        card = len(labels[d])
+        decoded[d] = labels[d][keys % card]
+        keys = keys // card
+    return decoded
+
+
+# =============================================================================
+# 효과 / 분산
+# =============================================================================
+def _effect(kind, n, total, sumsq):
+    """(세그먼트 × 그룹) 합계 -> 그룹별 평균, 처리 효과(treatment - control)와 분산"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / n
+        if kind == "proportion":
+            var_mean = mean * (1 - mean) / n
+        else:
+            var_mean = np.clip((sumsq - total * mean) / (n - 1), 0, None) / n
+    return mean, mean[:, 1] - mean[:, 0], var_mean.sum(axis=1)
+
+
+def _shrink(hte, se):
+    """경험적 베이즈 축소: hte ~ N(0, τ²) 사전분포, τ²는 적률법 추정"""
+    tau2 = max(float(np.var(hte) - np.mean(se ** 2)), 0.0) if hte.size else 0.0
+    return hte * tau2 / (tau2 + se ** 2)
+
+
+def search_segments(cube, metric="conversion", dims=None, max_order=None, min_support=None,
+                    control="control", treatment="treatment", alpha=ALPHA, correction="bh"):
+    """차원 조합 세그먼트 전체의 이질적 처리 효과를 계산해 순위순으로 반환
+
+    max_order: 조합할 최대 차원 수 (None이면 전체)
+    min_support: 세그먼트와 여집합 모두 그룹별 표본 수가 이 값 이상인 셀만 검정
+    반환: 세그먼트 1행 (dims 컬럼은 조합에 없는 차원이면 빈 값), hte_shrunk 절댓값 내림차순
+    """
+    if metric not in SEARCH_DIMENSIONS:
+        raise ValueError(f"지원하지 않는 지표: {metric}")
+    dims = list(SEARCH_DIMENSIONS[metric] if dims is None else dims)
+    max_order = len(dims) if max_order is None else min(max_order, len(dims))
+    min_support = MIN_SUPPORT[metric] if min_support is None else min_support
+    kind = METRICS[metric][0]
+
+    codes, labels, arm, values = _base_cells(cube, dims, metric, control, treatment)
+    totals = [np.bincount(arm, weights=v, minlength=2) for v in values]
+
+    found = []
+    alive = {(): True}
+    for order in range(1, max_order + 1):
+        for subset in combinations(range(len(dims)), order):
+            # 가지치기: 한 차원을 뺀 상위 조합 중 지지도를 통과한 세그먼트가 없는 것이 있으면 생략
+            if not all(alive.get(parent, False) for parent in combinations(subset, order - 1)):
+                alive[subset] = False
+                continue
+            n, total, sumsq = _segment_sums(codes, labels, arm, values, subset)
+            rest = [t[None, :] - s for t, s in zip(totals, (n, total, sumsq))]
+            supported = (n.min(axis=1) >= min_support) & (rest[0].min(axis=1) >= min_support)
+            alive[subset] = bool(supported.any())
+            if not alive[subset]:
+                continue
+            keys = np.flatnonzero(supported)
+            mean, effect, var = _effect(kind, n[keys], total[keys], sumsq[keys])
+            _, rest_effect, rest_var = _effect(kind, *(r[keys] for r in rest))
+            found.append({
+                "subset": subset,
+                "keys": keys,
+                "n": n[keys],
+                "mean": mean,
+                "effect": effect,
+                "var": var,
+                "rest_effect": rest_effect,
+                "rest_var": rest_var,
+            })
+
+    columns = dims + ["segment", "order", "n_control", "n_treatment", "control", "treatment",
+                      "effect", "effect_se", "lift", "rest_effect", "hte", "hte_se", "z",
+                      "p_value", "p_adjusted", "significant", "hte_shrunk"]
+    if not found:
+        return pd.DataFrame(columns=columns)
+
+    frames = []
+    for block in found:
+        subset, keys = block["subset"], block["keys"]
+        decoded = _decode(keys, labels, subset)
+        frame = pd.DataFrame({dims[d]: decoded.get(d, "") for d in range(len(dims))},
+                             index=range(keys.size))
+        frame["segment"] = [" / ".join(f"{dims[d]}={decoded[d][i]}" for d in subset) for i in range(keys.size)]
+        frame["order"] = len(subset)
+        frame["n_control"] = block["n"][:, 0].round().astype(np.int64)
+        frame["n_treatment"] = block["n"][:, 1].round().astype(np.int64)
+        frame["control"] = block["mean"][:, 0]
+        frame["treatment"] = block["mean"][:, 1]
+        frame["effect"] = block["effect"]
+        frame["effect_se"] = np.sqrt(block["var"])
+        frame["rest_effect"] = block["rest_effect"]
+        frame["hte"] = block["effect"] - block["rest_effect"]
+        frame["hte_se"] = np.sqrt(block["var"] + block["rest_var"])
+        frames.append(frame)
+    out = pd.concat(frames, ignore_index=True)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["lift"] = out["effect"] / out["control"]
+        out["z"] = out["hte"] / out["hte_se"]
+    out["p_value"] = 2 * stats.norm.sf(np.abs(out["z"]))
+    out["p_adjusted"] = adjust_pvalues(out["p_value"].to_numpy(), method=correction)
+    out["significant"] = out["p_adjusted"] < alpha
+    out["hte_shrunk"] = _shrink(out["hte"].to_numpy(), out["hte_se"].to_numpy())
+    order = np.argsort(-np.abs(out["hte_shrunk"].to_numpy()), kind="stable")
+    return out.iloc[order][columns].reset_index(drop=True)
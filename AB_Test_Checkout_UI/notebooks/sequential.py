@@ -0,0 +1,223 @@
+"""
+순차 검정 모니터 - 일별 누적 전환 시리즈 증분 업데이트
+=====================================
+
+실험 기간 중 매일(또는 매시간) 결과를 확인해도 1종 오류가 부풀지 않도록
+두 가지 순차 검정을 제공합니다. 두 방법 모두 누적 건수와 작은 상태만 들고
+있으므로, 새로 들어온 하루치 건수만 넘기면 과거 데이터를 다시 읽지 않고
+O(1)로 판정이 갱신됩니다.
+
+1) mSPRT (mixture Sequential Probability Ratio Test)
+   - 정규 혼합 사전분포(분산 tau²)를 사용한 항상 유효한(always-valid) p-value
+   - 언제 확인하든, 몇 번을 확인하든 p-value < alpha 이면 중단 가능
+
+2) O'Brien-Fleming 형 alpha spending (Lan-DeMets)
+   - 계획 표본 수 대비 정보 비율 t에서 누적 alpha를 2 - 2Φ(z_{α/2}/√t)만큼 사용
+   - 경계값은 이전 확인 시점까지의 연속 영역 밀도(격자)만으로 재귀 계산
+   - 기록의 obf_boundary_z:
+       inf: 초기 확인에서 누적 alpha 사용량이 0으로 언더플로(t가 매우 작음)해
+            이번 확인에 쓸 alpha가 없음 -> 이 시점에는 기각 불가
+       NaN: 경계를 계산하지 않은 확인 (이미 중단했거나 정보 비율이 늘지 않음)
+
+사용법:
+    from sequential import SequentialMonitor
+
+    monitor = SequentialMonitor(planned_n=20_000)
+    for day, row in daily_counts.iterrows():
+        decision = monitor.update(n_a, x_a, n_b, x_b, label=day)
+    monitor.to_dict()   # 상태 저장 (JSON 직렬화 가능)
+"""
+
+import numpy as np
+from scipy import optimize, stats
+
+
+# 경계 재귀 계산용 격자 크기 (연속 영역 [-b, b]를 나누는 점 수)
+GRID_POINTS = 401
+
+
+def lan_demets_obf(t, alpha=0.05):
+    """O'Brien-Fleming 형 Lan-DeMets 누적 alpha 사용량 (양측)"""
+    t = np.clip(np.asarray(t, dtype=float), 1e-12, 1.0)
+    return 2 - 2 * stats.norm.cdf(stats.norm.ppf(1 - alpha / 2) / np.sqrt(t))
+
+
+def msprt_lambda(diff, variance, tau):
+    """정규 혼합 SPRT 우도비 Λ (차이 추정치 diff, 추정 분산 variance)"""
+    diff = np.asarray(diff, dtype=float)
+    variance = np.asarray(variance, dtype=float)
+    tau2 = tau ** 2
+    return np.sqrt(variance / (variance + tau2)) * np.exp(
+        tau2 * diff ** 2 / (2 * variance * (variance + tau2))
+    )
+
+
+class SequentialMonitor:
+    """일별 증분으로 갱신되는 순차 검정 모니터 (control=A, treatment=B)"""
+
+    def __init__(self, planned_n, alpha=0.05, tau=0.02):
+        self.planned_n = planned_n
+        self.alpha = alpha
+        self.tau = tau
+
+        # 누적 건수
+        self.n_a = 0
+        self.x_a = 0
+        self.n_b = 0
+        self.x_b = 0
+
+        # mSPRT 상태: 지금까지의 최소 p-value (항상 유효한 p-value는 단조 감소)
+        self.msprt_p = 1.0
+
+        # alpha spending 상태: 직전 확인 시점 정보 비율, 사용한 alpha,
+        # 연속 영역의 부분 밀도 (Brownian 척도 S = Z√t 위의 격자)
+        self.last_t = 0.0
+        self.spent_alpha = 0.0
+        self.grid = None
+        self.density = None
+        self.stopped = False
+
+        self.looks = 0
+        self.history = []
+
+    # ------------------------------------------------------------------
+    # 갱신
+    # ------------------------------------------------------------------
+    def update(self, n_a, x_a, n_b, x_b, label=None):
+        """새로 들어온 구간(예: 하루)의 방문자/전환 수를 더하고 판정 갱신"""
+        self.n_a += int(n_a)
+        self.x_a += int(x_a)
+        self.n_b += int(n_b)
+        self.x_b += int(x_b)
+        self.looks += 1
+
+        diff, variance = self._estimate()
+        z = diff / np.sqrt(variance) if variance > 0 else 0.0
+
+        # 1) mSPRT
+        if variance > 0:
+            lam = float(msprt_lambda(diff, variance, self.tau))
+            self.msprt_p = min(self.msprt_p, 1.0 / lam if lam > 0 else 1.0)
+
+        # 2) alpha spending
+        t = min((self.n_a + self.n_b) / self.planned_n, 1.0)
+        boundary = np.nan
+        if not self.stopped and t > self.last_t:
+            boundary = self._spend(t)
+        obf_reject = bool(np.isfinite(boundary) and abs(z) >= boundary)
+        if obf_reject:
+            self.stopped = True
+
+        decision = {
+            "look": self.looks,
+            "label": label,
+            "n_control": self.n_a,
+            "n_treatment": self.n_b,
+            "rate_control": self.x_a / self.n_a if self.n_a else np.nan,
+            "rate_treatment": self.x_b / self.n_b if self.n_b else np.nan,
+            "diff": diff,
+            "z": z,
+            "msprt_p_value": self.msprt_p,
+            "msprt_reject": self.msprt_p < self.alpha,
+            "info_fraction": t,
+            "spent_alpha": self.spent_alpha,
+            "obf_boundary_z": boundary,
+            "obf_reject": obf_reject or self.stopped,
+        }
+        self.history.append(decision)
+        return decision
+
+    def _estimate(self):
+        """전환율 차이와 (비합동) 분산 추정"""
+        if self.n_a == 0 or self.n_b == 0:
+            return 0.0, 0.0
+        p_a = self.x_a / self.n_a
+        p_b = self.x_b / self.n_b
+        variance = p_a * (1 - p_a) / self.n_a + p_b * (1 - p_b) / self.n_b
+        return p_b - p_a, variance
+
+    def _spend(self, t):
+        """정보 비율 t에서 이번 확인에 쓸 alpha를 계산해 Z 경계값 반환"""
+        target = float(lan_demets_obf(t, self.alpha))
+        increment = target - self.spent_alpha
+        delta = t - self.last_t
+        sd = np.sqrt(delta)
+
+        if self.density is None:
+            # 첫 확인: S_1 ~ N(0, t)
+            def exceed(b):
+                return 2 * stats.norm.sf(b / sd)
+        else:
+            weights = self.density * self._grid_step()
+
+            def exceed(b):
+                return float(np.sum(weights * (
+                    stats.norm.cdf((-b - self.grid) / sd) + stats.norm.sf((b - self.grid) / sd)
+                )))
+
+        if increment <= 0:
+            b = np.inf
+        else:
+            # exceed(b)는 b에 대해 단조 감소
+            hi = 10.0 * np.sqrt(t) + 10.0
+            if exceed(1e-9) <= increment:
+                b = 1e-9
+            else:
+                b = optimize.brentq(lambda v: exceed(v) - increment, 1e-9, hi, xtol=1e-10)
+
+        self.spent_alpha += exceed(b) if np.isfinite(b) else 0.0
+
+        # 연속 영역의 새 부분 밀도 계산 (다음 확인의 재귀 입력)
+        bound = b if np.isfinite(b) else 10.0 * np.sqrt(t) + 10.0
+        new_grid = np.linspace(-bound, bound, GRID_POINTS)
+        if self.density is None:
+            new_density = stats.norm.pdf(new_grid / sd) / sd
+        else:
+            kernel = stats.norm.pdf((new_grid[:, None] - self.grid[None, :]) / sd) / sd
+            new_density = kernel @ (self.density * self._grid_step())
+
+        self.grid = new_grid
+        self.density = new_density
+        self.last_t = t
+        return b / np.sqrt(t)
+
+    def _grid_step(self):
+        """사다리꼴 적분 가중치"""
+        step = self.grid[1] - self.grid[0]
+        weights = np.full(self.grid.shape, step)
+        weights[0] = weights[-1] = step / 2
+        return weights
+
+    # ------------------------------------------------------------------
+    # 상태 저장/복원
+    # ------------------------------------------------------------------
+    def to_dict(self):
+        """상태를 JSON 직렬화 가능한 딕셔너리로 변환"""
+        return {
+            "planned_n": self.planned_n,
+            "alpha": self.alpha,
+            "tau": self.tau,
+            "n_a": self.n_a,
+            "x_a": self.x_a,
+            "n_b": self.n_b,
+            "x_b": self.x_b,
+            "msprt_p": self.msprt_p,
+            "last_t": self.last_t,
+            "spent_alpha": self.spent_alpha,
+            "grid": None if self.grid is None else self.grid.tolist(),
+            "density": None if self.density is None else self.density.tolist(),
+            "stopped": self.stopped,
+            "looks": self.looks,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """to_dict로 저장한 상태에서 모니터 복원 (history는 복원하지 않음)"""
+        monitor = cls(state["planned_n"], alpha=state["alpha"], tau=state["tau"])
+        for key in ("n_a", "x_a", "n_b", "x_b", "msprt_p", "last_t",
+                    "spent_alpha", "stopped", "looks"):
+            setattr(monitor, key, state[key])
+        if state["grid"] is not None:
+            monitor.grid = np.asarray(state["grid"])
+            monitor.density = np.asarray(state["density"])
+        return monitor
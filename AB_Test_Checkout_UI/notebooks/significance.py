@@ -0,0 +1,183 @@
+"""
+벡터화 유의성 검정 - 세그먼트 셀 일괄 검정
+=====================================
+
+세그먼트 셀마다 반복문으로 검정하지 않고, 큐브에서 뽑은 (방문자 수, 전환 수)
+배열 전체에 대해 NumPy 배열 연산 한 번으로 다음을 계산합니다.
+
+- 두 비율 Z-검정 (합동 표준오차)
+- 2×2 Chi-square 통계량 (scipy.stats.chi2_contingency와 같은 Yates 보정)
+- 그룹별 전환율 신뢰구간 (Wilson / 정규근사)과 차이의 신뢰구간
+- Holm / Benjamini-Hochberg 다중비교 보정 p-value
+
+사용법:
+    from significance import segment_tests
+
+    result = segment_tests(cube, ["region", "device", "age_group"], correction="bh")
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def proportion_confint(count, nobs, alpha=0.05, method="wilson"):
+    """전환율 신뢰구간 (배열 입력 가능)
+
+    method: "wilson" (기본) 또는 "normal" (정규근사, Wald)
+    """
+    count = np.asarray(count, dtype=float)
+    nobs = np.asarray(nobs, dtype=float)
+    z = stats.norm.ppf(1 - alpha / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = count / nobs
+        if method == "normal":
+            half = z * np.sqrt(p * (1 - p) / nobs)
+            low, high = p - half, p + half
+        elif method == "wilson":
+            denom = 1 + z ** 2 / nobs
+            center = (p + z ** 2 / (2 * nobs)) / denom
+            half = z * np.sqrt(p * (1 - p) / nobs + z ** 2 / (4 * nobs ** 2)) / denom
+            low, high = center - half, center + half
+        else:
+            raise ValueError(f"지원하지 않는 신뢰구간 방법: {method}")
+    return np.clip(low, 0, 1), np.clip(high, 0, 1)
+
+
+def two_proportion_test(x_a, n_a, x_b, n_b, alpha=0.05):
+    """A(control) vs B(treatment) 두 비율 검정을 배열 단위로 일괄 계산
+
+    반환값은 배열 딕셔너리입니다.
+      diff, lift: 전환율 차이(B-A)와 상대 개선율
+      z, p_value: 합동 표준오차 기반 Z-검정
+      chi2, chi2_p_value: Yates 보정 2×2 Chi-square 검정
+      diff_ci_low, diff_ci_high: 차이의 (비합동 표준오차) 신뢰구간
+    """
+    x_a, n_a, x_b, n_b = (np.asarray(v, dtype=float) for v in (x_a, n_a, x_b, n_b))
+    z_crit = stats.norm.ppf(1 - alpha / 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_a = x_a / n_a
+        p_b = x_b / n_b
+        diff = p_b - p_a
+
+        # Z-test (합동 비율)
+        p_pool = (x_a + x_b) / (n_a + n_b)
+        se_pool = np.sqrt(p_pool * (1 - p_pool) * (1 / n_a + 1 / n_b))
+        z = diff / se_pool
+        p_value = 2 * stats.norm.sf(np.abs(z))
+
+        # Chi-square (Yates 보정, 2×2에서는 모든 셀의 |O-E|가 같음)
+        total = n_a + n_b
+        conv = x_a + x_b
+        non_conv = total - conv
+        abs_dev = np.abs(x_a * (n_b - x_b) - x_b * (n_a - x_a)) / total
+        corrected = np.maximum(abs_dev - 0.5, 0.0)
+        chi2 = corrected ** 2 * total ** 3 / (n_a * n_b * conv * non_conv)
+        chi2_p_value = stats.chi2.sf(chi2, df=1)
+
+        # 차이의 신뢰구간 (비합동 표준오차)
+        se_diff = np.sqrt(p_a * (1 - p_a) / n_a + p_b * (1 - p_b) / n_b)
+        lift = diff / p_a
+
+    return {
+        "rate_a": p_a,
+        "rate_b": p_b,
+        "diff": diff,
+        "lift": lift,
+        "z": z,
+        "p_value": p_value,
+        "chi2": chi2,
+        "chi2_p_value": chi2_p_value,
+        "diff_ci_low": diff - z_crit * se_diff,
+        "diff_ci_high": diff + z_crit * se_diff,
+    }
+
+
+def adjust_pvalues(p_values, method="holm"):
+    """다중비교 보정 p-value (NaN은 그대로 두고 나머지만 보정)
+
+    method: "holm" (FWER), "bh" (Benjamini-Hochberg FDR), "bonferroni", "none"
+    """
+    p = np.asarray(p_values, dtype=float)
+    out = np.full_like(p, np.nan)
+    valid = ~np.isnan(p)
+    pv = p[valid]
+    m = pv.size
+    if m == 0 or method == "none":
+        out[valid] = pv
+        return out
+
+    if method == "bonferroni":
+        out[valid] = np.minimum(pv * m, 1.0)
+        return out
+
+    order = np.argsort(pv)
+    ranked = pv[order]
+    if method == "holm":
+        adjusted = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    elif method == "bh":
+        adjusted = ranked * m / np.arange(1, m + 1)
+        adjusted = np.minimum.accumulate(adjusted[::-1])[::-1]
+    else:
+        raise ValueError(f"지원하지 않는 보정 방법: {method}")
+
+    result = np.empty(m)
+    result[order] = np.minimum(adjusted, 1.0)
+    out[valid] = result
+    return out
+
+
+def segment_tests(cube, dims, control="control", treatment="treatment",
+                  alpha=0.05, correction="holm", ci_method="wilson"):
+    """세그먼트 셀 전체에 대해 control vs treatment 전환율 검정을 일괄 수행
+
+    dims가 빈 리스트이면 전체 그룹 비교 1행을 반환합니다.
+    한쪽 그룹이 비어 있는 셀은 통계량이 NaN이며 보정 대상에서 제외됩니다.
+    """
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    counts = cube.rollup(dims + ["test_group"])[["n", "converted_sum"]]
+    counts = counts.unstack("test_group")
+    if not dims:
+        counts = counts.to_frame().T if isinstance(counts, pd.Series) else counts
+        counts.index = pd.Index(["전체"], name="segment")
+
+    def _col(stat, group):
+        if (stat, group) in counts.columns:
+            return counts[(stat, group)].fillna(0).to_numpy(dtype=float)
+        return np.zeros(len(counts))
+
+    n_a, x_a = _col("n", control), _col("converted_sum", control)
+    n_b, x_b = _col("n", treatment), _col("converted_sum", treatment)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = two_proportion_test(x_a, n_a, x_b, n_b, alpha=alpha)
+    ci_a = proportion_confint(x_a, n_a, alpha=alpha, method=ci_method)
+    ci_b = proportion_confint(x_b, n_b, alpha=alpha, method=ci_method)
+
+    out = pd.DataFrame({
+        "n_control": n_a.astype(np.int64),
+        "conv_control": x_a.astype(np.int64),
+        "n_treatment": n_b.astype(np.int64),
+        "conv_treatment": x_b.astype(np.int64),
+        "rate_control": result["rate_a"],
+        "rate_treatment": result["rate_b"],
+        "ci_control_low": ci_a[0],
+        "ci_control_high": ci_a[1],
+        "ci_treatment_low": ci_b[0],
+        "ci_treatment_high": ci_b[1],
+        "diff": result["diff"],
+        "diff_ci_low": result["diff_ci_low"],
+        "diff_ci_high": result["diff_ci_high"],
+        "lift": result["lift"],
+        "z": result["z"],
+        "p_value": result["p_value"],
+        "chi2": result["chi2"],
+        "chi2_p_value": result["chi2_p_value"],
+    }, index=counts.index)
+
+    testable = (n_a > 0) & (n_b > 0)
+    p = np.where(testable, out["p_value"].to_numpy(), np.nan)
+    out["p_adjusted"] = adjust_pvalues(p, method=correction)
+    out["significant"] = out["p_adjusted"] < alpha
+    return out
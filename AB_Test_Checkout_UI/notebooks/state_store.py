@@ -0,0 +1,281 @@
+"""
+일별 증분 상태 저장소 - 방문일 파티션 단위 충분통계량 보관
+=====================================
+
+새 방문일 데이터가 들어올 때마다 한 달치 원본을 다시 집계하지 않도록,
+방문일(visit_date) 파티션별 큐브 셀(건수/합계/제곱합)과 분위수 스케치
+버킷 건수(quantile_sketch.py)를 SQLite 파일에 저장해 둡니다.
+
+- 실행할 때마다 아직 저장되지 않은 방문일 행만 집계해서 추가합니다.
+- 이미 반영한 원본 파일(지문 기준)은 파싱 자체를 건너뜁니다.
+  (일자별로 파일이 쌓이는 경우 새 파일 하나만 읽음)
+- 한 번에 넘긴 새 파일들은 호출 시작 시점의 저장 방문일 기준으로 함께 집계하므로,
+  같은 방문일이 여러 파일(샤드)에 나뉘어 있어도 모두 반영됩니다. 이미 저장된
+  방문일의 행은 반영하지 않고 경고로 알립니다.
+- 리포트는 저장된 모든 파티션을 합친 큐브/스케치로 만듭니다.
+- 마지막 날처럼 아직 수집 중인 날짜는 refresh로 지정하면 지우고 다시
+  집계합니다.
+
+사용법:
+    from state_store import StateStore
+
+    store = StateStore("../data/state/ab_test_state.sqlite")
+    new_dates = store.ingest_files(["ab_test_checkout_ui.csv"])
+    cube = store.cube()
+    sketch = store.sketch()
+    store.close()
+"""
+
+import os
+import sqlite3
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from cube import CUBE_DIMENSIONS, STAT_COLUMNS, Cube
+from data_loader import file_fingerprint, iter_csv_typed
+from instrumentation import count
+from quantile_sketch import RELATIVE_ACCURACY, SKETCH_DIMENSIONS, QuantileSketch, SketchBuilder
+from streaming import DEFAULT_CHUNK_SIZE, accumulate_chunks
+
+
+# 저장 형식이 바뀌면 올려서 기존 상태 파일 사용을 막음
+STATE_VERSION = 2
+
+# 파티션 기준 차원
+PARTITION_COLUMN = "visit_date"
+
+
+def _schema_sql(dims):
+    dim_columns = ", ".join(f'"{dim}" TEXT' for dim in dims)
+    sketch_columns = ", ".join(f'"{dim}" TEXT' for dim in SKETCH_DIMENSIONS)
+    stat_columns = ", ".join(
+        f'"{col}" {"INTEGER" if col == "n" or col.endswith("_n") else "REAL"}'
+        for col in STAT_COLUMNS
+    )
+    return [
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+        "CREATE TABLE IF NOT EXISTS partitions ("
+        "visit_date TEXT PRIMARY KEY, rows INTEGER, ingested_at TEXT)",
+        "CREATE TABLE IF NOT EXISTS sources ("
+        "path TEXT, fingerprint TEXT, ingested_at TEXT, PRIMARY KEY (path, fingerprint))",
+        f"CREATE TABLE IF NOT EXISTS cells ({dim_columns}, {stat_columns})",
+        "CREATE INDEX IF NOT EXISTS cells_visit_date ON cells (visit_date)",
+        f"CREATE TABLE IF NOT EXISTS sketches ({sketch_columns}, metric TEXT, key INTEGER, count INTEGER)",
+        "CREATE INDEX IF NOT EXISTS sketches_visit_date ON sketches (visit_date)",
+    ]
+
+
+class StateStore:
+    """방문일 파티션별 큐브 셀을 보관하는 SQLite 상태 저장소"""
+
+    def __init__(self, path, dims=CUBE_DIMENSIONS):
+        self.dims = list(dims)
+        if PARTITION_COLUMN not in self.dims:
+            raise ValueError(f"큐브 차원에 {PARTITION_COLUMN}이 있어야 합니다")
+        self.path = path
+        # 마지막 반영에서 이미 저장된 방문일이라 건너뛴 행 수 {방문일: 행 수}
+        self.skipped = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            for sql in _schema_sql(self.dims):
+                self.conn.execute(sql)
+        self._check_meta()
+
+    def _check_meta(self):
+        """저장 형식 버전과 차원 구성이 현재 코드와 같은지 확인"""
+        expected = {
+            "version": str(STATE_VERSION),
+            "dims": ",".join(self.dims),
+            "sketch": f"{','.join(SKETCH_DIMENSIONS)};{RELATIVE_ACCURACY}",
+        }
+        stored = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if not stored:
+            with self.conn:
+                self.conn.executemany("INSERT INTO meta VALUES (?, ?)", expected.items())
+        elif stored != expected:
+            raise ValueError(
+                f"상태 파일 형식이 다릅니다 ({self.path}): {stored} != {expected}. "
+                "파일을 지우고 다시 집계하세요."
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def seen_dates(self):
+        """이미 저장된 방문일 목록 ('YYYY-MM-DD' 문자열 집합)"""
+        return {row[0] for row in self.conn.execute("SELECT visit_date FROM partitions")}
+
+    def partitions(self):
+        """파티션별 방문자 수 / 반영 시각"""
+        return pd.read_sql_query(
+            "SELECT visit_date, rows, ingested_at FROM partitions ORDER BY visit_date",
+            self.conn,
+        )
+
+    def _read(self, table, dims, stat_columns):
+        columns = ", ".join(f'"{col}"' for col in dims + stat_columns)
+        cells = pd.read_sql_query(f"SELECT {columns} FROM {table}", self.conn)
+        if cells.empty:
+            raise ValueError(f"상태 저장소가 비어 있습니다: {self.path}")
+        for dim in dims:
+            if dim == PARTITION_COLUMN:
+                cells[dim] = pd.to_datetime(cells[dim])
+            else:
+                cells[dim] = cells[dim].astype("category")
+        return cells
+
+    def cube(self):
+        """저장된 모든 파티션을 합친 큐브"""
+        return Cube(self._read("cells", self.dims, STAT_COLUMNS), self.dims)
+
+    def sketch(self):
+        """저장된 모든 파티션의 분위수 스케치 (버킷 건수는 파티션 간에 그대로 합산)"""
+        cells = self._read("sketches", SKETCH_DIMENSIONS + ["metric"], ["key", "count"])
+        cells = (
+            cells.groupby(SKETCH_DIMENSIONS + ["metric", "key"], observed=True, dropna=False, sort=False)["count"]
+            .sum()
+            .reset_index()
+        )
+        return QuantileSketch(cells, SKETCH_DIMENSIONS)
+
+    # ------------------------------------------------------------------
+    # 반영
+    # ------------------------------------------------------------------
+    def drop_dates(self, dates):
+        """지정한 방문일 파티션 삭제 (다시 집계할 때 사용)"""
+        dates = [pd.Timestamp(d).strftime("%Y-%m-%d") for d in dates]
+        with self.conn:
+            self.conn.executemany("DELETE FROM cells WHERE visit_date = ?", [(d,) for d in dates])
+            self.conn.executemany("DELETE FROM sketches WHERE visit_date = ?", [(d,) for d in dates])
+            self.conn.executemany("DELETE FROM partitions WHERE visit_date = ?", [(d,) for d in dates])
+            # 삭제한 날짜가 포함된 파일은 다시 읽어야 하므로 파일 기록도 지움
+            if dates:
+                self.conn.execute("DELETE FROM sources")
+
+    def ingest_chunks(self, chunks, seen=None):
+        """방문자 로그 청크 중 저장되지 않은 방문일 행만 집계해 추가
+
+        seen: 이미 저장된 것으로 볼 방문일 (None이면 현재 저장소 기준)
+        이미 저장된 방문일의 행은 반영하지 않고 경고합니다 (다시 집계하려면 refresh).
+        반환: 새로 추가한 방문일 목록 (정렬)
+        """
+        seen = self.seen_dates() if seen is None else seen
+        skipped = self.skipped = {}
+
+        def _unseen(chunk_iter):
+            for chunk in chunk_iter:
+                dates = chunk[PARTITION_COLUMN].dt.strftime("%Y-%m-%d")
+                mask = ~dates.isin(seen).to_numpy()
+                for date, n in dates[~mask].value_counts().items():
+                    skipped[date] = skipped.get(date, 0) + int(n)
+                if mask.any():
+                    yield chunk[mask] if not mask.all() else chunk
+
+        builder = SketchBuilder()
+        try:
+            new_cube = accumulate_chunks(builder.observe(_unseen(chunks)), self.dims)
+        except ValueError:
+            # 새 방문일이 없음
+            new_cube = None
+        if skipped:
+            warnings.warn(
+                f"이미 저장된 방문일 {len(skipped):,}일의 행 {sum(skipped.values()):,}건은 반영하지 않았습니다 "
+                f"({min(skipped)} ~ {max(skipped)}, 다시 집계하려면 refresh로 지정)"
+            )
+        if new_cube is None:
+            return []
+        self._write(new_cube.cells, builder.result().cells)
+        return sorted(new_cube.cells[PARTITION_COLUMN].dt.strftime("%Y-%m-%d").unique())
+
+    def ingest_frame(self, df):
+        """이미 로드한 방문자 로그 DataFrame 반영"""
+        return self.ingest_chunks([df])
+
+    def ingest_files(self, paths, chunksize=DEFAULT_CHUNK_SIZE, refresh=()):
+        """방문자 로그 CSV 반영 (이미 반영한 파일은 건너뜀)
+
+        refresh: 지우고 다시 집계할 방문일 목록 (예: 수집 중인 마지막 날)
+        새 파일들은 호출 시작 시점의 저장 방문일을 기준으로 한 번에 집계합니다
+        (같은 방문일이 여러 파일에 나뉘어 있어도 앞 파일이 뒤 파일을 가리지 않음).
+        반환: 새로 추가한 방문일 목록
+        """
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        if refresh:
+            self.drop_dates(refresh)
+
+        new_sources = []
+        for path in paths:
+            key = (os.path.abspath(path), file_fingerprint(path))
+            exists = self.conn.execute(
+                "SELECT 1 FROM sources WHERE path = ? AND fingerprint = ?", key
+            ).fetchone()
+            if exists or key in new_sources:
+                count("cache_hits")
+                continue
+            count("cache_misses")
+            new_sources.append(key)
+        if not new_sources:
+            return []
+
+        def _chunks():
+            for path, _ in new_sources:
+                yield from iter_csv_typed(path, "ab_test_checkout_ui", chunksize)
+
+        new_dates = self.ingest_chunks(_chunks(), seen=self.seen_dates())
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                [key + (now,) for key in new_sources],
+            )
+        return new_dates
+
+    def _write(self, cells, sketch_cells):
+        """큐브 셀, 스케치 버킷, 파티션 기록을 한 트랜잭션으로 저장"""
+        rows = cells.groupby(cells[PARTITION_COLUMN].dt.strftime("%Y-%m-%d"))["n"].sum()
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self._insert("cells", _sql_frame(cells, self.dims, STAT_COLUMNS))
+            self._insert("sketches", _sql_frame(sketch_cells, SKETCH_DIMENSIONS + ["metric"], ["key", "count"]))
+            self.conn.executemany(
+                "INSERT INTO partitions VALUES (?, ?, ?)",
+                [(date, int(n), now) for date, n in rows.items()],
+            )
+
+    def _insert(self, table, out):
+        placeholders = ", ".join("?" * len(out.columns))
+        columns = ", ".join(f'"{col}"' for col in out.columns)
+        records = [
+            tuple(v.item() if isinstance(v, np.generic) else v for v in row)
+            for row in out.itertuples(index=False, name=None)
+        ]
+        self.conn.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", records)
+
+
+def _sql_frame(cells, dims, stat_columns):
+    """셀 프레임 -> SQLite 저장용 프레임 (날짜는 문자열, 결측 라벨은 NULL)"""
+    out = pd.DataFrame(index=cells.index)
+    for dim in dims:
+        if dim == PARTITION_COLUMN:
+            out[dim] = cells[dim].dt.strftime("%Y-%m-%d")
+        else:
+            out[dim] = cells[dim].astype(object).where(cells[dim].notna(), None)
+    for col in stat_columns:
+        out[col] = cells[col].to_numpy()
+    return out
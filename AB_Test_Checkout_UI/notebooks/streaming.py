@@ -0,0 +1,87 @@
+"""
+스트리밍 분석 모드 - 청크 단위 병합 누적기
+=====================================
+
+방문자 로그를 고정 크기 청크로 읽으면서 청크마다 충분통계량 큐브를 만들고
+바로 병합합니다. 메모리에는 항상 청크 하나와 누적 큐브만 남으므로 파일
+크기와 관계없이 최대 메모리 사용량이 일정합니다.
+
+큐브는 건수/합계/제곱합만 담고 있어 교환·결합 법칙이 성립하므로, 파일별·
+워커별로 따로 만든 결과를 순서와 관계없이 합칠 수 있습니다.
+
+사용법:
+    from streaming import stream_cube
+
+    cube = stream_cube(["ab_test_2024_05.csv", "ab_test_2024_06.csv"],
+                       chunksize=1_000_000, workers=4)
+    cube.summary("test_group")
+
+주의: 중앙값처럼 큐브로 계산할 수 없는 통계량은 큐브 대신 분위수 스케치
+(quantile_sketch.py, 상대 오차 1%)로 근사합니다.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from cube import CUBE_DIMENSIONS, Cube, merge_cubes
+from data_loader import iter_csv_typed
+
+
+# 기본 청크 크기 (행)
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# 청크 큐브를 몇 개 모을 때마다 누적 큐브로 병합할지
+MERGE_EVERY = 8
+
+
+def accumulate_chunks(chunks, dims=CUBE_DIMENSIONS, merge_every=MERGE_EVERY):
+    """청크 이터레이터를 받아 큐브로 누적
+
+    청크 큐브를 merge_every개씩 모아 병합하므로 대기 중인 부분 집계는
+    최대 merge_every개로 제한됩니다.
+    """
+    total = None
+    pending = []
+    for chunk in chunks:
+        pending.append(Cube.from_frame(chunk, dims))
+        if len(pending) >= merge_every:
+            total = merge_cubes(([total] if total is not None else []) + pending)
+            pending = []
+    if pending:
+        total = merge_cubes(([total] if total is not None else []) + pending)
+    if total is None:
+        raise ValueError("읽은 데이터가 없습니다")
+    return total
+
+
+def stream_file(path, chunksize=DEFAULT_CHUNK_SIZE, dims=CUBE_DIMENSIONS):
+    """방문자 로그 CSV 하나를 청크 단위로 읽어 큐브 생성"""
+    chunks = iter_csv_typed(path, "ab_test_checkout_ui", chunksize)
+    return accumulate_chunks(chunks, dims)
+
+
+def _stream_file_task(args):
+    path, chunksize, dims = args
+    return stream_file(path, chunksize, dims)
+
+
+def stream_cube(paths, chunksize=DEFAULT_CHUNK_SIZE, dims=CUBE_DIMENSIONS, workers=None):
+    """여러 방문자 로그 파일을 스트리밍으로 집계해 하나의 큐브로 병합
+
+    workers가 2 이상이면 파일 단위로 프로세스 풀에 나눠 처리합니다.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    paths = list(paths)
+    if not paths:
+        raise ValueError("집계할 파일이 없습니다")
+
+    tasks = [(path, chunksize, list(dims)) for path in paths]
+    if workers is None:
+        workers = min(len(paths), os.cpu_count() or 1)
+    if workers <= 1 or len(paths) == 1:
+        cubes = [_stream_file_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            cubes = list(pool.map(_stream_file_task, tasks))
+    return merge_cubes(cubes)
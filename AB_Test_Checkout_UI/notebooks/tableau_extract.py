@@ -0,0 +1,202 @@
+"""
+Tableau 추출 파일 - 대시보드용 사전 집계 테이블
+=====================================
+
+Tableau 워크북(Executive Summary / Segment Analysis / Statistical Validation)이
+방문자 원본 행을 매번 스캔하지 않도록, 분석 결과에서 미리 집계한 작은 테이블을
+컬럼형 파일(Parquet, zstd 압축 + 라벨 사전 인코딩)로 저장합니다.
+
+  segment_daily      : 그룹 × 방문일 × 디바이스 × 연령대 × 지역 건수/합계/제곱합
+                       (필터를 바꿔도 합계로 전환율/객단가/결제시간을 다시 계산 가능)
+  executive_summary  : 그룹별 전환율·신뢰구간·객단가·결제시간 + 전체 검정 결과
+  segment_tests      : 세그먼트별 전환율·신뢰구간·차이·보정 p-value
+  daily_cumulative   : 일별/누적 전환율, 누적 신뢰구간, 순차 검정 통계량
+  payment_mix        : 그룹별 결제수단 비중
+
+추출 폴더에는 테이블별 파일과 manifest.json(행 수, 컬럼, 생성 시각)이 저장됩니다.
+pyarrow가 없거나 format="csv"면 CSV(utf-8-sig)로 저장합니다.
+
+사용법:
+    from tableau_extract import export_extract
+
+    export_extract(data["cube"], results, "../outputs/tableau_extract/")
+
+    python ab_test_analysis.py --tableau-extract ../outputs/tableau_extract/
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow는 선택 의존성
+    pa = None
+    pq = None
+
+from significance import proportion_confint
+
+
+# segment_daily 차원 (성별/결제수단은 합쳐서 행 수를 줄임)
+EXTRACT_DIMENSIONS = ["test_group", "visit_date", "device", "age_group", "region"]
+
+# 큐브 통계량 -> 추출 컬럼 이름
+STAT_NAMES = {
+    "n": "visitors",
+    "converted_sum": "conversions",
+    "order_value_sum": "order_value_sum",
+    "order_value_sumsq": "order_value_sumsq",
+    "checkout_time_sec_n": "checkout_time_n",
+    "checkout_time_sec_sum": "checkout_time_sum",
+    "checkout_time_sec_sumsq": "checkout_time_sumsq",
+}
+
+MANIFEST_FILE = "manifest.json"
+PARQUET_COMPRESSION = "zstd"
+
+
+# =============================================================================
+# 테이블 생성
+# =============================================================================
+def segment_daily(cube, dims=EXTRACT_DIMENSIONS):
+    """대시보드 필터용 차원별 건수/합계 (정수 건수는 정수로)"""
+    table = cube.rollup(dims)[list(STAT_NAMES)].rename(columns=STAT_NAMES).reset_index()
+    for col in ["visitors", "conversions", "checkout_time_n"]:
+        table[col] = table[col].round().astype(np.int64)
+    return table
+
+
+def executive_summary(results):
+    """그룹별 핵심 지표 + 전체 검정 결과 (그룹 행마다 같은 값)"""
+    r = results
+    summary = r["group_summary"].loc[r["arms"]]
+    table = pd.DataFrame({
+        "visitors": summary["visitors"].astype(np.int64),
+        "conversions": summary["conversions"],
+        "conversion_rate": summary["conversion_rate"],
+        "aov": summary["aov_mean"],
+        "checkout_time_mean": summary["checkout_time_mean"],
+    })
+    table["ci_low"] = r["arm_ci"]["low"].to_numpy()
+    table["ci_high"] = r["arm_ci"]["high"].to_numpy()
+    table["absolute_diff"] = r["absolute_diff"]
+    table["relative_lift_pct"] = r["relative_lift"]
+    table["z_score"] = r["z_score"]
+    table["p_value"] = r["p_value_z"]
+    table["chi2"] = r["chi2"]
+    table["chi2_p_value"] = r["p_value"]
+    table.index.name = "test_group"
+    return table.reset_index()
+
+
+def segment_tests(results):
+    """세그먼트 검정 결과를 한 테이블로 (dimension: 'device', 'region × device × age_group' 등)"""
+    frames = []
+    for dims, correction, result in results["segment_tests"]:
+        frame = result.reset_index()
+        segment = frame[dims[0]].astype(str)
+        for dim in dims[1:]:
+            segment = segment + " / " + frame[dim].astype(str)
+        frame.insert(0, "segment", segment)
+        frame.insert(0, "correction", correction)
+        frame.insert(0, "dimension", " × ".join(dims))
+        frames.append(frame.drop(columns=dims))
+    return pd.concat(frames, ignore_index=True)
+
+
+def daily_cumulative(results, alpha=0.05):
+    """방문일 × 그룹 일별/누적 전환율과 누적 신뢰구간, 순차 검정 통계량"""
+    daily = results["daily_counts"]
+    cumulative = results["cumulative_counts"]
+    frames = []
+    for group in results["arms"]:
+        low, high = proportion_confint(cumulative[("converted_sum", group)], cumulative[("n", group)], alpha)
+        frames.append(pd.DataFrame({
+            "visit_date": daily.index,
+            "test_group": group,
+            "visitors": daily[("n", group)].to_numpy(dtype=np.int64),
+            "conversions": daily[("converted_sum", group)].round().to_numpy(dtype=np.int64),
+            "conversion_rate": (daily[("converted_sum", group)] / daily[("n", group)]).to_numpy(),
+            "cum_visitors": cumulative[("n", group)].to_numpy(dtype=np.int64),
+            "cum_conversions": cumulative[("converted_sum", group)].round().to_numpy(dtype=np.int64),
+            "cum_conversion_rate": results["cumulative_rate"][group].to_numpy(),
+            "cum_ci_low": low,
+            "cum_ci_high": high,
+        }))
+    table = pd.concat(frames, ignore_index=True)
+
+    history = results.get("sequential_history")
+    if history is not None:
+        sequential = history[["z", "msprt_p_value", "obf_boundary_z", "msprt_reject", "obf_reject"]]
+        sequential = sequential.rename(columns=lambda c: f"seq_{c}")
+        # 기각 불가 구간의 무한대 경계(inf)는 Tableau 숫자 필드에 맞게 결측으로
+        sequential = sequential.replace({"seq_obf_boundary_z": {np.inf: np.nan}})
+        sequential.index = pd.to_datetime(sequential.index)
+        table = table.merge(sequential, left_on="visit_date", right_index=True, how="left")
+    return table.sort_values(["visit_date", "test_group"], ignore_index=True)
+
+
+def payment_mix(results):
+    """그룹 × 결제수단 비중(%)"""
+    table = results["payment_dist"].stack().rename("share_pct").reset_index()
+    return table
+
+
+def build_extract(cube, results):
+    """추출 테이블 전체 -> {테이블명: DataFrame}"""
+    return {
+        "segment_daily": segment_daily(cube),
+        "executive_summary": executive_summary(results),
+        "segment_tests": segment_tests(results),
+        "daily_cumulative": daily_cumulative(results),
+        "payment_mix": payment_mix(results),
+    }
+
+
+# =============================================================================
+# 저장
+# =============================================================================
+def _write_table(df, path, fmt):
+    if fmt == "parquet":
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, path, compression=PARQUET_COMPRESSION)
+    else:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def write_extract(tables, output_dir, fmt="parquet", source_rows=None, verbose=True):
+    """테이블별 파일과 manifest.json 저장 -> 저장한 경로 목록"""
+    if fmt == "parquet" and pa is None:
+        fmt = "csv"
+    if fmt not in ("parquet", "csv"):
+        raise ValueError(f"지원하지 않는 추출 형식: {fmt}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    paths = []
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "format": fmt,
+        "source_rows": source_rows,
+        "tables": {},
+    }
+    for name, df in tables.items():
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        _write_table(df, path, fmt)
+        paths.append(path)
+        manifest["tables"][name] = {"file": os.path.basename(path), "rows": len(df),
+                                    "columns": [str(c) for c in df.columns]}
+        if verbose:
+            print(f"✅ '{os.path.basename(path)}' 저장 완료! ({len(df):,}행)")
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return paths
+
+
+def export_extract(cube, results, output_dir, fmt="parquet", verbose=True):
+    """분석 결과에서 Tableau 추출 테이블을 만들어 저장"""
+    return write_extract(build_extract(cube, results), output_dir, fmt,
+                         source_rows=cube.total_rows, verbose=verbose)
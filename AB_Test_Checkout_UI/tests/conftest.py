@@ -0,0 +1,33 @@
+"""
+테스트 공통 설정 - notebooks/ 모듈 import 경로와 20k 방문자 데이터 경로
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NOTEBOOKS = os.path.join(ROOT, "notebooks")
+DATA_PATH = os.path.join(ROOT, "data", "raw")
+
+if NOTEBOOKS not in sys.path:
+    sys.path.insert(0, NOTEBOOKS)
+
+
+@pytest.fixture(scope="session")
+def data_path():
+    return DATA_PATH
+
+
+@pytest.fixture(scope="session")
+def visitor_path():
+    return os.path.join(DATA_PATH, "ab_test_checkout_ui.csv")
+
+
+@pytest.fixture(scope="session")
+def visitors(visitor_path):
+    """원본 CSV 그대로 읽은 방문자 로그 (샤드 파일 작성용)"""
+    import pandas as pd
+
+    return pd.read_csv(visitor_path, encoding="utf-8-sig")
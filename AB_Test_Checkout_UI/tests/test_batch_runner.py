@@ -0,0 +1,23 @@
+import pytest
+
+import batch_runner
+
+
+@pytest.fixture(scope="module")
+def ab_labeled_log(visitors, tmp_path_factory):
+    """그룹 라벨이 control / treatment가 아닌 (A / B) 방문자 로그"""
+    path = tmp_path_factory.mktemp("batch") / "exp_ab.csv"
+    frame = visitors.assign(test_group=visitors["test_group"].map({"control": "A", "treatment": "B"}))
+    frame.to_csv(path, index=False, encoding="utf-8-sig")
+    return str(path)
+
+
+def test_batch_record_uses_arms_from_the_log(ab_labeled_log, data_path, visitors):
+    record = batch_runner.run_experiment("exp_ab", ab_labeled_log, data_path,
+                                         {"bootstrap_replicates": 100})
+    assert record["status"] == "ok", record.get("traceback")
+    assert (record["control_arm"], record["treatment_arm"]) == ("A", "B")
+    counts = visitors["test_group"].value_counts()
+    assert record["visitors"] == {"A": counts["control"], "B": counts["treatment"]}
+    assert record["visitors_control"] == counts["control"]
+    assert record["integrity_passed"]
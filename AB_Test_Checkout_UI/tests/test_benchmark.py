@@ -0,0 +1,19 @@
+import json
+
+import pytest
+
+import benchmark
+
+
+@pytest.mark.parametrize("streaming_from", [benchmark.STREAMING_MIN_ROWS, 1])
+def test_benchmark_runs_all_stages_at_20k(tmp_path, streaming_from):
+    output = tmp_path / "bench.json"
+    code = benchmark.main(["--sizes", "20000", "--data-root", str(tmp_path / "data"),
+                           "--output", str(output), "--streaming-from", str(streaming_from)])
+    assert code == 0
+
+    with open(output, encoding="utf-8") as f:
+        stages = [r["stage"] for r in json.load(f)["results"]]
+    assert {"cube", "sketch", "aggregate", "significance", "sequential", "plotting"} <= set(stages)
+    if streaming_from > 20000:
+        assert {"load", "cache_build", "cache_load", "bootstrap"} <= set(stages)
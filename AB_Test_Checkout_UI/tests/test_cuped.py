@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+import pytest
+
+from cuped import pre_period_covariates
+
+
+@pytest.fixture(scope="module")
+def order_tables(data_path):
+    return (pd.read_csv(os.path.join(data_path, "kr_orders.csv")),
+            pd.read_csv(os.path.join(data_path, "kr_payments.csv")))
+
+
+def test_pre_period_ends_at_first_visit(visitors, order_tables):
+    orders, payments = order_tables
+    # 실험이 4월 15일에 시작했다면 그 이후 주문은 공변량에서 빠져야 함
+    shifted = visitors.assign(visit_date=pd.to_datetime(visitors["visit_date"]) - pd.Timedelta(days=16))
+    start = shifted["visit_date"].min()
+    assert start == pd.Timestamp("2024-04-15")
+
+    covariates = pre_period_covariates(shifted, orders, payments)
+    expected = pre_period_covariates(shifted, orders, payments, start=start)
+    pd.testing.assert_frame_equal(covariates, expected)
+
+    visitor_ids = set(shifted["customer_id"])
+    pre = orders[(pd.to_datetime(orders["order_date"]) < start) & (orders["order_status"] != "취소")
+                 & orders["customer_id"].isin(visitor_ids)]
+    assert covariates["pre_orders"].sum() == pre.merge(shifted[["customer_id"]], on="customer_id").shape[0]
+    assert covariates["pre_orders"].sum() < pre_period_covariates(shifted, orders, payments,
+                                                                  start="2024-05-01")["pre_orders"].sum()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import Cube
+from integrity import IntegrityScanner, run_integrity, scan_frame, srm_checks
+
+
+@pytest.fixture(scope="module")
+def three_arms(visitors):
+    """20k 방문자의 약 1/3을 variant_b로 바꾼 3그룹 로그"""
+    frame = visitors.copy()
+    frame.loc[np.random.default_rng(3).random(len(frame)) < 1 / 3, "test_group"] = "variant_b"
+    return frame
+
+
+def test_third_arm_is_a_regular_group(three_arms):
+    result = run_integrity(Cube.from_frame(three_arms), three_arms)
+    report = result["report"].set_index("check")["status"]
+    assert result["scan"]["arms"] == ["control", "treatment", "variant_b"]
+    assert result["scan"]["unknown_group_rows"] == 0
+    assert report["unknown_test_group"] == "pass"
+    assert report["srm_overall"] == "pass"
+    assert result["srm"].iloc[0]["n_variant_b"] == (three_arms["test_group"] == "variant_b").sum()
+
+
+def test_srm_uses_configured_shares(three_arms):
+    cube = Cube.from_frame(three_arms)
+    shares = {"control": 0.5, "treatment": 0.25, "variant_b": 0.25}
+    assert srm_checks(cube, shares=shares).iloc[0]["srm"]
+    assert not srm_checks(cube).iloc[0]["srm"]
+
+
+def test_streaming_scan_matches_frame_scan(three_arms):
+    scanner = IntegrityScanner()
+    for start in range(0, len(three_arms), 5000):
+        scanner.update(three_arms.iloc[start:start + 5000])
+    assert scanner.result() == scan_frame(three_arms, arms=["control", "treatment", "variant_b"])
+
+
+@pytest.mark.parametrize("prefix", ["CUST_", "C-"])
+def test_cross_arm_assignment_counts_any_pair_of_groups(three_arms, prefix):
+    frame = three_arms[three_arms["test_group"] != "treatment"].head(100)
+    frame = frame.assign(customer_id=frame["customer_id"].str.replace("CUST_", prefix))
+    # 첫 고객을 다른 그룹으로 한 번 더 (control / variant_b 교차, "C-"는 해시 키 경로)
+    other = "control" if frame.iloc[0]["test_group"] == "variant_b" else "variant_b"
+    frame = pd.concat([frame, frame.iloc[[0]].assign(test_group=other)], ignore_index=True)
+    scan = scan_frame(frame)
+    assert scan["hashed_keys"] == (prefix != "CUST_")
+    assert scan["cross_arm_customers"] == 1
+    assert scan["duplicate_customers"] == 1
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from query_backend import CUBE_DIMENSIONS, RELATIVE_ACCURACY, _scan_pandas, scan_visitors
+from quantile_sketch import SKETCH_DIMENSIONS
+
+FILTERS = [("visit_date", ">=", "2024-05-10"), ("device", "in", ["모바일", "태블릿"])]
+
+
+@pytest.fixture(scope="module")
+def visitor_files(visitors, tmp_path_factory):
+    """방문자 3,000명 CSV / Parquet 픽스처"""
+    folder = tmp_path_factory.mktemp("query_backend")
+    frame = visitors.head(3000)
+    frame.to_csv(folder / "visitors.csv", index=False, encoding="utf-8-sig")
+    frame.to_parquet(folder / "visitors.parquet", index=False)
+    return {"csv": str(folder / "visitors.csv"), "parquet": str(folder / "visitors.parquet")}
+
+
+def _sorted_cells(cells, keys):
+    # 엔진마다 GROUP BY 결과 순서가 다르므로 셀 키로 정렬해 비교
+    return cells.sort_values(keys).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("filters", [None, FILTERS], ids=["all", "filtered"])
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+@pytest.mark.parametrize("backend", ["duckdb", "polars"])
+def test_backend_cells_match_pandas_scan(visitor_files, backend, fmt, filters):
+    pytest.importorskip(backend)
+    path = visitor_files[fmt]
+    expected_cube, expected_sketch = _scan_pandas([path], list(CUBE_DIMENSIONS), filters or [],
+                                                  RELATIVE_ACCURACY, True)
+    cube, sketch = scan_visitors(path, backend=backend, filters=filters)
+
+    assert len(cube.cells) == len(expected_cube.cells) > 0
+    pd.testing.assert_frame_equal(_sorted_cells(cube.cells, list(CUBE_DIMENSIONS)),
+                                  _sorted_cells(expected_cube.cells, list(CUBE_DIMENSIONS)))
+    sketch_keys = list(SKETCH_DIMENSIONS) + ["metric", "key"]
+    pd.testing.assert_frame_equal(_sorted_cells(sketch.cells, sketch_keys),
+                                  _sorted_cells(expected_sketch.cells, sketch_keys))
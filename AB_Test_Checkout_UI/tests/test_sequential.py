@@ -0,0 +1,17 @@
+import numpy as np
+
+from sequential import SequentialMonitor
+
+
+def test_obf_boundary_after_stop_is_missing():
+    monitor = SequentialMonitor(planned_n=20_000)
+    # 첫 확인은 정보 비율이 작아 쓸 alpha가 없음 -> 경계 inf (기각 불가)
+    first = monitor.update(300, 30, 300, 30)
+    assert first["obf_boundary_z"] == np.inf and not first["obf_reject"]
+
+    # 큰 차이로 중단시킨 뒤의 확인은 경계를 계산하지 않음 -> NaN
+    while not monitor.stopped:
+        decision = monitor.update(1500, 150, 1500, 300)
+        assert np.isfinite(decision["obf_boundary_z"])
+    after = monitor.update(1500, 150, 1500, 300)
+    assert np.isnan(after["obf_boundary_z"]) and after["obf_reject"]
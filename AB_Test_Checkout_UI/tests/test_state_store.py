@@ -0,0 +1,28 @@
+import pytest
+
+from state_store import StateStore
+
+
+def test_ingest_files_keeps_all_shards_of_the_same_dates(tmp_path, visitors):
+    a, b = tmp_path / "a.csv", tmp_path / "b.csv"
+    visitors.iloc[::2].to_csv(a, index=False)
+    visitors.iloc[1::2].to_csv(b, index=False)
+
+    with StateStore(str(tmp_path / "state.sqlite")) as store:
+        new_dates = store.ingest_files([str(a), str(b)])
+        assert store.cube().total_rows == len(visitors)
+        assert len(new_dates) == visitors["visit_date"].nunique()
+        assert store.skipped == {}
+
+
+def test_rows_for_stored_dates_are_reported(tmp_path, visitors):
+    full, late = tmp_path / "full.csv", tmp_path / "late.csv"
+    visitors.to_csv(full, index=False)
+    visitors.iloc[:100].to_csv(late, index=False)
+
+    with StateStore(str(tmp_path / "state.sqlite")) as store:
+        store.ingest_files([str(full)])
+        with pytest.warns(UserWarning, match="반영하지 않았습니다"):
+            assert store.ingest_files([str(late)]) == []
+        assert sum(store.skipped.values()) == 100
+        assert store.cube().total_rows == len(visitors)